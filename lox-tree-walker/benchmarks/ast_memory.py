@@ -0,0 +1,49 @@
+"""
+Compares the memory held by the tree AST against a FlatAST, and the
+time a full garbage collection takes with each alive.
+
+    python -m benchmarks.ast_memory [functions]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmarks import sources
+from lox.ast.flat import FlatAST
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+
+
+def parse(source: str):
+    return Parser(RegexLexer(source).iter_tokens()).parse()
+
+
+def flatten(source: str):
+    return FlatAST.from_tree(parse(source))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = sources.program(count)
+    print(f"source: {len(source) / 1e6:.1f} MB")
+
+    for name, build in [("tree", parse), ("FlatAST", flatten)]:
+        gc.collect()
+        tracemalloc.start()
+        result = build(source)
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        gc.collect()
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:<8} {size / 1e6:8.1f} MB   gc.collect() {elapsed * 1000:6.1f} ms")
+        del result
+
+
+if __name__ == "__main__":
+    main()
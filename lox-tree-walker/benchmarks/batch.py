@@ -0,0 +1,38 @@
+"""
+Times the batch front end over a generated project of many files,
+in one process and in a process pool, without the program cache.
+
+    python -m benchmarks.batch [files] [functions per file]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks import sources
+from lox.batch import load_files
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{files} files of {count} functions and classes, {os.cpu_count()} cores")
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(files):
+            path = os.path.join(directory, f"{i}.lox")
+            with open(path, "w") as f:
+                f.write(sources.program(count))
+            paths.append(path)
+
+        for label, workers in [("one process", 1), ("process pool", None)]:
+            start = time.perf_counter()
+            load_files(paths, workers, use_cache=False)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<12}: {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Times startup of a large script through Lox.run_file with a cold and
+a warm program cache, against running it with the cache disabled.
+
+    python -m benchmarks.cache [functions]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks import sources
+from lox import Lox
+from lox.interpreter import Interpreter
+
+
+def timed(path: str, use_cache: bool) -> float:
+    Lox._interpreter = Interpreter()
+
+    start = time.perf_counter()
+    Lox.run_file(path, use_cache=use_cache)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2500
+    source = sources.program(count)
+    print(f"source: {source.count(chr(10))} lines")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "script.lox")
+        with open(path, "w") as f:
+            f.write(source)
+
+        print(f"no cache:   {timed(path, False):8.2f} ms")
+        print(f"cold cache: {timed(path, True):8.2f} ms")
+        print(f"warm cache: {timed(path, True):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Reports the memory still held by long-lived closures once the scopes
+they were declared in have returned, and times calling through them.
+
+    python -m benchmarks.closures
+
+Each callback is declared next to a large temporary it doesn't use.
+"""
+
+import gc
+import io
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from lox import passes
+from lox.interpreter import Interpreter
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+CALLBACKS = 100
+
+SOURCE = f"""
+class Node {{ init(value, next) {{ this.value = value; this.next = next; }} }}
+
+fun make(n) {{
+  var big = "x";
+  for (var i = 0; i < 16; i = i + 1) big = big + big;
+
+  var count = n;
+  fun callback() {{ count = count + 1; return count; }}
+  return callback;
+}}
+
+var callbacks = nil;
+for (var i = 0; i < {CALLBACKS}; i = i + 1) callbacks = Node(make(i), callbacks);
+"""
+
+CALLS = """
+var total = 0;
+for (var round = 0; round < 200; round = round + 1) {
+  var node = callbacks;
+  while (node != nil) { total = total + node.value(); node = node.next; }
+}
+print total;
+"""
+
+
+def main():
+    program = Parser(RegexLexer(SOURCE).iter_tokens()).parse()
+    interpreter = Interpreter()
+    Resolver().resolve_statements(program)
+    passes.prepare(program)
+
+    gc.collect()
+    tracemalloc.start()
+    interpreter.interpret(program)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"retained: {size / CALLBACKS / 1024:8.1f} KiB/callback")
+
+    calls = Parser(RegexLexer(CALLS).iter_tokens()).parse()
+    Resolver().resolve_statements(calls)
+    passes.prepare(calls)
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(output):
+        interpreter.interpret(calls)
+    elapsed = time.perf_counter() - start
+
+    print(f"calls   : {elapsed * 1000:8.1f} ms  -> {output.getvalue().strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Times the passes and the interpreter on a resolved, generated script,
+which declares thousands of helpers it never calls and traces its hot
+loop behind a debug flag, with and without dead code elimination.
+
+    python -m benchmarks.dead_code [functions]
+"""
+
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from benchmarks import sources
+from lox import passes
+from lox.interpreter import Interpreter
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2500
+    source = sources.program(count) + (
+        "fun main() {\n"
+        "  var debug = false;\n"
+        "  var total = 0;\n"
+        "  for (var i = 0; i < 100000; i = i + 1) {\n"
+        "    var trace = i;\n"
+        '    if (debug) print "iteration " + trace;\n'
+        "    total = total + i;\n"
+        "  }\n"
+        "  return total;\n"
+        '  print "done";\n'
+        "}\n"
+        "print main();\n"
+    )
+    print(f"source: {source.count(chr(10))} lines")
+
+    for label, dead_code in [("kept", False), ("eliminated", True)]:
+        program = Parser(RegexLexer(source).iter_tokens()).parse()
+        interpreter = Interpreter()
+        Resolver().resolve_statements(program)
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        eliminated = passes.prepare(program, dead_code)
+        with redirect_stdout(output):
+            interpreter.interpret(program)
+        elapsed = time.perf_counter() - start
+
+        print(f"{label:<10}: {elapsed * 1000:8.2f} ms  {output.getvalue().split()}")
+        if eliminated:
+            print(f"{'':<10}  {eliminated}")
+
+
+if __name__ == "__main__":
+    main()
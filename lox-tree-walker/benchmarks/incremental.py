@@ -0,0 +1,34 @@
+"""
+Times a one-character edit through IncrementalFrontEnd against a full
+re-lex, re-parse and re-resolve of the same source.
+
+    python -m benchmarks.incremental [functions]
+"""
+
+import sys
+import time
+
+from benchmarks import sources
+from lox.incremental import IncrementalFrontEnd
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2500
+    source = sources.functions(count)
+    print(f"source: {source.count(chr(10))} lines")
+
+    start = time.perf_counter()
+    front_end = IncrementalFrontEnd(source)
+    print(f"full parse:     {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    # in the middle of the file, changing one digit of a literal
+    offset = source.index("i / 2", len(source) // 2) + 4
+    for text, line_break in [("3", ""), ("3\n", " and a newline")]:
+        start = time.perf_counter()
+        front_end.edit(offset, offset + 1, text)
+        elapsed = time.perf_counter() - start
+        print(f"edit{line_break}: {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
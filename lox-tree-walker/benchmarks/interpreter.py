@@ -0,0 +1,138 @@
+"""
+Times the interpreter alone, on resolved programs, over workloads
+dominated by calls, local and global variables, method dispatch,
+loops and small functions.
+
+    python -m benchmarks.interpreter [workload ...]
+"""
+
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from lox.interpreter import Interpreter
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox import passes
+from lox.resolver import Resolver
+
+WORKLOADS = {
+    "fib": """
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib(20);
+""",
+    "loops": """
+fun sum(limit) {
+  var total = 0;
+  for (var i = 0; i < limit; i = i + 1) {
+    var square = i * i;
+    { var half = square / 2; total = total + half; }
+  }
+  return total;
+}
+print sum(100000);
+""",
+    "closures": """
+fun counter() {
+  var count = 0;
+  fun increment(by) { count = count + by; return count; }
+  return increment;
+}
+var next = counter();
+var total = 0;
+for (var i = 0; i < 50000; i = i + 1) total = total + next(1);
+print total;
+""",
+    "classes": """
+class Vector {
+  init(x, y) { this.x = x; this.y = y; }
+  add(other) { return Vector(this.x + other.x, this.y + other.y); }
+}
+class Scaled < Vector {
+  init(x, y, k) { super.init(x * k, y * k); }
+}
+var v = Vector(0, 0);
+for (var i = 0; i < 20000; i = i + 1) v = v.add(Scaled(1, 2, 0.5));
+print v.x + v.y;
+""",
+    "globals": """
+fun square(x) { return x * x; }
+var total = 0;
+var i = 0;
+while (i < 100000) {
+  total = total + square(i);
+  i = i + 1;
+}
+print total;
+""",
+    "constants": """
+fun seconds(days) {
+  var perDay = 60 * 60 * 24;
+  var total = 0;
+  for (var i = 0; i < days; i = i + 1) total = total + perDay * (1 + 1) / 2;
+  return total;
+}
+print seconds(100000);
+""",
+    "hoisting": """
+fun odd(size) {
+  var last = size - 1;
+  var total = 0;
+  for (var y = 0; y < size; y = y + 1) {
+    for (var x = 0; x < size; x = x + 1) {
+      var dx = last - x;
+      if (dx * dx + (last - y) * (last - y) < last * last)
+        total = total + (x * 2 + 1) * (x * 2 + 1);
+    }
+  }
+  return total;
+}
+print odd(300);
+""",
+    "inlining": """
+fun square(x) { return x * x; }
+fun distance(x, y) { return square(x) + square(y); }
+fun inside(size) {
+  var count = 0;
+  for (var x = 0; x < size; x = x + 1)
+    for (var y = 0; y < size; y = y + 1)
+      if (distance(x, y) < square(size)) count = count + 1;
+  return count;
+}
+print inside(200);
+""",
+}
+
+
+def prepare(source: str):
+    program = Parser(RegexLexer(source).iter_tokens()).parse()
+    interpreter = Interpreter()
+    Resolver().resolve_statements(program)
+    passes.prepare(program)
+
+    return program, interpreter
+
+
+def main():
+    names = sys.argv[1:] or list(WORKLOADS)
+
+    for name in names:
+        best = float("inf")
+        for _ in range(3):
+            program, interpreter = prepare(WORKLOADS[name])
+
+            output = io.StringIO()
+            start = time.perf_counter()
+            with redirect_stdout(output):
+                interpreter.interpret(program)
+            best = min(best, time.perf_counter() - start)
+
+        print(f"{name:<8}: {best * 1000:8.1f} ms  -> {output.getvalue().strip()}")
+
+
+if __name__ == "__main__":
+    main()
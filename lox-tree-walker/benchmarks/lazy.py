@@ -0,0 +1,39 @@
+"""
+Times running a library-heavy script, which calls a few of thousands
+of helpers, with function bodies parsed up front and lazily.
+
+    python -m benchmarks.lazy [functions]
+"""
+
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from benchmarks import sources
+from lox import Lox
+from lox.interpreter import Interpreter
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2500
+    source = sources.program(count) + (
+        f"print helper{sources.name(0)}(10, 3);\n"
+        f"print Square{sources.name(1)}(4).area();\n"
+    )
+    print(f"source: {source.count(chr(10))} lines")
+
+    for label, lazy_functions in [("eager", False), ("lazy", True)]:
+        Lox._interpreter = Interpreter()
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            Lox.run_program(source, regex_lexer=True, lazy_functions=lazy_functions)
+        elapsed = time.perf_counter() - start
+
+        print(f"{label:<5}: {elapsed * 1000:8.2f} ms  {output.getvalue().split()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Measures parser throughput over a pre-lexed, expression-heavy program,
+for the recursive parser and the StackParser it falls back to.
+
+    python -m benchmarks.parser [statements]
+"""
+
+import sys
+import time
+
+from benchmarks import sources
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.stack_parser import StackParser
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tokens = RegexLexer(sources.expressions(count)).read_tokens()
+
+    for parser_class in [Parser, StackParser]:
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            parser_class(tokens).parse()
+            best = min(best, time.perf_counter() - start)
+
+        print(
+            f"{parser_class.__name__:<12}: {len(tokens)} tokens in"
+            f" {best * 1000:.1f} ms, {len(tokens) / best / 1e6:.2f}M tokens/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Times the resolver alone over large pre-parsed synthetic programs, a
+flat one and one with deeply nested scopes.
+
+    python -m benchmarks.resolver [functions]
+"""
+
+import sys
+import time
+
+from benchmarks import sources
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    for label, source in [
+        ("flat", sources.program(count)),
+        ("nested", sources.nested(count // 4, 60)),
+    ]:
+        program = Parser(RegexLexer(source).iter_tokens()).parse()
+
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            Resolver().resolve_statements(program)
+            best = min(best, time.perf_counter() - start)
+
+        print(f"{label:<6}: {source.count(chr(10))} lines in {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
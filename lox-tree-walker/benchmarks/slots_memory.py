@@ -0,0 +1,96 @@
+"""
+Reports the bytes allocated per AST node and per local scope on a
+recursive fib and a class-heavy program, using tracemalloc.
+
+    python -m benchmarks.slots_memory
+
+Nodes are measured by parsing a pre-lexed program. Local scopes are
+kept alive as the program runs, so the figure covers the scope and
+everything it holds onto: its values, bound methods and instances.
+"""
+
+import io
+import tracemalloc
+from contextlib import redirect_stdout
+
+from lox.ast.flat import FlatAST
+from lox.interpreter import Interpreter
+from lox.lexer import RegexLexer
+from lox.objects import LocalEnvironment
+from lox.parser import Parser
+from lox.passes import prepare
+from lox.resolver import Resolver
+
+FIB = """
+fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib(17);
+"""
+
+CLASSES = """
+class Vector {
+  init(x, y) { this.x = x; this.y = y; }
+  add(other) { return Vector(this.x + other.x, this.y + other.y); }
+  dot(other) { return this.x * other.x + this.y * other.y; }
+}
+class Named < Vector {
+  init(name, x, y) { super.init(x, y); this.name = name; }
+}
+var total = 0;
+for (var i = 0; i < 1000; i = i + 1) {
+  var v = Named("v", i, i).add(Vector(1, 2));
+  total = total + v.dot(v);
+}
+print total;
+"""
+
+
+def bytes_per_node(source: str) -> float:
+    tokens = RegexLexer(source).read_tokens()
+
+    tracemalloc.start()
+    program = Parser(tokens).parse()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size / len(FlatAST.from_tree(program))
+
+
+def bytes_per_environment(source: str) -> float:
+    program = Parser(RegexLexer(source).iter_tokens()).parse()
+    interpreter = Interpreter()
+    Resolver().resolve_statements(program)
+    prepare(program)
+
+    alive: list[LocalEnvironment] = []
+    init = LocalEnvironment.__init__
+
+    def keep_alive(self, *args):
+        init(self, *args)
+        alive.append(self)
+
+    LocalEnvironment.__init__ = keep_alive
+    try:
+        tracemalloc.start()
+        with redirect_stdout(io.StringIO()):
+            interpreter.interpret(program)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        LocalEnvironment.__init__ = init
+
+    return size / len(alive)
+
+
+def main():
+    for name, source in [("fib", FIB), ("classes", CLASSES)]:
+        print(
+            f"{name:<8} {bytes_per_node(source):6.1f} bytes/node"
+            f"  {bytes_per_environment(source):6.1f} bytes/scope"
+        )
+
+
+if __name__ == "__main__":
+    main()
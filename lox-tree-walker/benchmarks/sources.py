@@ -0,0 +1,88 @@
+"""
+Generators for large synthetic Lox programs used by the benchmarks.
+"""
+
+
+def name(i: int) -> str:
+    # Lox identifiers can't contain digits
+    letters = ""
+    while True:
+        letters = chr(ord("a") + i % 26) + letters
+        i //= 26
+        if i == 0:
+            return letters
+
+
+def functions(count: int) -> str:
+    chunks = []
+
+    for i in range(count):
+        chunks.append(
+            f"""fun helper{name(i)}(a, b) {{
+  var total = 0;
+  for (var i = 0; i < a; i = i + 1) {{
+    if (i * 2 >= b and !(i == 3)) total = total + i / 2;
+    else total = total - 1;
+  }}
+  return total + {i}.5;
+}}
+"""
+        )
+
+    return "".join(chunks)
+
+
+def classes(count: int) -> str:
+    chunks = []
+
+    for i in range(count):
+        n = name(i)
+        chunks.append(
+            f"""class Shape{n} {{
+  init(w, h) {{ this.w = w; this.h = h; this.name = "shape {i}"; }}
+  area() {{ return this.w * this.h; }}
+}}
+class Square{n} < Shape{n} {{
+  init(s) {{ super.init(s, s); }}
+  describe() {{ return this.name + " with area"; }}
+}}
+"""
+        )
+
+    return "".join(chunks)
+
+
+def program(count: int) -> str:
+    return functions(count) + classes(count)
+
+
+def expressions(count: int) -> str:
+    lines = []
+
+    for i in range(count):
+        lines.append(
+            f"var value{name(i)} = a + b * (c - d) / {i} == f and g < -h or !i"
+            f" != obj.field(1, x.y).z;\n"
+        )
+
+    return "".join(lines)
+
+
+def nested(count: int, depth: int) -> str:
+    """
+    Functions whose bodies nest blocks depth deep, each declaring a
+    local, with the innermost block reading all of them.
+    """
+    chunks = []
+
+    for i in range(count):
+        names = [f"local{name(j)}" for j in range(depth)]
+        opening = "".join(f"{{ var {n} = {j};\n" for j, n in enumerate(names))
+        reads = " + ".join(names + ["argument"])
+
+        chunks.append(
+            f"fun nested{name(i)}(argument) {{\n{opening}"
+            f"print {reads};\n{'}' * depth}\n}}\n"
+        )
+
+    return "".join(chunks)
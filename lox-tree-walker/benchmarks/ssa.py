@@ -0,0 +1,75 @@
+"""
+Times the passes and the interpreter on a particle simulation, whose
+constructor overwrites the defaults it sets and whose step reads the
+same fields and works out the same distance over and over, with and
+without the SSA optimisations.
+
+    python -m benchmarks.ssa [steps]
+"""
+
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from lox import passes
+from lox.interpreter import Interpreter
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.resolver import Resolver
+from lox.ssa import optimise
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    source = (
+        "class Particle {\n"
+        "  init(x, y, dx, dy) {\n"
+        "    this.x = 0; this.y = 0; this.dx = 0; this.dy = 0;\n"
+        "    this.x = x; this.y = y; this.dx = dx; this.dy = dy;\n"
+        "  }\n"
+        "  step(drag) {\n"
+        "    this.x = this.x + this.dx * drag;\n"
+        "    this.y = this.y + this.dy * drag;\n"
+        "    if (this.x * this.x + this.y * this.y > 10000) {\n"
+        "      this.dx = -this.dx; this.dy = -this.dy;\n"
+        "    }\n"
+        "    if (this.x * this.x + this.y * this.y < 100) {\n"
+        "      this.dx = this.dx * 2; this.dy = this.dy * 2;\n"
+        "    }\n"
+        "    return this.x * this.x + this.y * this.y;\n"
+        "  }\n"
+        "}\n"
+        "fun main() {\n"
+        "  var total = 0;\n"
+        f"  for (var i = 0; i < {steps}; i = i + 1) {{\n"
+        "    var p = Particle(i, i + 1, i / 2, 3);\n"
+        "    total = total + p.step(0.5) + p.step(0.5) + p.step(0.5);\n"
+        "  }\n"
+        "  return total;\n"
+        "}\n"
+        "print main();\n"
+    )
+
+    for label, ssa in [("kept", False), ("optimised", True)]:
+        program = Parser(RegexLexer(source).iter_tokens()).parse()
+        interpreter = Interpreter()
+        Resolver().resolve_statements(program)
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        passes.prepare(program, ssa=ssa)
+        with redirect_stdout(output):
+            interpreter.interpret(program)
+        elapsed = time.perf_counter() - start
+
+        print(f"{label:<10}: {elapsed * 1000:8.2f} ms  {output.getvalue().split()}")
+
+    program = Parser(RegexLexer(source).iter_tokens()).parse()
+    Resolver().resolve_statements(program)
+    passes.fold_constants(program)
+    print(f"{'':<10}  {optimise(program)}")
+
+
+if __name__ == "__main__":
+    main()
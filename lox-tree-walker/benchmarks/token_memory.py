@@ -0,0 +1,41 @@
+"""
+Compares the memory held by a list of Token objects against a TokenBuffer.
+
+    python -m benchmarks.token_memory [functions]
+"""
+
+import sys
+import tracemalloc
+
+from benchmarks import sources
+from lox.lexer import RegexLexer
+from lox.token_buffer import TokenBuffer
+
+
+def measure(build) -> tuple[int, int]:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size, len(result)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = sources.program(count)
+
+    print(f"source: {len(source) / 1e6:.1f} MB")
+    for name, build in [
+        ("list[Token]", lambda: RegexLexer(source).read_tokens()),
+        ("TokenBuffer", lambda: TokenBuffer.from_source(source)),
+    ]:
+        size, tokens = measure(build)
+        print(
+            f"{name:<12} {tokens} tokens {size / 1e6:8.1f} MB"
+            f" {size / tokens:6.1f} bytes/token"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,3 @@
 from . import expressions
 from . import statements
+from . import flat
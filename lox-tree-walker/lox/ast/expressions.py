@@ -1,18 +1,34 @@
 from abc import ABC, abstractmethod
+from enum import Enum, auto
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    import lox.ast as ast
     from lox.lexer import Token
     from lox.visitors import ExpressionVisitor
 
 
+class VariableKind(Enum):
+    GLOBAL = auto()
+    LOCAL = auto()
+    # set by lox.passes.convert_closures: a local captured by a
+    # closure, so kept in a Cell, or a captured variable, read from
+    # the closure of the function running
+    CELL = auto()
+    FREE = auto()
+
+
 class Expression(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: "ExpressionVisitor"):
         raise NotImplementedError()
 
 
 class Unary(Expression):
+    __slots__ = ("operator", "right")
+
     def __init__(self, operator: "Token", right: "Expression"):
         self.operator = operator
         self.right = right
@@ -22,6 +38,8 @@ class Unary(Expression):
 
 
 class Literal(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -30,6 +48,8 @@ class Literal(Expression):
 
 
 class Grouping(Expression):
+    __slots__ = ("expr",)
+
     def __init__(self, expr: "Expression"):
         self.expr = expr
 
@@ -38,6 +58,8 @@ class Grouping(Expression):
 
 
 class Binary(Expression):
+    __slots__ = ("left", "token", "right")
+
     def __init__(self, left: "Expression", token: "Token", right: "Expression"):
         self.left = left
         self.token = token
@@ -48,23 +70,47 @@ class Binary(Expression):
 
 
 class Variable(Expression):
+    """
+    Variable, Assignment, This and Super are annotated by the resolver
+    with where their binding lives: a local depth scopes out, at the
+    given slot in that scope, or else a global.
+
+    A global's slot is left for the interpreter to cache on the node
+    the first time it runs, since programs loaded from the cache or
+    from worker processes are never resolved in this one.
+    """
+
+    __slots__ = ("name", "kind", "depth", "slot")
+
     def __init__(self, name: "Token"):
         self.name = name
 
+        self.kind = VariableKind.GLOBAL
+        self.depth: int | None = None
+        self.slot: int | None = None
+
     def accept(self, visitor: "ExpressionVisitor"):
         return visitor.visit_variable_expression(self)
 
 
 class Assignment(Expression):
+    __slots__ = ("name", "value", "kind", "depth", "slot")
+
     def __init__(self, name: "Token", value: "Expression"):
         self.name = name
         self.value = value
 
+        self.kind = VariableKind.GLOBAL
+        self.depth: int | None = None
+        self.slot: int | None = None
+
     def accept(self, visitor: "ExpressionVisitor"):
         return visitor.visit_assignment_expression(self)
 
 
 class Logical(Expression):
+    __slots__ = ("left", "token", "right")
+
     def __init__(self, left: "Expression", token: "Token", right: "Expression"):
         self.left = left
         self.token = token
@@ -75,6 +121,15 @@ class Logical(Expression):
 
 
 class Call(Expression):
+    """
+    A call to a constant global function is annotated with its
+    declaration by lox.passes.devirtualise, and if it is inlined by
+    lox.passes.inline_functions, with the expression the function
+    returns and the caller's slots its arguments are bound to.
+    """
+
+    __slots__ = ("callee", "paren", "arguments", "function", "inlined", "parameters")
+
     def __init__(
         self, callee: "Expression", paren: "Token", arguments: list["Expression"]
     ):
@@ -82,11 +137,17 @@ class Call(Expression):
         self.paren = paren
         self.arguments = arguments
 
+        self.function: "ast.statements.Function | None" = None
+        self.inlined: "Expression | None" = None
+        self.parameters: list[int] = []
+
     def accept(self, visitor: "ExpressionVisitor"):
         return visitor.visit_call_expression(self)
 
 
 class Get(Expression):
+    __slots__ = ("object", "name")
+
     def __init__(self, object: "Expression", name: "Token"):
         self.object = object
         self.name = name
@@ -96,6 +157,8 @@ class Get(Expression):
 
 
 class Set(Expression):
+    __slots__ = ("object", "name", "value")
+
     def __init__(self, object: "Expression", name: "Token", value: "Expression"):
         self.object = object
         self.name = name
@@ -106,17 +169,39 @@ class Set(Expression):
 
 
 class This(Expression):
+    __slots__ = ("keyword", "kind", "depth", "slot")
+
     def __init__(self, keyword: "Token"):
         self.keyword = keyword
 
+        self.kind = VariableKind.GLOBAL
+        self.depth: int | None = None
+        self.slot: int | None = None
+
     def accept(self, visitor: "ExpressionVisitor"):
         return visitor.visit_this_expression(self)
 
 
 class Super(Expression):
+    """
+    Once closures are converted, a Super also has the slot in the
+    closure of the 'this' it looks the method up for.
+    """
+
+    __slots__ = ("keyword", "method", "kind", "depth", "slot", "this_slot")
+
     def __init__(self, keyword: "Token", method: "Token"):
         self.keyword = keyword
         self.method = method
 
+        self.kind = VariableKind.GLOBAL
+        self.depth: int | None = None
+        self.slot: int | None = None
+        self.this_slot: int | None = None
+
     def accept(self, visitor: "ExpressionVisitor"):
         return visitor.visit_super_expression(self)
+
+
+# the nodes the resolver annotates
+Resolvable = Variable | Assignment | This | Super
@@ -0,0 +1,587 @@
+import marshal
+from array import array
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lox.lexer import Token
+
+import lox.ast.expressions as expressions
+import lox.ast.statements as statements
+from lox.lexer import TokenType, make_token
+from lox.visitors import ExpressionVisitor, StatementVisitor
+
+
+FORMAT_VERSION = 5
+
+NONE = -1
+
+# TokenType values start at 1, index 0 is never used
+TYPES: list[TokenType] = [TokenType.NONE, *TokenType]
+
+
+class NodeKind(IntEnum):
+    UNARY = 0
+    LITERAL = 1
+    GROUPING = 2
+    BINARY = 3
+    VARIABLE = 4
+    ASSIGNMENT = 5
+    LOGICAL = 6
+    CALL = 7
+    GET = 8
+    SET = 9
+    THIS = 10
+    SUPER = 11
+    EXPRESSION = 12
+    PRINT = 13
+    VAR = 14
+    BLOCK = 15
+    IF = 16
+    WHILE = 17
+    FUNCTION = 18
+    RETURN = 19
+    CLASS = 20
+
+
+class FlatAST:
+    """
+    An arena holding a whole program as parallel columns of ints.
+
+    A node is an index into the columns: its kind, the token it
+    carries, and up to three operands a, b and c. Operands are node
+    indices, or NONE. Lists of children (block statements, call
+    arguments, parameters, methods) are runs in the children column,
+    given by a start and a count in two of the operands.
+
+    Operands by kind:
+
+        UNARY       token=operator  a=right
+        LITERAL     a=constant
+        GROUPING    a=expr
+        BINARY      a=left  token=operator  b=right
+        VARIABLE    token=name
+        ASSIGNMENT  token=name  a=value
+        LOGICAL     a=left  token=operator  b=right
+        CALL        a=callee  token=paren  b,c=arguments
+        GET         a=object  token=name
+        SET         a=object  token=name  b=value
+        THIS        token=keyword
+        SUPER       token=keyword  a=method token
+        EXPRESSION  a=expr
+        PRINT       a=expr
+        VAR         token=name  a=initialiser
+        BLOCK       a,b=statements  c=frame size, NONE if shared
+        IF          a=condition  b=then  c=else
+        WHILE       a=condition  b=body
+        FUNCTION    token=name  a,b=parameter tokens  c=body block
+        RETURN      token=keyword  a=value
+        CLASS       token=name  a=superclass variable  b,c=methods
+
+    Depth and slot columns keep the resolver's annotations on each
+    local Variable, Assignment, This or Super node, and are NONE for
+    everything else, including globals. The slot column also holds
+    the slot of each local Var, Function or Class declaration.
+
+    Tokens live in a table of their own, with a column for the type
+    and the line and a list of the (interned) lexemes. Literal values
+    are kept once each in a constants list.
+
+    Compared to the tree of node objects there is no per-node object
+    to allocate, nothing for the garbage collector to traverse, and
+    the columns serialise to bytes directly.
+    """
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.tokens = array("i")
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+        self.depths = array("i")
+        self.slots = array("i")
+
+        self.children = array("i")
+        self.roots = array("i")
+
+        self.token_types = array("B")
+        self.token_lines = array("I")
+        self.token_raws: list[str] = []
+
+        self.constants: list = []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(
+        self,
+        kind: NodeKind,
+        token: int = NONE,
+        a: int = NONE,
+        b: int = NONE,
+        c: int = NONE,
+    ) -> int:
+        self.kinds.append(kind)
+        self.tokens.append(token)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        self.depths.append(NONE)
+        self.slots.append(NONE)
+
+        return len(self.kinds) - 1
+
+    def add_children(self, indices: list[int]) -> tuple[int, int]:
+        start = len(self.children)
+        self.children.extend(indices)
+
+        return start, len(indices)
+
+    def children_of(self, start: int, count: int) -> array:
+        return self.children[start : start + count]
+
+    def token(self, index: int) -> "Token":
+        return make_token(
+            TYPES[self.token_types[index]],
+            self.token_raws[index],
+            self.token_lines[index],
+        )
+
+    @classmethod
+    def from_tree(cls, program: list["statements.Statement"]) -> "FlatAST":
+        flat = cls()
+        flattener = Flattener(flat)
+
+        for statement in program:
+            flat.roots.append(flattener.flatten(statement))
+
+        return flat
+
+    def to_tree(self) -> list["statements.Statement"]:
+        builder = TreeBuilder(self)
+        return [builder.visit(root) for root in self.roots]
+
+    def to_bytes(self) -> bytes:
+        return marshal.dumps(
+            (
+                FORMAT_VERSION,
+                [column.tobytes() for column in self.columns()],
+                self.token_raws,
+                self.constants,
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FlatAST":
+        version, columns, raws, constants = marshal.loads(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported flat AST format {version}.")
+
+        flat = cls()
+        for column, raw in zip(flat.columns(), columns):
+            column.frombytes(raw)
+
+        flat.token_raws = raws
+        flat.constants = constants
+        return flat
+
+    def columns(self) -> list[array]:
+        return [
+            self.kinds,
+            self.tokens,
+            self.a,
+            self.b,
+            self.c,
+            self.depths,
+            self.slots,
+            self.children,
+            self.roots,
+            self.token_types,
+            self.token_lines,
+        ]
+
+
+class FlatVisitor:
+    """
+    Walks a FlatAST, dispatching each node index to the method named
+    after its kind, e.g. visit_binary(index).
+    """
+
+    def __init__(self, flat: "FlatAST"):
+        self.flat = flat
+        self.methods = [
+            getattr(self, f"visit_{kind.name.lower()}") for kind in NodeKind
+        ]
+
+    def visit(self, index: int):
+        return self.methods[self.flat.kinds[index]](index)
+
+
+class TreeBuilder(FlatVisitor):
+    """
+    Rebuilds the tree of node objects the interpreter runs.
+    """
+
+    def __init__(self, flat: "FlatAST"):
+        super().__init__(flat)
+
+        # shared tokens stay shared
+        self.token_cache: dict[int, "Token"] = {}
+
+    def token(self, index: int) -> "Token":
+        token = self.token_cache.get(index)
+        if token is None:
+            token = self.token_cache[index] = self.flat.token(index)
+
+        return token
+
+    def optional(self, index: int):
+        return None if index == NONE else self.visit(index)
+
+    def annotate(self, node: "expressions.Resolvable", index: int):
+        depth = self.flat.depths[index]
+
+        if depth != NONE:
+            node.kind = expressions.VariableKind.LOCAL
+            node.depth = depth
+            node.slot = self.flat.slots[index]
+
+        return node
+
+    def declared(
+        self,
+        node: "statements.Var | statements.Function | statements.Class",
+        index: int,
+    ):
+        slot = self.flat.slots[index]
+        node.slot = None if slot == NONE else slot
+
+        return node
+
+    def visit_unary(self, index: int):
+        flat = self.flat
+        return expressions.Unary(
+            self.token(flat.tokens[index]), self.visit(flat.a[index])
+        )
+
+    def visit_literal(self, index: int):
+        return expressions.Literal(self.flat.constants[self.flat.a[index]])
+
+    def visit_grouping(self, index: int):
+        return expressions.Grouping(self.visit(self.flat.a[index]))
+
+    def visit_binary(self, index: int):
+        flat = self.flat
+        return expressions.Binary(
+            self.visit(flat.a[index]),
+            self.token(flat.tokens[index]),
+            self.visit(flat.b[index]),
+        )
+
+    def visit_variable(self, index: int):
+        node = expressions.Variable(self.token(self.flat.tokens[index]))
+        return self.annotate(node, index)
+
+    def visit_assignment(self, index: int):
+        flat = self.flat
+        node = expressions.Assignment(
+            self.token(flat.tokens[index]), self.visit(flat.a[index])
+        )
+        return self.annotate(node, index)
+
+    def visit_logical(self, index: int):
+        flat = self.flat
+        return expressions.Logical(
+            self.visit(flat.a[index]),
+            self.token(flat.tokens[index]),
+            self.visit(flat.b[index]),
+        )
+
+    def visit_call(self, index: int):
+        flat = self.flat
+        arguments = flat.children_of(flat.b[index], flat.c[index])
+
+        return expressions.Call(
+            self.visit(flat.a[index]),
+            self.token(flat.tokens[index]),
+            [self.visit(argument) for argument in arguments],
+        )
+
+    def visit_get(self, index: int):
+        flat = self.flat
+        return expressions.Get(
+            self.visit(flat.a[index]), self.token(flat.tokens[index])
+        )
+
+    def visit_set(self, index: int):
+        flat = self.flat
+        return expressions.Set(
+            self.visit(flat.a[index]),
+            self.token(flat.tokens[index]),
+            self.visit(flat.b[index]),
+        )
+
+    def visit_this(self, index: int):
+        node = expressions.This(self.token(self.flat.tokens[index]))
+        return self.annotate(node, index)
+
+    def visit_super(self, index: int):
+        flat = self.flat
+        node = expressions.Super(
+            self.token(flat.tokens[index]), self.token(flat.a[index])
+        )
+        return self.annotate(node, index)
+
+    def visit_expression(self, index: int):
+        return statements.Expression(self.visit(self.flat.a[index]))
+
+    def visit_print(self, index: int):
+        return statements.Print(self.visit(self.flat.a[index]))
+
+    def visit_var(self, index: int):
+        flat = self.flat
+        node = statements.Var(
+            self.token(flat.tokens[index]), self.optional(flat.a[index])
+        )
+
+        return self.declared(node, index)
+
+    def visit_block(self, index: int):
+        flat = self.flat
+        body = flat.children_of(flat.a[index], flat.b[index])
+
+        node = statements.Block([self.visit(statement) for statement in body])
+        frame_size = flat.c[index]
+        node.frame_size = None if frame_size == NONE else frame_size
+
+        return node
+
+    def visit_if(self, index: int):
+        flat = self.flat
+        return statements.If(
+            self.visit(flat.a[index]),
+            self.visit(flat.b[index]),
+            self.optional(flat.c[index]),
+        )
+
+    def visit_while(self, index: int):
+        flat = self.flat
+        return statements.While(self.visit(flat.a[index]), self.visit(flat.b[index]))
+
+    def visit_function(self, index: int):
+        flat = self.flat
+        params = flat.children_of(flat.a[index], flat.b[index])
+
+        node = statements.Function(
+            self.token(flat.tokens[index]),
+            [self.token(param) for param in params],
+            self.visit(flat.c[index]),
+        )
+
+        return self.declared(node, index)
+
+    def visit_return(self, index: int):
+        flat = self.flat
+        return statements.Return(
+            self.token(flat.tokens[index]), self.optional(flat.a[index])
+        )
+
+    def visit_class(self, index: int):
+        flat = self.flat
+        methods = flat.children_of(flat.b[index], flat.c[index])
+
+        node = statements.Class(
+            self.token(flat.tokens[index]),
+            self.optional(flat.a[index]),
+            [self.visit(method) for method in methods],
+        )
+
+        return self.declared(node, index)
+
+
+class Flattener(ExpressionVisitor, StatementVisitor):
+    """
+    Appends a tree of node objects to a FlatAST, returning the index
+    of each node it adds.
+    """
+
+    def __init__(self, flat: "FlatAST"):
+        self.flat = flat
+
+        self.token_indices: dict[int, int] = {}
+        self.constant_indices: dict[tuple[type, object], int] = {}
+
+    def flatten(self, node) -> int:
+        return node.accept(self)
+
+    def optional(self, node) -> int:
+        return NONE if node is None else self.flatten(node)
+
+    def token(self, token: "Token") -> int:
+        index = self.token_indices.get(id(token))
+
+        if index is None:
+            flat = self.flat
+            index = len(flat.token_raws)
+
+            flat.token_types.append(token.type.value)
+            flat.token_lines.append(token.line)
+            flat.token_raws.append(token.raw)
+
+            self.token_indices[id(token)] = index
+
+        return index
+
+    def annotated(self, node: "expressions.Resolvable", index: int) -> int:
+        if node.kind is expressions.VariableKind.LOCAL:
+            self.flat.depths[index] = node.depth
+            self.flat.slots[index] = node.slot
+
+        return index
+
+    def declared(
+        self,
+        node: "statements.Var | statements.Function | statements.Class",
+        index: int,
+    ) -> int:
+        if node.slot is not None:
+            self.flat.slots[index] = node.slot
+
+        return index
+
+    def constant(self, value) -> int:
+        # True == 1.0, so the type is part of the key
+        key = (type(value), value)
+        index = self.constant_indices.get(key)
+
+        if index is None:
+            index = self.constant_indices[key] = len(self.flat.constants)
+            self.flat.constants.append(value)
+
+        return index
+
+    def visit_unary_expression(self, expr: "expressions.Unary"):
+        return self.flat.add(
+            NodeKind.UNARY, self.token(expr.operator), self.flatten(expr.right)
+        )
+
+    def visit_literal_expression(self, expr: "expressions.Literal"):
+        return self.flat.add(NodeKind.LITERAL, a=self.constant(expr.value))
+
+    def visit_grouping_expression(self, expr: "expressions.Grouping"):
+        return self.flat.add(NodeKind.GROUPING, a=self.flatten(expr.expr))
+
+    def visit_binary_expression(self, expr: "expressions.Binary"):
+        left = self.flatten(expr.left)
+        right = self.flatten(expr.right)
+
+        return self.flat.add(NodeKind.BINARY, self.token(expr.token), left, right)
+
+    def visit_variable_expression(self, expr: "expressions.Variable"):
+        index = self.flat.add(NodeKind.VARIABLE, self.token(expr.name))
+        return self.annotated(expr, index)
+
+    def visit_assignment_expression(self, expr: "expressions.Assignment"):
+        index = self.flat.add(
+            NodeKind.ASSIGNMENT, self.token(expr.name), self.flatten(expr.value)
+        )
+        return self.annotated(expr, index)
+
+    def visit_logical_expression(self, expr: "expressions.Logical"):
+        left = self.flatten(expr.left)
+        right = self.flatten(expr.right)
+
+        return self.flat.add(NodeKind.LOGICAL, self.token(expr.token), left, right)
+
+    def visit_call_expression(self, expr: "expressions.Call"):
+        callee = self.flatten(expr.callee)
+        arguments = [self.flatten(argument) for argument in expr.arguments]
+        start, count = self.flat.add_children(arguments)
+
+        return self.flat.add(
+            NodeKind.CALL, self.token(expr.paren), callee, start, count
+        )
+
+    def visit_get_expression(self, expr: "expressions.Get"):
+        return self.flat.add(
+            NodeKind.GET, self.token(expr.name), self.flatten(expr.object)
+        )
+
+    def visit_set_expression(self, expr: "expressions.Set"):
+        object = self.flatten(expr.object)
+        value = self.flatten(expr.value)
+
+        return self.flat.add(NodeKind.SET, self.token(expr.name), object, value)
+
+    def visit_this_expression(self, expr: "expressions.This"):
+        index = self.flat.add(NodeKind.THIS, self.token(expr.keyword))
+        return self.annotated(expr, index)
+
+    def visit_super_expression(self, expr: "expressions.Super"):
+        index = self.flat.add(
+            NodeKind.SUPER, self.token(expr.keyword), self.token(expr.method)
+        )
+        return self.annotated(expr, index)
+
+    def visit_expression_statement(self, stmt: "statements.Expression"):
+        return self.flat.add(NodeKind.EXPRESSION, a=self.flatten(stmt.expr))
+
+    def visit_print_statement(self, stmt: "statements.Print"):
+        return self.flat.add(NodeKind.PRINT, a=self.flatten(stmt.expr))
+
+    def visit_var_statement(self, stmt: "statements.Var"):
+        index = self.flat.add(
+            NodeKind.VAR, self.token(stmt.name), self.optional(stmt.initialiser)
+        )
+
+        return self.declared(stmt, index)
+
+    def visit_block_statement(self, stmt: "statements.Block"):
+        body = [self.flatten(statement) for statement in stmt.statements]
+        start, count = self.flat.add_children(body)
+
+        frame_size = NONE if stmt.frame_size is None else stmt.frame_size
+
+        return self.flat.add(NodeKind.BLOCK, a=start, b=count, c=frame_size)
+
+    def visit_if_statement(self, stmt: "statements.If"):
+        condition = self.flatten(stmt.condition)
+        then_branch = self.flatten(stmt.then_branch)
+        else_branch = self.optional(stmt.else_branch)
+
+        return self.flat.add(
+            NodeKind.IF, a=condition, b=then_branch, c=else_branch
+        )
+
+    def visit_while_statement(self, stmt: "statements.While"):
+        condition = self.flatten(stmt.condition)
+        body = self.flatten(stmt.body)
+
+        return self.flat.add(NodeKind.WHILE, a=condition, b=body)
+
+    def visit_function_statement(self, stmt: "statements.Function"):
+        params = [self.token(param) for param in stmt.params]
+        body = self.flatten(stmt.body)
+        start, count = self.flat.add_children(params)
+
+        index = self.flat.add(
+            NodeKind.FUNCTION, self.token(stmt.name), start, count, body
+        )
+
+        return self.declared(stmt, index)
+
+    def visit_return_statement(self, stmt: "statements.Return"):
+        return self.flat.add(
+            NodeKind.RETURN, self.token(stmt.token), self.optional(stmt.value)
+        )
+
+    def visit_class_statement(self, stmt: "statements.Class"):
+        superclass = self.optional(stmt.superclass)
+        methods = [self.flatten(method) for method in stmt.methods]
+        start, count = self.flat.add_children(methods)
+
+        index = self.flat.add(
+            NodeKind.CLASS, self.token(stmt.name), superclass, start, count
+        )
+
+        return self.declared(stmt, index)
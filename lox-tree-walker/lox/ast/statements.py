@@ -7,13 +7,23 @@ if TYPE_CHECKING:
     from lox.lexer import Token
 
 
+# Where a closure takes each cell from as its function is declared,
+# either a captured local, (CELL, depth, slot), or a cell of the
+# enclosing closure, (FREE, None, slot)
+Capture = tuple["ast.expressions.VariableKind", int | None, int]
+
+
 class Statement(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: "StatementVisitor"):
         raise NotImplementedError()
 
 
 class Expression(Statement):
+    __slots__ = ("expr",)
+
     def __init__(self, expr: "ast.expressions.Expression"):
         self.expr = expr
 
@@ -22,6 +32,8 @@ class Expression(Statement):
 
 
 class Print(Statement):
+    __slots__ = ("expr",)
+
     def __init__(self, expr: "ast.expressions.Expression"):
         self.expr = expr
 
@@ -30,23 +42,65 @@ class Print(Statement):
 
 
 class Var(Statement):
+    """
+    Var, Function and Class are annotated by the resolver with the
+    slot they bind their name to, or None for a global, and by
+    lox.passes.convert_closures with whether a closure captures it.
+    """
+
+    __slots__ = ("name", "initialiser", "slot", "captured")
+
     def __init__(self, name: "Token", initialiser: "ast.expressions.Expression | None"):
         self.name = name
         self.initialiser = initialiser
 
+        self.slot: int | None = None
+        self.captured = False
+
     def accept(self, visitor: "StatementVisitor"):
         return visitor.visit_var_statement(self)
 
 
 class Block(Statement):
+    """
+    The resolver annotates a block with how many slots its scope
+    needs. For a function body that is the parameters as well. It is
+    None for a block that runs in the enclosing scope instead.
+    """
+
+    __slots__ = ("statements", "frame_size")
+
     def __init__(self, statements: list["Statement"]):
         self.statements = statements
 
+        self.frame_size: int | None = 0
+
     def accept(self, visitor: "StatementVisitor"):
         return visitor.visit_block_statement(self)
 
 
+class LazyBlock(Block):
+    """
+    A function body which has only been brace-matched. It holds the
+    tokens between the braces, the closing one included, and its
+    statements are None until the first call parses and resolves it.
+
+    context is what the resolver knew at the declaration, so the
+    body can be resolved later as if it had been resolved in place.
+    """
+
+    __slots__ = ("tokens", "context")
+
+    def __init__(self, tokens: list["Token"]):
+        self.statements = None  # type: ignore
+        self.frame_size = 0
+        self.tokens = tokens
+        self.context = None
+
+
 class If(Statement):
+    __slots__ = ("condition", "then_branch", "else_branch")
+
     def __init__(
         self,
         condition: "ast.expressions.Expression",
@@ -62,6 +116,8 @@ class If(Statement):
 
 
 class While(Statement):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition: "ast.expressions.Expression", body: "Statement"):
         self.condition = condition
         self.body = body
@@ -71,16 +127,39 @@ class While(Statement):
 
 
 class Function(Statement):
+    """
+    Closure conversion also records where each variable the function
+    captures comes from when it is declared, in the order of its
+    closure, and which of its parameters are captured in turn.
+    """
+
+    __slots__ = (
+        "name",
+        "params",
+        "body",
+        "slot",
+        "captured",
+        "captures",
+        "captured_params",
+    )
+
     def __init__(self, name: "Token", params: list["Token"], body: "Block"):
         self.name = name
         self.params = params
         self.body = body
 
+        self.slot: int | None = None
+        self.captured = False
+        self.captures: list["Capture"] = []
+        self.captured_params: list[int] = []
+
     def accept(self, visitor: "StatementVisitor"):
         return visitor.visit_function_statement(self)
 
 
 class Return(Statement):
+    __slots__ = ("token", "value")
+
     def __init__(self, token: "Token", value: "ast.expressions.Expression | None"):
         self.token = token
         self.value = value
@@ -90,6 +169,8 @@ class Return(Statement):
 
 
 class Class(Statement):
+    __slots__ = ("name", "superclass", "methods", "slot", "captured")
+
     def __init__(
         self,
         name: "Token",
@@ -100,5 +181,8 @@ class Class(Statement):
         self.superclass = superclass
         self.methods = methods
 
+        self.slot: int | None = None
+        self.captured = False
+
     def accept(self, visitor: "StatementVisitor"):
         return visitor.visit_class_statement(self)
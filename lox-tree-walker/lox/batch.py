@@ -0,0 +1,92 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import lox.ast as ast
+
+from lox.ast.flat import FlatAST
+from lox.cache import DIRECTORY, ProgramCache
+
+
+def front_end(path: str, use_cache: bool = False) -> tuple[bytes | None, str]:
+    """
+    Lexes, parses and resolves one file, returning the program as
+    FlatAST bytes along with any errors reported on the way. The
+    bytes are None if there were errors.
+
+    Runs in a worker process, so it starts from clean error flags and
+    captures what would have been printed for the parent to replay.
+    """
+    from lox import Lox
+    from lox.lexer import RegexLexer
+    from lox.parser import Parser
+    from lox.resolver import Resolver
+
+    with open(path, "rb") as f:
+        source = f.read()
+
+    cache = None
+    if use_cache:
+        cache = ProgramCache(os.path.join(os.path.dirname(path), DIRECTORY))
+
+        flat = cache.load(source)
+        if flat is not None:
+            return flat.to_bytes(), ""
+
+    Lox.had_parse_error = False
+
+    errors = io.StringIO()
+    with redirect_stdout(errors):
+        program = Parser(RegexLexer(source).iter_tokens()).parse()
+        if not Lox.had_parse_error:
+            Resolver().resolve_statements(program)
+
+    if Lox.had_parse_error:
+        Lox.had_parse_error = False
+        return None, errors.getvalue()
+
+    flat = FlatAST.from_tree(program)
+    if cache:
+        cache.store(source, flat)
+
+    return flat.to_bytes(), errors.getvalue()
+
+
+def load_files(
+    paths: Iterable[str],
+    max_workers: int | None = None,
+    use_cache: bool = False,
+) -> list["ast.statements.Statement"]:
+    """
+    Runs the front end over independent files in a process pool and
+    stitches the results, in order, into one program.
+
+    Top-level declarations are globals, which the resolver leaves
+    alone, so each file resolves the same on its own as it would as
+    part of the whole. Errors are printed in file order, as if the
+    files had been loaded one after another.
+    """
+    from lox import Lox
+
+    paths = list(paths)
+    arguments = [use_cache] * len(paths)
+
+    if max_workers == 1 or len(paths) <= 1:
+        results = list(map(front_end, paths, arguments))
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            results = list(executor.map(front_end, paths, arguments))
+
+    program: list["ast.statements.Statement"] = []
+    for data, errors in results:
+        print(errors, end="")
+
+        if data is None:
+            Lox.had_parse_error = True
+        elif not Lox.had_parse_error:
+            program += FlatAST.from_bytes(data).to_tree()
+
+    return program
@@ -0,0 +1,114 @@
+import hashlib
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from mmap import mmap
+
+import lox
+from lox.ast.flat import FORMAT_VERSION, FlatAST
+
+
+DIRECTORY = "__loxcache__"
+
+# set to anything but "" or "0" for main.py to cache programs
+ENVIRONMENT = "LOX_CACHE"
+
+# 64 MiB
+MAX_SIZE = 64 * 1024 * 1024
+
+
+class ProgramCache:
+    """
+    A directory of parsed and resolved programs, like __pycache__.
+    Scripts only use one when asked to, as main.py is through the
+    LOX_CACHE environment variable, since it is written next to them.
+
+    Each entry is a FlatAST with its resolved depths, serialised to
+    bytes and named by a hash of the source and the interpreter
+    version. A program is only cached once the front end has run
+    without errors, so a hit can go straight to the interpreter.
+
+    Entries are touched whenever they are read. Once the directory
+    grows past max_size, the least recently used entries are evicted
+    until it fits again.
+    """
+
+    def __init__(self, directory: str = DIRECTORY, max_size: int = MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, source: "str | bytes | mmap") -> str:
+        if isinstance(source, str):
+            source = source.encode()
+
+        digest = hashlib.sha256(f"{lox.__version__}:{FORMAT_VERSION}:".encode())
+        digest.update(source)
+
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.loxc")
+
+    def load(self, source: "str | bytes | mmap") -> "FlatAST | None":
+        path = self.path(self.key(source))
+
+        try:
+            with open(path, "rb") as f:
+                flat = FlatAST.from_bytes(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, TypeError):
+            # a corrupt or unreadable entry is just a miss
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            # still a hit, if one that may be evicted sooner
+            pass
+
+        return flat
+
+    def store(self, source: "str | bytes | mmap", flat: "FlatAST") -> None:
+        path = self.path(self.key(source))
+        temporary = f"{path}.{os.getpid()}.tmp"
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            # written aside and renamed, so readers never see half an entry
+            with open(temporary, "wb") as f:
+                f.write(flat.to_bytes())
+            os.replace(temporary, path)
+        except OSError:
+            # caching is best effort, e.g. the directory is read-only
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".loxc"):
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            size -= entry_size
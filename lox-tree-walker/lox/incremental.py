@@ -0,0 +1,156 @@
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    import lox.ast as ast
+
+from lox.lexer import RegexLexer, Token, make_token
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+
+class Declaration:
+    """
+    A top-level declaration along with the tokens and the span of
+    source it was parsed from. The statement is None if it failed
+    to parse.
+
+    The parser decides where a declaration ends by peeking at the
+    next token, e.g. for a trailing 'else', so a declaration depends
+    on source up to the end of that token as well: its reach.
+    """
+
+    def __init__(
+        self,
+        start: int,
+        end: int,
+        reach: int,
+        tokens: list["Token"],
+        statement: "ast.statements.Statement | None",
+    ):
+        self.start = start
+        self.end = end
+        self.reach = reach
+        self.tokens = tokens
+        self.statement = statement
+
+
+class IncrementalFrontEnd:
+    """
+    Keeps the tokens and top-level declarations of a source string
+    so that an edit only needs to re-lex, re-parse and re-resolve
+    the declarations it damages.
+
+    The lexer is between tokens at the end of any declaration, and
+    the parser is back at the top level at the start of each one.
+    So after an edit we restart both from the end of the last
+    undamaged declaration, and stop as soon as the new parse lands
+    on the start of an old declaration which lies past the edit.
+    Everything after that point is kept, shifted by the change in
+    length and line count.
+    """
+
+    def __init__(self, source: str = ""):
+        self.source = source
+
+        self.declarations: list[Declaration]
+        self.declarations, _ = self.parse_from(0, 1, {})
+
+    @property
+    def program(self) -> list["ast.statements.Statement"]:
+        return [decl.statement for decl in self.declarations if decl.statement]
+
+    def edit(self, start: int, end: int, text: str) -> list["ast.statements.Statement"]:
+        """
+        Replaces source[start:end] with text, returning the statements
+        which were re-parsed as a result.
+        """
+        old = self.source
+        self.source = old[:start] + text + old[end:]
+
+        delta = len(text) - (end - start)
+        line_delta = text.count("\n") - old.count("\n", start, end)
+
+        decls = self.declarations
+
+        # The first declaration whose reach the edit touches. The lexer
+        # can look a character past a token ("1." vs "1.5"), hence the +1
+        first = 0
+        while first < len(decls) and decls[first].reach + 1 < start:
+            first += 1
+
+        if first > 0:
+            previous = decls[first - 1]
+            position, line = previous.end, previous.tokens[-1].line
+        else:
+            position, line = 0, 1
+
+        # Old declarations which start past the edit, any of which
+        # we can resynchronise on once the new parse reaches it
+        following = first
+        while following < len(decls) and decls[following].start < end:
+            following += 1
+
+        resync = {decls[i].start + delta: i for i in range(following, len(decls))}
+        reparsed, resumed = self.parse_from(position, line, resync)
+
+        kept = decls[resumed:] if resumed is not None else []
+        for decl in kept:
+            decl.start += delta
+            decl.end += delta
+            decl.reach += delta
+
+            if line_delta:
+                for token in decl.tokens:
+                    token.line += line_delta
+
+        self.declarations = decls[:first] + reparsed + kept
+        return [decl.statement for decl in reparsed if decl.statement]
+
+    def parse_from(
+        self, position: int, line: int, resync: dict[int, int]
+    ) -> tuple[list[Declaration], int | None]:
+        """
+        Parses declarations from the given offset until the end of the
+        source, or until the next declaration would start at an offset
+        in resync. Returns the new declarations, and the index from
+        resync it stopped at if any.
+        """
+        spans: list[tuple[int, int]] = []
+        tokens: list[Token] = []
+        parser = Parser(self.iter_tokens(position, line, tokens, spans))
+
+        declarations: list[Declaration] = []
+        while not parser.is_at_end():
+            start = spans[-1][0]
+            if start in resync:
+                return declarations, resync[start]
+
+            statement = parser.top_level_declaration()
+
+            # the parser has always pulled one token of lookahead
+            declarations.append(
+                Declaration(start, spans[-2][1], spans[-1][1], tokens[:-1], statement)
+            )
+            del spans[:-1]
+            del tokens[:-1]
+
+            if statement:
+                Resolver().resolve_statement(statement)
+
+        return declarations, None
+
+    def iter_tokens(
+        self,
+        position: int,
+        line: int,
+        tokens: list[Token],
+        spans: list[tuple[int, int]],
+    ) -> Iterator[Token]:
+        source = self.source
+
+        for type, start, end, line in RegexLexer(source).iter_spans(position, line):
+            token = make_token(type, source[start:end], line)
+            tokens.append(token)
+            spans.append((start, end))
+
+            yield token
@@ -4,10 +4,12 @@ if TYPE_CHECKING:
     import lox.ast as ast
     from lox.lexer import Token
 
+from lox.ast.expressions import VariableKind
 from lox.visitors import ExpressionVisitor, StatementVisitor
 from lox.lexer import TokenType
 from lox.errors import RuntimeError
-from lox.objects import Environment, Class, Instance
+from lox.objects import Cell, Environment, LocalEnvironment, Class, Instance
+from lox.objects import global_slot
 from lox.objects.callables import Callable, Function, NativeClock, Return
 
 
@@ -15,9 +17,10 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
     def __init__(self):
         self.globals = Environment()
         self.globals.define("clock", NativeClock())
-        self.locals: dict["ast.expressions.Expression", int] = {}
 
         self.env = self.globals
+        # the cells captured by the function running
+        self.closure: list["Cell | None"] = []
 
     def interpret(self, statements: list["ast.statements.Statement"]) -> None:
         try:
@@ -28,6 +31,11 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
 
             Lox.runtime_error(e)
             return None
+        except RecursionError:
+            from lox import Lox
+
+            Lox.nesting_error(runtime=True)
+            return None
 
     def evaluate(self, expr: "ast.expressions.Expression"):
         return expr.accept(self)
@@ -35,18 +43,50 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
     def execute(self, stmt: "ast.statements.Statement"):
         return stmt.accept(self)
 
-    def resolve(self, expr: "ast.expressions.Expression", depth: int):
-        self.locals[expr] = depth
+    def look_up_variable(self, name: "Token", expr: "ast.expressions.Resolvable"):
+        slot = expr.slot
+        kind = expr.kind
+
+        if kind is VariableKind.LOCAL:
+            return self.env.get_at(expr.depth, slot)
+        elif kind is VariableKind.FREE:
+            return self.closure[slot].value  # type: ignore
+        elif kind is VariableKind.CELL:
+            return self.env.get_at(expr.depth, slot).value
+
+        if slot is None:
+            # cached on the node for next time
+            slot = expr.slot = global_slot(name.raw)
+
+        return self.globals.get(slot, name)
+
+    def define(self, slot: int | None, name: str, value) -> None:
+        """
+        Binds a declaration's name in the current scope, by slot if it
+        is a local and by name if it is a global.
+        """
+        if slot is None:
+            self.globals.define(name, value)
+        else:
+            self.env.values[slot] = value
+
+    def capture(self, captures: list["ast.statements.Capture"]) -> list["Cell | None"]:
+        """
+        The closure of a function being declared here.
+        """
+        closure: list["Cell | None"] = []
 
-    def look_up_variable(self, name: "Token", expr: "ast.expressions.Expression"):
-        distance = self.locals.get(expr)
+        for kind, depth, slot in captures:
+            if kind is VariableKind.CELL:
+                closure.append(self.env.get_at(depth, slot))  # type: ignore
+            else:
+                closure.append(self.closure[slot])
 
-        if distance is not None:
-            return self.env.get_at(distance, name.raw)
-        else:
-            return self.globals.get(name)
+        return closure
 
-    def execute_block(self, block: "ast.statements.Block", env: "Environment"):
+    def execute_block(
+        self, block: "ast.statements.Block", env: "Environment | LocalEnvironment"
+    ):
         previous = self.env
 
         try:
@@ -67,33 +107,50 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
             if not isinstance(superclass, Class):
                 raise RuntimeError(stmt.superclass.name, "Superclass must be a class.")
 
-        self.env.define(stmt.name.raw, None)
+        # defined before the methods are, which may capture it
+        cell = Cell(None)
+        self.define(stmt.slot, stmt.name.raw, cell if stmt.captured else None)
 
+        # 'this' is bound later
+        reserved: list["Cell | None"] = [None]
         if stmt.superclass:
-            self.env = Environment(self.env)
-            self.env.define("super", superclass)
+            reserved.append(Cell(superclass))
 
         methods: dict[str, "Function"] = {}
         for method in stmt.methods:
             methods[method.name.raw] = Function(
                 method,
-                closure=self.env,
+                closure=reserved + self.capture(method.captures),
                 is_initialiser=(method.name.raw == "init"),
             )
 
         klass = Class(stmt.name.raw, superclass, methods)
 
-        if stmt.superclass and self.env.enclosing:
-            self.env = self.env.enclosing
-
-        self.env.assign(stmt.name, klass)
+        if stmt.captured:
+            cell.value = klass
+        else:
+            self.define(stmt.slot, stmt.name.raw, klass)
 
     def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
-        function = Function(stmt, closure=self.env, is_initialiser=False)
-        self.env.define(stmt.name.raw, function)
+        if stmt.captured:
+            # defined first, since it may capture itself
+            cell = Cell(None)
+            self.define(stmt.slot, stmt.name.raw, cell)
+
+            cell.value = Function(stmt, self.capture(stmt.captures), False)
+        else:
+            function = Function(stmt, self.capture(stmt.captures), False)
+            self.define(stmt.slot, stmt.name.raw, function)
 
     def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
-        self.execute_block(stmt, Environment(self.env))
+        if stmt.frame_size is None:
+            # shares the enclosing scope, so there is nothing to allocate
+            for statement in stmt.statements:
+                self.execute(statement)
+        else:
+            self.execute_block(
+                stmt, LocalEnvironment(self.env, [None] * stmt.frame_size)
+            )
 
     def visit_if_statement(self, stmt: "ast.statements.If") -> None:
         condition = self.evaluate(stmt.condition)
@@ -119,16 +176,24 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
         if stmt.initialiser:
             value = self.evaluate(stmt.initialiser)
 
-        self.env.define(stmt.name.raw, value)
+        self.define(stmt.slot, stmt.name.raw, Cell(value) if stmt.captured else value)
 
     def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
         value = self.evaluate(expr.value)
 
-        distance = self.locals.get(expr)
-        if distance is not None:
-            self.env.assign_at(distance, expr.name.raw, value)
+        kind = expr.kind
+        if kind is VariableKind.LOCAL:
+            self.env.assign_at(expr.depth, expr.slot, value)
+        elif kind is VariableKind.FREE:
+            self.closure[expr.slot].value = value  # type: ignore
+        elif kind is VariableKind.CELL:
+            self.env.get_at(expr.depth, expr.slot).value = value
         else:
-            self.globals.assign(expr.name, value)
+            slot = expr.slot
+            if slot is None:
+                slot = expr.slot = global_slot(expr.name.raw)
+
+            self.globals.assign(slot, expr.name, value)
 
         return value
 
@@ -158,9 +223,9 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
         return self.look_up_variable(expr.keyword, expr)
 
     def visit_super_expression(self, expr: "ast.expressions.Super"):
-        distance = self.locals[expr]
-        superclass: "Class" = self.env.get_at(distance, "super")
-        object = self.env.get_at(distance - 1, "this")
+        # both are always captured, from the method's closure
+        superclass: "Class" = self.closure[cast(int, expr.slot)].value  # type: ignore
+        object = self.closure[cast(int, expr.this_slot)].value  # type: ignore
 
         method = cast(Function, superclass.find_method(expr.method.raw))
         if not method:
@@ -235,7 +300,25 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
         raise Exception("Unreachable")
 
     def visit_call_expression(self, expr: "ast.expressions.Call"):
-        callee = self.evaluate(expr.callee)
+        if expr.function is not None:
+            variable: "ast.expressions.Variable" = expr.callee  # type: ignore
+            callee = self.globals.get(variable.slot, variable.name)
+
+            # bound to a declaration whose arity matches, see lox.passes
+            if type(callee) is Function and callee.declaration is expr.function:
+                if expr.inlined is None:
+                    arguments = [self.evaluate(a) for a in expr.arguments]
+                    try:
+                        return callee.call(self, arguments)
+                    except RecursionError:
+                        raise RuntimeError(expr.paren, "Stack overflow.") from None
+
+                values = self.env.values  # type: ignore
+                for slot, argument in zip(expr.parameters, expr.arguments):
+                    values[slot] = self.evaluate(argument)
+                return self.evaluate(expr.inlined)
+        else:
+            callee = self.evaluate(expr.callee)
 
         arguments: list = []
         for argument in expr.arguments:
@@ -251,7 +334,11 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
                 f"Expected {function.arity()} arguments but received {len(arguments)}.",
             )
 
-        return function.call(self, arguments)
+        try:
+            return function.call(self, arguments)
+        except RecursionError:
+            # the deepest call with room left to raise this reports it
+            raise RuntimeError(expr.paren, "Stack overflow.") from None
 
     def visit_get_expression(self, expr: "ast.expressions.Get"):
         object = self.evaluate(expr.object)
@@ -260,7 +347,8 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
 
         raise RuntimeError(expr.name, "Only instances have properties.")
 
-    def is_truthy(self, value) -> bool:
+    @staticmethod
+    def is_truthy(value) -> bool:
         if value in [None, False, 0, ""]:
             return False
 
@@ -0,0 +1,70 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import lox.ast as ast
+
+from lox import Lox
+from lox.errors import RuntimeError
+from lox.lexer import Token, TokenType
+from lox.parser import Parser
+from lox.passes.closures import ClosureConverter
+from lox.passes.folding import fold_lazy
+from lox.passes.loops import optimise_lazy_loops
+from lox.resolver import ClassType, FunctionType, Resolver
+from lox.stack_parser import StackParser
+
+
+def compile_body(declaration: "ast.statements.Function") -> None:
+    """
+    Parses and resolves the LazyBlock body of a function in place, in
+    the resolver context recorded at its declaration.
+
+    Errors in the body are reported as they would have been up front,
+    and then the call fails with a RuntimeError, since by now the
+    program is already running.
+    """
+    body: "ast.statements.LazyBlock" = declaration.body  # type: ignore
+    tokens = body.tokens + [Token(TokenType.EOF, "", body.tokens[-1].line)]
+
+    had_parse_error = Lox.had_parse_error
+    Lox.had_parse_error = False
+
+    try:
+        parser = Parser(tokens)
+        try:
+            statements = parser.recursively(parser.block).statements
+        except RecursionError:
+            parser = StackParser(tokens)
+            statements = parser.run(parser.block_frame()).statements
+
+        if not Lox.had_parse_error:
+            type, current_class, scopes = body.context
+            body.statements = statements
+
+            resolver = Resolver()
+            resolver.current_class = current_class
+            for scope in scopes:
+                resolver.begin_scope()
+                for name, defined in scope.items():
+                    resolver.bind(name, defined)
+
+            resolver.resolve_function(declaration, type)
+
+            if not Lox.had_parse_error:
+                method = type in (FunctionType.METHOD, FunctionType.INITIALISER)
+                subclass = current_class is ClassType.SUBCLASS
+
+                fold_lazy(declaration, method, subclass)
+                optimise_lazy_loops(declaration, method, subclass)
+                ClosureConverter().convert_lazy(declaration, method, subclass)
+
+        if Lox.had_parse_error:
+            body.statements = None  # type: ignore
+            raise RuntimeError(
+                declaration.name, f"Couldn't compile '{declaration.name.raw}'."
+            )
+    finally:
+        Lox.had_parse_error = Lox.had_parse_error or had_parse_error
+
+    # the tokens are no longer needed
+    body.tokens = []
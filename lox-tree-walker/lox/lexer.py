@@ -1,4 +1,10 @@
+import re
+import sys
 from enum import Enum, auto
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from mmap import mmap
 
 
 class TokenType(Enum):
@@ -53,27 +59,35 @@ class TokenType(Enum):
 
     @classmethod
     def from_keyword(cls, keyword):
-        return {
-            "and": cls.AND,
-            "class": cls.CLASS,
-            "else": cls.ELSE,
-            "false": cls.FALSE,
-            "for": cls.FOR,
-            "fun": cls.FUN,
-            "if": cls.IF,
-            "nil": cls.NIL,
-            "or": cls.OR,
-            "print": cls.PRINT,
-            "return": cls.RETURN,
-            "super": cls.SUPER,
-            "this": cls.THIS,
-            "true": cls.TRUE,
-            "var": cls.VAR,
-            "while": cls.WHILE,
-        }.get(keyword, None)
+        return KEYWORDS.get(keyword, None)
+
+
+KEYWORDS: dict[str, TokenType] = {
+    "and": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE,
+}
+
+
+WORDS: frozenset[TokenType] = frozenset([TokenType.IDENTIFIER, *KEYWORDS.values()])
 
 
 class Token:
+    __slots__ = ("type", "raw", "line", "literal")
+
     def __init__(self, type: TokenType, raw: str, line: int, literal=None):
         self.type = type
         self.raw = raw
@@ -84,9 +98,27 @@ class Token:
         return f"{str(self.type)}(raw='{self.raw}', line={self.line}, literal={self.literal})"
 
 
+def make_token(type: TokenType, raw: str, line: int) -> Token:
+    """
+    Builds the token the lexers would for a lexeme, for token stores
+    which only keep spans of the source.
+    """
+    # names and strings are interned, as the lexers do, so equal ones
+    # share one object, which is also the runtime's "this" or "init"
+    if type in WORDS:
+        return Token(type, sys.intern(raw), line)
+    elif type is TokenType.NUMBER:
+        return Token(type, raw, line, float(raw))
+    elif type is TokenType.STRING:
+        return Token(type, raw, line, sys.intern(raw[1:-1]))
+
+    return Token(type, raw, line)
+
+
 class Lexer:
     def __init__(self, source: str):
         self.source = source
+        # tokens read but not yet handed out by iter_tokens()
         self.tokens: list[Token] = []
 
         self.start: int = 0
@@ -94,12 +126,18 @@ class Lexer:
         self.line: int = 1
 
     def read_tokens(self) -> list[Token]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[Token]:
         while not self.is_at_end():
             self.start = self.current
             self.read_token()
 
-        self.tokens.append(Token(TokenType.EOF, "", self.line))
-        return self.tokens
+            if self.tokens:
+                yield from self.tokens
+                self.tokens.clear()
+
+        yield Token(TokenType.EOF, "", self.line)
 
     def read_token(self) -> None:
         char = self.advance()
@@ -195,7 +233,7 @@ class Lexer:
         self.advance()
 
         # Trim surrounding '"'
-        value = self.source[self.start + 1 : self.current - 1]
+        value = sys.intern(self.source[self.start + 1 : self.current - 1])
         self.add_token(TokenType.STRING, value)
 
     def number(self):
@@ -215,12 +253,12 @@ class Lexer:
         while self.peek().isalpha():
             self.advance()
 
-        text = self.source[self.start : self.current]
+        text = sys.intern(self.source[self.start : self.current])
         type = TokenType.from_keyword(text)
         if type == None:
             type = TokenType.IDENTIFIER
 
-        self.add_token(type)
+        self.tokens.append(Token(type, text, self.line))
 
     def advance(self) -> str:
         new_char = self.source[self.current]
@@ -257,3 +295,241 @@ class Lexer:
 
     def is_at_end(self) -> bool:
         return self.current >= len(self.source)
+
+
+class RegexLexer:
+    """
+    A table-driven alternative to Lexer which produces an identical
+    token stream.
+
+    Rather than dispatching on one character at a time, every token
+    class is an alternative in a single compiled master pattern.
+    The regex engine does the scanning in C, and we only pay for a
+    dictionary lookup on the name of the group which matched.
+
+    Leading blanks are folded into every match to halve the number
+    of matches on typical source. The order of the alternatives
+    matters: comments must be tried before '/', and a string with
+    no closing quote only matches once STRING has failed.
+
+    The source may also be UTF-8 bytes, e.g. a memory-mapped file,
+    which is scanned in place. Only lexemes that end up in a token
+    are decoded. A run of letters and multi-byte characters is taken
+    as a word, and the rare one which isn't all letters once decoded
+    is split up as the str pattern would have.
+    """
+
+    PATTERN = re.compile(
+        r"""
+        [ \r\t]*
+        (?:
+          (?P<WORD>[^\W\d_]+)
+        | (?P<NEWLINE>(?:\n[ \r\t]*)+)
+        | (?P<COMMENT>//[^\n]*)
+        | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;/*])
+        | (?P<NUMBER>\d+(?:\.\d+)?)
+        | (?P<STRING>"[^"]*")
+        | (?P<UNCLOSED>")
+        | (?P<ERROR>[^ \r\t])
+        )
+        """,
+        re.VERBOSE,
+    )
+
+    BYTES_PATTERN = re.compile(
+        rb"""
+        [ \r\t]*
+        (?:
+          (?P<WORD>[a-zA-Z\x80-\xff]+)
+        | (?P<NEWLINE>(?:\n[ \r\t]*)+)
+        | (?P<COMMENT>//[^\n]*)
+        | (?P<OPERATOR>[!=<>]=?|[(){},.\-+;/*])
+        | (?P<NUMBER>\d+(?:\.\d+)?)
+        | (?P<STRING>"[^"]*")
+        | (?P<UNCLOSED>")
+        | (?P<ERROR>[^ \r\t])
+        )
+        """,
+        re.VERBOSE,
+    )
+
+    # a word of the str pattern
+    LETTERS = re.compile(r"[^\W\d_]+")
+
+    OPERATORS: dict[str, TokenType] = {
+        "(": TokenType.LEFT_PAREN,
+        ")": TokenType.RIGHT_PAREN,
+        "{": TokenType.LEFT_BRACE,
+        "}": TokenType.RIGHT_BRACE,
+        ",": TokenType.COMMA,
+        ".": TokenType.DOT,
+        "-": TokenType.MINUS,
+        "+": TokenType.PLUS,
+        ";": TokenType.SEMICOLON,
+        "/": TokenType.SLASH,
+        "*": TokenType.STAR,
+        "!": TokenType.BANG,
+        "!=": TokenType.BANG_EQUAL,
+        "=": TokenType.EQUAL,
+        "==": TokenType.EQUAL_EQUAL,
+        "<": TokenType.LESS,
+        "<=": TokenType.LESS_EQUAL,
+        ">": TokenType.GREATER,
+        ">=": TokenType.GREATER_EQUAL,
+    }
+
+    BYTES_OPERATORS: dict[bytes, TokenType] = {
+        raw.encode(): type for raw, type in OPERATORS.items()
+    }
+
+    BYTES_KEYWORDS: dict[bytes, TokenType] = {
+        raw.encode(): type for raw, type in KEYWORDS.items()
+    }
+
+    def __init__(self, source: "str | bytes | mmap"):
+        self.source = source
+
+        self.line: int = 1
+
+    def read_tokens(self) -> list[Token]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[Token]:
+        source = self.source
+
+        if not isinstance(source, str):
+            for type, start, end, line in self.iter_spans():
+                yield make_token(type, source[start:end].decode(), line)
+            return
+        operators = self.OPERATORS
+        intern = sys.intern
+        line = 1
+
+        for match in self.PATTERN.finditer(source):
+            kind = match.lastgroup
+            raw = match.group(kind)
+
+            if kind == "WORD":
+                raw = intern(raw)
+                type = KEYWORDS.get(raw, TokenType.IDENTIFIER)
+                yield Token(type, raw, line)
+            elif kind == "NEWLINE":
+                line += raw.count("\n")
+            elif kind == "COMMENT":
+                continue
+            elif kind == "OPERATOR":
+                yield Token(operators[raw], raw, line)
+            elif kind == "NUMBER":
+                yield Token(TokenType.NUMBER, raw, line, float(raw))
+            elif kind == "STRING":
+                line += raw.count("\n")
+                yield Token(TokenType.STRING, raw, line, intern(raw[1:-1]))
+            elif kind == "UNCLOSED":
+                line += source.count("\n", match.end())
+                self.error(Token(TokenType.EOF, "", line), "Unclosed string literal.")
+                break
+            else:
+                self.error(Token(TokenType.NONE, raw, line), "Unexpected character.")
+
+        self.line = line
+        yield Token(TokenType.EOF, "", line)
+
+    def iter_spans(
+        self, position: int = 0, line: int = 1
+    ) -> Iterator[tuple[TokenType, int, int, int]]:
+        """
+        The same scan as iter_tokens(), but yielding (type, start, end, line)
+        and leaving it to the caller to decide whether a Token is worth
+        building. This is kept as a separate loop as funnelling
+        iter_tokens() through it costs more than the lexing itself.
+
+        Scanning can resume from any offset at which the lexer is
+        between tokens, given the line number at that offset.
+        """
+        source = self.source
+
+        encoded = not isinstance(source, str)
+        if encoded:
+            pattern, newline = self.BYTES_PATTERN, b"\n"
+            keywords, operators = self.BYTES_KEYWORDS, self.BYTES_OPERATORS
+        else:
+            pattern, newline = self.PATTERN, "\n"
+            keywords, operators = KEYWORDS, self.OPERATORS
+
+        for match in pattern.finditer(source, position):
+            kind = match.lastgroup
+
+            if kind == "WORD":
+                start, end = match.span(kind)
+                word = source[start:end]
+                if encoded and not word.isascii():
+                    yield from self.iter_word_spans(word, start, line)
+                    continue
+
+                type = keywords.get(word, TokenType.IDENTIFIER)
+                yield type, start, end, line
+            elif kind == "NEWLINE":
+                line += match.group(kind).count(newline)
+            elif kind == "COMMENT":
+                continue
+            elif kind == "OPERATOR":
+                start, end = match.span(kind)
+                yield operators[source[start:end]], start, end, line
+            elif kind == "NUMBER":
+                yield TokenType.NUMBER, *match.span(kind), line
+            elif kind == "STRING":
+                start, end = match.span(kind)
+                line += match.group(kind).count(newline)
+                yield TokenType.STRING, start, end, line
+            elif kind == "UNCLOSED":
+                # mmap has no count(), and slicing it would copy the rest
+                position = source.find(newline, match.end())
+                while position != -1:
+                    line += 1
+                    position = source.find(newline, position + 1)
+
+                self.error(Token(TokenType.EOF, "", line), "Unclosed string literal.")
+                break
+            else:
+                raw = match.group(kind)
+                if not isinstance(raw, str):
+                    raw = raw.decode(errors="replace")
+
+                self.error(Token(TokenType.NONE, raw, line), "Unexpected character.")
+
+        self.line = line
+        yield TokenType.EOF, len(source), len(source), line
+
+    def iter_word_spans(
+        self, word: bytes, start: int, line: int
+    ) -> Iterator[tuple[TokenType, int, int, int]]:
+        """
+        The spans of a word of UTF-8 bytes, which is one identifier if
+        it decodes to letters, and otherwise is scanned again as text.
+        """
+        # invalid bytes decode to one surrogate each, which is an error
+        text = word.decode(errors="surrogateescape")
+        if self.LETTERS.fullmatch(text):
+            yield TokenType.IDENTIFIER, start, start + len(word), line
+            return
+
+        for match in self.PATTERN.finditer(text):
+            kind = match.lastgroup
+            raw = match.group(kind)
+            end = start + len(raw.encode(errors="surrogateescape"))
+
+            if kind == "WORD":
+                yield KEYWORDS.get(raw, TokenType.IDENTIFIER), start, end, line
+            elif kind == "NUMBER":
+                yield TokenType.NUMBER, start, end, line
+            else:
+                raw = raw.encode(errors="surrogateescape").decode(errors="replace")
+                self.error(Token(TokenType.NONE, raw, line), "Unexpected character.")
+
+            start = end
+
+    def error(self, token: Token, message: str) -> None:
+        from lox import Lox
+        from lox.errors import ParseError
+
+        Lox.parse_error(ParseError(token, message))
@@ -1,9 +1,22 @@
-from typing import TYPE_CHECKING
+import sys
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
 
 if TYPE_CHECKING:
     import lox.ast as ast
     from lox.lexer import Token
     from lox.errors import ParseError, RuntimeError
+    from mmap import mmap
+    from lox.cache import ProgramCache
+    from lox.passes import Eliminated
+
+
+# How deep Python may recurse resolving, optimising and running a
+# program, which takes up to ten frames for each level of nesting, so
+# a program nested in the tens of thousands, as the StackParser
+# parses, can be run too. Each frame costs a few hundred bytes, were a
+# Lox function to recurse forever.
+RECURSION_LIMIT = 250_000
 
 
 class Lox:
@@ -11,31 +24,92 @@ class Lox:
 
     had_parse_error: bool = False
     had_runtime_error: bool = False
+    # what dead code elimination removed from the last program, if it ran
+    dead_code: "Eliminated | None" = None
 
     _interpreter = Interpreter()
 
     @staticmethod
-    def run_program(source: str):
-        from lox.lexer import Lexer
-        from lox.parser import Parser
-        from lox.resolver import Resolver
+    def run_file(path: str, use_cache: bool = False, lazy_functions: bool = False):
+        import mmap
+        import os
+        from lox.cache import DIRECTORY, ProgramCache
 
-        lexer = Lexer(source)
-        tokens: list["Token"] = lexer.read_tokens()
+        cache = None
+        if use_cache:
+            cache = ProgramCache(os.path.join(os.path.dirname(path), DIRECTORY))
 
-        parser = Parser(tokens)
-        program: list["ast.statements.Statement"] = parser.parse()
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # empty files can't be mapped
+                return Lox.run_program("")
 
-        if Lox.had_parse_error:
-            return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                Lox.run_program(source, cache=cache, lazy_functions=lazy_functions)
 
-        resolver = Resolver(Lox._interpreter)
-        resolver.resolve_statements(program)
+    @staticmethod
+    def run_files(
+        paths: list[str], max_workers: int | None = None, use_cache: bool = False
+    ):
+        from lox.batch import load_files
+        from lox.passes import prepare
+
+        program = load_files(paths, max_workers, use_cache)
 
         if Lox.had_parse_error:
             return
 
-        Lox._interpreter.interpret(program)
+        with Lox.deep_recursion():
+            prepare(program)
+            Lox._interpreter.interpret(program)
+
+    @staticmethod
+    def run_program(
+        source: "str | bytes | mmap",
+        regex_lexer: bool = False,
+        cache: "ProgramCache | None" = None,
+        lazy_functions: bool = False,
+        eliminate_dead_code: bool = False,
+        optimise_ssa: bool = False,
+    ):
+        from lox.ast.flat import FlatAST
+        from lox.lexer import Lexer, RegexLexer
+        from lox.parser import Parser
+        from lox.passes import prepare
+        from lox.resolver import Resolver
+
+        with Lox.deep_recursion():
+            if cache:
+                flat = cache.load(source)
+                if flat is not None:
+                    program = flat.to_tree()
+                    Lox.dead_code = prepare(program, eliminate_dead_code, optimise_ssa)
+                    Lox._interpreter.interpret(program)
+                    return
+
+            # only the regex lexer can scan bytes in place
+            if regex_lexer or not isinstance(source, str):
+                lexer = RegexLexer(source)
+            else:
+                lexer = Lexer(source)
+            parser = Parser(lexer.iter_tokens(), lazy_functions)
+            program: list["ast.statements.Statement"] = parser.parse()
+
+            if Lox.had_parse_error:
+                return
+
+            resolver = Resolver()
+            resolver.resolve_statements(program)
+
+            if Lox.had_parse_error:
+                return
+
+            # lazy bodies have no flat form, and a hit skips more anyway
+            if cache and not lazy_functions:
+                cache.store(source, FlatAST.from_tree(program))
+
+            Lox.dead_code = prepare(program, eliminate_dead_code, optimise_ssa)
+            Lox._interpreter.interpret(program)
 
     @staticmethod
     def start_repl():
@@ -50,6 +124,32 @@ class Lox:
                 print()
                 break
 
+    @staticmethod
+    @contextmanager
+    def deep_recursion() -> Iterator[None]:
+        """
+        Raises Python's recursion limit to RECURSION_LIMIT for the
+        tree-walking passes, and reports a program nested too deeply
+        even for that as an error, rather than with a traceback.
+        """
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+
+        try:
+            yield
+        except RecursionError:
+            Lox.nesting_error()
+        finally:
+            sys.setrecursionlimit(limit)
+
+    @staticmethod
+    def nesting_error(runtime: bool = False):
+        print("Error: Too deeply nested.")
+        if runtime:
+            Lox.had_runtime_error = True
+        else:
+            Lox.had_parse_error = True
+
     @staticmethod
     def parse_error(error: "ParseError"):
         where = "end of file" if error.is_eof else f"'{error.token.raw}'"
@@ -1,2 +1,2 @@
-from .environment import Environment
+from .environment import Cell, Environment, LocalEnvironment, global_slot
 from .klass import Instance, Class
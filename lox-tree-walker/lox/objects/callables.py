@@ -6,7 +6,7 @@ if TYPE_CHECKING:
     from lox.interpreter import Interpreter
     from lox.objects import Instance
 
-from lox.objects import Environment
+from lox.objects import Cell, LocalEnvironment
 
 
 class Return(Exception):
@@ -17,6 +17,8 @@ class Return(Exception):
 
 
 class Callable(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def call(self, interpreter: "Interpreter", arguments: list) -> Any:
         pass
@@ -27,10 +29,19 @@ class Callable(ABC):
 
 
 class Function(Callable):
+    """
+    The closure holds a cell for each variable the function captures,
+    in the order given by declaration.captures. A method's starts with
+    'this', which is None until it is bound to an instance, and then
+    'super' in a subclass.
+    """
+
+    __slots__ = ("closure", "declaration", "is_initialiser")
+
     def __init__(
         self,
         declaration: "ast.statements.Function",
-        closure: "Environment",
+        closure: list["Cell | None"],
         is_initialiser: bool,
     ):
         self.closure = closure
@@ -38,26 +49,38 @@ class Function(Callable):
         self.is_initialiser = is_initialiser
 
     def bind(self, instance: "Instance") -> "Function":
-        env = Environment(self.closure)
-        env.define("this", instance)
+        closure = self.closure.copy()
+        closure[0] = Cell(instance)
 
-        return Function(self.declaration, env, self.is_initialiser)
+        return Function(self.declaration, closure, self.is_initialiser)
 
     def call(self, interpreter: "Interpreter", arguments: list):
-        env = Environment(self.closure)
-        for i, param in enumerate(self.declaration.params):
-            env.define(param.raw, arguments[i])
+        if self.declaration.body.statements is None:
+            from lox.lazy import compile_body
+
+            compile_body(self.declaration)
+
+        # the parameters take the first slots, in order
+        declaration = self.declaration
+        values = arguments + [None] * (declaration.body.frame_size - len(arguments))
+        for slot in declaration.captured_params:
+            values[slot] = Cell(values[slot])
+
+        closure = interpreter.closure
+        interpreter.closure = self.closure
 
         try:
-            interpreter.execute_block(self.declaration.body, env)
+            interpreter.execute_block(declaration.body, LocalEnvironment(None, values))
         except Return as e:
             if self.is_initialiser:
-                return self.closure.get_at(0, "this")
+                return self.closure[0].value  # type: ignore
 
             return e.value
+        finally:
+            interpreter.closure = closure
 
         if self.is_initialiser:
-            return self.closure.get_at(0, "this")
+            return self.closure[0].value  # type: ignore
 
     def arity(self) -> int:
         return len(self.declaration.params)
@@ -67,6 +90,8 @@ class Function(Callable):
 
 
 class NativeClock(Callable):
+    __slots__ = ()
+
     def call(self, interpreter: "Interpreter", arguments: list):
         import time
 
@@ -6,45 +6,127 @@ if TYPE_CHECKING:
 from lox.errors import RuntimeError
 
 
+# the value of a global which is yet to be defined
+UNDEFINED = object()
+
+# Every global name is given a slot the first time it is seen, the
+# same one in every interpreter, so a slot cached on a node is valid
+# whichever interpreter runs it. Since nodes can outlive the
+# interpreter which numbered them, slots are never given back: the
+# table grows with the distinct global names the process has seen,
+# not with the programs run
+SLOTS: dict[str, int] = {}
+
+
+def global_slot(name: str) -> int:
+    slot = SLOTS.get(name)
+    if slot is None:
+        slot = SLOTS[name] = len(SLOTS)
+
+    return slot
+
+
 class Environment:
-    def __init__(self, enclosing: "Environment | None" = None):
-        self.enclosing = enclosing
+    """
+    The global scope. Globals can be defined and redefined at any
+    time, e.g. line by line in the REPL, so rather than being fixed up
+    front like locals, each name takes the slot global_slot gives it
+    and the table grows to fit. Slots of names which aren't defined
+    yet hold UNDEFINED.
+
+    The trade-off is that an interpreter defining a name numbered late
+    pads its table up to that slot, with one entry for every global
+    name seen before it, even in other programs. That is a pointer per
+    name, which is cheap next to the names themselves, and it buys
+    globals that are read by index rather than by hash.
+    """
+
+    __slots__ = ("values",)
 
-        self.values = {}
+    def __init__(self):
+        self.values: list = []
 
     def define(self, name: str, value) -> None:
-        self.values[name] = value
+        slot = global_slot(name)
 
-    def assign(self, token: "Token", value) -> None:
-        if token.raw in self.values:
-            self.values[token.raw] = value
-            return
+        values = self.values
+        if slot >= len(values):
+            values += [UNDEFINED] * (slot + 1 - len(values))
 
-        if self.enclosing:
-            self.enclosing.assign(token, value)
-            return
+        values[slot] = value
+
+    def assign(self, slot: int, token: "Token", value) -> None:
+        values = self.values
+
+        try:
+            if values[slot] is not UNDEFINED:
+                values[slot] = value
+                return
+        except IndexError:
+            # a name first seen after the table last grew
+            pass
 
         raise RuntimeError(token, f"Undefined variable '{token.raw}'.")
 
-    def assign_at(self, distance: int, name: str, value):
-        self._ancestor(distance).values[name] = value
+    def get(self, slot: int, token: "Token"):
+        try:
+            value = self.values[slot]
+        except IndexError:
+            value = UNDEFINED
 
-    def get(self, token: "Token"):
-        if token.raw in self.values:
-            return self.values[token.raw]
+        if value is UNDEFINED:
+            raise RuntimeError(token, f"Undefined variable '{token.raw}'.")
 
-        if self.enclosing:
-            return self.enclosing.get(token)
+        return value
 
-        raise RuntimeError(token, f"Undefined variable '{token.raw}'.")
 
-    def get_at(self, distance: int, name: str):
-        return self._ancestor(distance).values[name]
+class Cell:
+    """
+    A local captured by a closure, shared between the scope it was
+    declared in and the closures which capture it.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class LocalEnvironment:
+    """
+    A local scope: a function call or a block. The resolver has
+    already numbered each local by the order it is bound in its scope,
+    so values is a list with one slot per local, and an access is an
+    index rather than a hash of the name.
+
+    Only resolved accesses reach a local scope, and they never go
+    past the function they are in, so the chain of enclosing scopes
+    is walked by depth alone. A function's own scope has no enclosing
+    one, since what it captures is in its closure instead.
+    """
+
+    __slots__ = ("enclosing", "values")
+
+    def __init__(
+        self, enclosing: "Environment | LocalEnvironment | None", values: list
+    ):
+        self.enclosing = enclosing
+        self.values = values
+
+    def get_at(self, distance: int, slot: int):
+        # most accesses are to the innermost scope
+        if distance == 0:
+            return self.values[slot]
+
+        env = self
+        for _ in range(distance):
+            env = env.enclosing
 
-    def _ancestor(self, distance: int) -> "Environment":
-        ancestor = self
+        return cast(LocalEnvironment, env).values[slot]
 
+    def assign_at(self, distance: int, slot: int, value) -> None:
+        env = self
         for _ in range(distance):
-            ancestor = cast(Environment, ancestor.enclosing)
+            env = env.enclosing
 
-        return ancestor
+        cast(LocalEnvironment, env).values[slot] = value
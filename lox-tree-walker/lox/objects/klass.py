@@ -9,6 +9,8 @@ from lox.errors import RuntimeError
 
 
 class Class(Callable):
+    __slots__ = ("name", "superclass", "methods")
+
     def __init__(
         self, name: str, superclass: "Class | None", methods: dict[str, "Function"]
     ):
@@ -43,6 +45,8 @@ class Class(Callable):
 
 
 class Instance:
+    __slots__ = ("klass", "fields")
+
     def __init__(self, klass: "Class"):
         self.klass = klass
         self.fields: dict[str, Any] = {}
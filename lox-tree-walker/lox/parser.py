@@ -1,4 +1,5 @@
-from typing import TYPE_CHECKING
+from itertools import chain, tee
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TypeVar
 
 if TYPE_CHECKING:
     from lox.lexer import Token
@@ -9,6 +10,70 @@ from lox.errors import ParseError
 from lox import Lox
 
 
+class Precedence:
+    ASSIGNMENT = 1
+    OR = 2
+    AND = 3
+    EQUALITY = 4
+    COMPARISON = 5
+    TERM = 6
+    FACTOR = 7
+
+
+# (operators, precedence, node, groups to the right)
+# Equality and comparison group to the right, as the grammar had them.
+OPERATORS: list[tuple[list["TokenType"], int, type, bool]] = [
+    ([TokenType.OR], Precedence.OR, ast.expressions.Logical, False),
+    ([TokenType.AND], Precedence.AND, ast.expressions.Logical, False),
+    (
+        [TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL],
+        Precedence.EQUALITY,
+        ast.expressions.Binary,
+        True,
+    ),
+    (
+        [
+            TokenType.LESS,
+            TokenType.LESS_EQUAL,
+            TokenType.GREATER,
+            TokenType.GREATER_EQUAL,
+        ],
+        Precedence.COMPARISON,
+        ast.expressions.Binary,
+        True,
+    ),
+    ([TokenType.PLUS, TokenType.MINUS], Precedence.TERM, ast.expressions.Binary, False),
+    (
+        [TokenType.STAR, TokenType.SLASH],
+        Precedence.FACTOR,
+        ast.expressions.Binary,
+        False,
+    ),
+]
+
+# operator: (precedence, precedence of the right operand, node)
+INFIX: dict["TokenType", tuple[int, int, type]] = {
+    type: (precedence, precedence if right else precedence + 1, node)
+    for types, precedence, node, right in OPERATORS
+    for type in types
+}
+
+UNARY: frozenset["TokenType"] = frozenset([TokenType.BANG, TokenType.MINUS])
+
+LITERALS: dict["TokenType", bool | None] = {
+    TokenType.TRUE: True,
+    TokenType.FALSE: False,
+    TokenType.NIL: None,
+}
+
+T = TypeVar("T")
+
+# Each level of nesting costs at most seven Python frames, e.g. from
+# assignment() round through a grouping back to assignment(), so this
+# stays well inside the default recursion limit of 1000
+MAX_DEPTH = 100
+
+
 class Parser:
     """
     This parser aligns identically with the natural manual parsing
@@ -20,42 +85,112 @@ class Parser:
     providing the opportunity to match low precedence operators
     early, placing them higher in the tree.
 
-    This parser aligns closely with that grammar definition.
-    It is very inefficient however; to parse a literal, you must
-    call expression(), equality(), ..., unary(), primary().
+    Statements follow that grammar definition closely. Expressions
+    used to as well, but that meant calling expression(), equality(),
+    ..., unary(), primary() to parse a single literal. Binary
+    operators are instead parsed by precedence climbing over the
+    INFIX table, so a literal costs a few calls whatever the depth
+    of the grammar. The tree is the same as the grammar gives,
+    including equality and comparison grouping to the right.
+
+    Tokens are pulled from any iterable one at a time. Only the
+    current and previous tokens are held, so a lexer's iter_tokens()
+    can be streamed straight through without building a token list.
+
+    With lazy_functions, the bodies of top-level functions and of
+    methods of top-level classes are only brace-matched, and kept as
+    a LazyBlock of tokens for lox.lazy to compile on the first call.
+    Nested functions are parsed along with whatever encloses them.
+
+    Each top-level declaration is parsed recursively, which is the
+    fast path. The tokens it pulls are teed off as it goes, so one
+    nested deeper than MAX_DEPTH can be parsed again from the start
+    by a StackParser. The parser gives up at MAX_DEPTH rather than
+    waiting for Python's RecursionError, which could be raised inside
+    a lexer generator and finish it, losing the rest of the stream.
+    The errors the recursive attempt reports are held back until it
+    finishes, so those the StackParser reports again only show once.
     """
 
-    def __init__(self, tokens: list["Token"]):
-        self.tokens = tokens
-        self.current = 0
+    def __init__(self, tokens: Iterable["Token"], lazy_functions: bool = False):
+        self.tokens: Iterator["Token"] = iter(tokens)
+        self.lazy_functions = lazy_functions
+
+        # how many blocks, statements and expressions enclose the
+        # current token, zero at the top level
+        self.depth = 0
+        # the errors held back while recursively(), or None
+        self.errors: "list[ParseError] | None" = None
+
+        self.current_token: "Token" = next(self.tokens)
+        self.previous_token: "Token" = self.current_token
 
     def parse(self) -> list["ast.statements.Statement"]:
-        stmts: list["ast.statements.Statement"] = []
+        return list(self.iter_parse())
 
+    def iter_parse(self) -> Iterator["ast.statements.Statement"]:
         while not self.is_at_end():
-            declaration = self.declaration()
+            declaration = self.top_level_declaration()
             if declaration:
-                stmts.append(declaration)
+                yield declaration
+
+    def top_level_declaration(self) -> "ast.statements.Statement | None":
+        current, previous = self.current_token, self.previous_token
+        self.tokens, replay = tee(self.tokens)
+
+        try:
+            return self.recursively(self.declaration)
+        except RecursionError:
+            pass
+
+        from lox.stack_parser import StackParser
 
-        return stmts
+        parser = StackParser(chain([current], replay), self.lazy_functions)
+        parser.previous_token = previous
+
+        try:
+            return parser.declaration()
+        finally:
+            self.tokens = parser.tokens
+            self.current_token = parser.current_token
+            self.previous_token = parser.previous_token
+            self.depth = parser.depth
+
+    def recursively(self, rule: Callable[[], T]) -> T:
+        """
+        Parses a rule, reporting its errors only once it finishes,
+        since one which overflows is parsed again by a StackParser.
+        """
+        self.errors = []
+        try:
+            result = rule()
+        finally:
+            errors, self.errors = self.errors, None
+
+        for error in errors:
+            Lox.parse_error(error)
+        return result
 
     """
     Statements
     """
 
     def declaration(self) -> "ast.statements.Statement | None":
+        depth = self.depth
+
         try:
-            if self.match([TokenType.CLASS]):
+            if self.match(TokenType.CLASS):
                 return self.class_declaration()
 
-            if self.match([TokenType.FUN]):
+            if self.match(TokenType.FUN):
                 return self.function_declaration("function")
 
-            if self.match([TokenType.VAR]):
+            if self.match(TokenType.VAR):
                 return self.variable_declaration()
 
             return self.statement()
         except ParseError:
+            self.depth = depth
             self.synchronise()
             return None
 
@@ -63,7 +198,7 @@ class Parser:
         name = self.consume(TokenType.IDENTIFIER, "Expected class name.")
 
         superclass: "ast.expressions.Variable | None" = None
-        if self.match([TokenType.LESS]):
+        if self.match(TokenType.LESS):
             self.consume(TokenType.IDENTIFIER, "Expected superclass name.")
             superclass = ast.expressions.Variable(self.previous())
 
@@ -86,7 +221,7 @@ class Parser:
             params.append(
                 self.consume(TokenType.IDENTIFIER, f"Expected {kind} parameter name.")
             )
-            while self.match([TokenType.COMMA]):
+            while self.match(TokenType.COMMA):
                 if len(params) >= 255:
                     self.error(self.peek(), "Can't have more than 255 parameters.")
 
@@ -99,7 +234,10 @@ class Parser:
         self.consume(TokenType.RIGHT_PAREN, f"Expected ')' after {kind} parameters.")
         self.consume(TokenType.LEFT_BRACE, f"Expected '{{' before {kind} body.")
 
-        body = self.block()
+        if self.lazy_functions and self.depth == 0:
+            body = self.skip_block()
+        else:
+            body = self.block()
 
         return ast.statements.Function(name, params, body)
 
@@ -107,52 +245,56 @@ class Parser:
         name: Token = self.consume(TokenType.IDENTIFIER, "Expected variable name.")
 
         initialiser = None
-        if self.match([TokenType.EQUAL]):
+        if self.match(TokenType.EQUAL):
             initialiser = self.expression()
 
         self.consume(TokenType.SEMICOLON, "Expected assignment to end with ';'.")
         return ast.statements.Var(name, initialiser)
 
     def statement(self) -> "ast.statements.Statement":
-        if self.match([TokenType.FOR]):
+        if self.match(TokenType.FOR):
             return self.for_statement()
 
-        if self.match([TokenType.IF]):
+        if self.match(TokenType.IF):
             return self.if_statement()
 
-        if self.match([TokenType.WHILE]):
+        if self.match(TokenType.WHILE):
             return self.while_statement()
 
-        if self.match([TokenType.RETURN]):
+        if self.match(TokenType.RETURN):
             return self.return_statement()
 
-        if self.match([TokenType.PRINT]):
+        if self.match(TokenType.PRINT):
             return self.print_statement()
 
-        if self.match([TokenType.LEFT_BRACE]):
+        if self.match(TokenType.LEFT_BRACE):
             return self.block()
 
         return self.expression_statement()
 
     def if_statement(self) -> "ast.statements.If":
+        self.nest()
         self.consume(TokenType.LEFT_PAREN, "Expected '(' after 'if'.")
         condition = self.expression()
         self.consume(TokenType.RIGHT_PAREN, "Expected ')' after 'if'.")
 
         then_branch = self.statement()
         else_branch = None
-        if self.match([TokenType.ELSE]):
+        if self.match(TokenType.ELSE):
             else_branch = self.statement()
 
+        self.depth -= 1
         return ast.statements.If(condition, then_branch, else_branch)
 
     def while_statement(self) -> "ast.statements.While":
+        self.nest()
         self.consume(TokenType.LEFT_PAREN, "Expected '(' after 'while'.")
         condition = self.expression()
         self.consume(TokenType.RIGHT_PAREN, "Expected ')' after 'while'.")
 
         body = self.statement()
 
+        self.depth -= 1
         return ast.statements.While(condition, body)
 
     def return_statement(self) -> "ast.statements.Return":
@@ -166,12 +308,13 @@ class Parser:
         return ast.statements.Return(token, value)
 
     def for_statement(self) -> "ast.statements.Block | ast.statements.While":
+        self.nest()
         self.consume(TokenType.LEFT_PAREN, "Expected '(' after 'for'.")
 
         initialiser = None
-        if self.match([TokenType.SEMICOLON]):
+        if self.match(TokenType.SEMICOLON):
             initialiser = None
-        elif self.match([TokenType.VAR]):
+        elif self.match(TokenType.VAR):
             initialiser = self.variable_declaration()
         else:
             initialiser = self.expression_statement()
@@ -198,6 +341,7 @@ class Parser:
         if initialiser:
             body = ast.statements.Block([initialiser, body])
 
+        self.depth -= 1
         return body
 
     def print_statement(self) -> "ast.statements.Print":
@@ -209,13 +353,43 @@ class Parser:
     def block(self) -> "ast.statements.Block":
         statements = []
 
+        self.nest()
         while not (self.check(TokenType.RIGHT_BRACE) or self.is_at_end()):
-            statements.append(self.declaration())
+            declaration = self.declaration()
+            if declaration:
+                statements.append(declaration)
+        self.depth -= 1
 
         self.consume(TokenType.RIGHT_BRACE, "Expected closing '}'.")
 
         return ast.statements.Block(statements)
 
+    def skip_block(self) -> "ast.statements.LazyBlock":
+        """
+        Collects the tokens up to the brace closing the current block,
+        without parsing them.
+        """
+        tokens = []
+        depth = 1
+
+        # the hot loop of a lazy parse, so it reads the stream directly
+        token = self.current_token
+        while token.type is not TokenType.EOF:
+            tokens.append(token)
+
+            if token.type is TokenType.LEFT_BRACE:
+                depth += 1
+            elif token.type is TokenType.RIGHT_BRACE:
+                depth -= 1
+                if depth == 0:
+                    self.advance()
+                    return ast.statements.LazyBlock(tokens)
+
+            token = self.current_token = next(self.tokens)
+            self.previous_token = tokens[-1]
+
+        raise self.error(self.peek(), "Expected closing '}'.")
+
     def expression_statement(self) -> "ast.statements.Expression":
         expr = self.expression()
         self.consume(TokenType.SEMICOLON, "Expected ';' after expression.")
@@ -230,97 +404,47 @@ class Parser:
         return self.assignment()
 
     def assignment(self) -> "ast.expressions.Expression":
-        expr = self.logic_or()
+        self.nest()
+        expr = self.binary(Precedence.OR)
 
-        if self.match([TokenType.EQUAL]):
+        if self.match(TokenType.EQUAL):
             equals = self.previous()
             value = self.assignment()
 
             if isinstance(expr, ast.expressions.Variable):
-                return ast.expressions.Assignment(expr.name, value)
+                expr = ast.expressions.Assignment(expr.name, value)
             elif isinstance(expr, ast.expressions.Get):
-                return ast.expressions.Set(expr.object, expr.name, value)
-
-            self.error(equals, "Invalid assignment target.")
-
-        return expr
-
-    def logic_or(self) -> "ast.expressions.Expression":
-        expr = self.logic_and()
-
-        while self.match([TokenType.OR]):
-            logic_or = self.previous()
-            right = self.logic_and()
-
-            expr = ast.expressions.Logical(expr, logic_or, right)
-
-        return expr
-
-    def logic_and(self) -> "ast.expressions.Expression":
-        expr = self.equality()
-
-        while self.match([TokenType.AND]):
-            logic_and = self.previous()
-            right = self.equality()
-
-            expr = ast.expressions.Logical(expr, logic_and, right)
-
-        return expr
-
-    def equality(self) -> "ast.expressions.Expression":
-        expr = self.comparison()
-
-        while self.match([TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL]):
-            operator = self.previous()
-            right = self.equality()
-
-            expr = ast.expressions.Binary(expr, operator, right)
-
-        return expr
-
-    def comparison(self) -> "ast.expressions.Expression":
-        expr = self.term()
-
-        while self.match(
-            [
-                TokenType.LESS,
-                TokenType.LESS_EQUAL,
-                TokenType.GREATER,
-                TokenType.GREATER_EQUAL,
-            ]
-        ):
-            operator = self.previous()
-            right = self.comparison()
-
-            expr = ast.expressions.Binary(expr, operator, right)
-
-        return expr
-
-    def term(self) -> "ast.expressions.Expression":
-        expr = self.factor()
-
-        while self.match([TokenType.PLUS, TokenType.MINUS]):
-            operator = self.previous()
-            right = self.factor()
-
-            expr = ast.expressions.Binary(expr, operator, right)
+                expr = ast.expressions.Set(expr.object, expr.name, value)
+            else:
+                self.error(equals, "Invalid assignment target.")
 
+        self.depth -= 1
         return expr
 
-    def factor(self) -> "ast.expressions.Expression":
+    def binary(self, precedence: int) -> "ast.expressions.Expression":
+        """
+        Parses a chain of infix operators binding at least as tightly
+        as the given precedence, by precedence climbing.
+        """
         expr = self.unary()
 
-        while self.match([TokenType.STAR, TokenType.SLASH]):
-            operator = self.previous()
-            right = self.unary()
+        while True:
+            rule = INFIX.get(self.current_token.type)
+            if rule is None or rule[0] < precedence:
+                return expr
 
-            expr = ast.expressions.Binary(expr, operator, right)
+            _, right_precedence, node = rule
+            operator = self.advance()
 
-        return expr
+            self.nest()
+            right = self.binary(right_precedence)
+            self.depth -= 1
+
+            expr = node(expr, operator, right)
 
     def unary(self) -> "ast.expressions.Expression":
-        if self.match([TokenType.BANG, TokenType.MINUS]):
-            operator = self.previous()
+        if self.current_token.type in UNARY:
+            operator = self.advance()
             right = self.call()
 
             return ast.expressions.Unary(operator, right)
@@ -331,9 +455,9 @@ class Parser:
         expr = self.primary()
 
         while True:
-            if self.match([TokenType.LEFT_PAREN]):
+            if self.match(TokenType.LEFT_PAREN):
                 expr = self.finish_call(expr)
-            elif self.match([TokenType.DOT]):
+            elif self.match(TokenType.DOT):
                 name = self.consume(
                     TokenType.IDENTIFIER, "Expected property name after '.'."
                 )
@@ -349,7 +473,7 @@ class Parser:
         arguments: list["ast.expressions.Expression"] = []
         if not self.check(TokenType.RIGHT_PAREN):
             arguments.append(self.expression())
-            while self.match([TokenType.COMMA]):
+            while self.match(TokenType.COMMA):
                 if len(arguments) >= 255:
                     self.error(self.peek(), "Can't have more than 255 arguments.")
 
@@ -360,76 +484,87 @@ class Parser:
         return ast.expressions.Call(callee, token, arguments)
 
     def primary(self) -> "ast.expressions.Expression":
-        if self.match([TokenType.TRUE]):
-            return ast.expressions.Literal(True)
-        elif self.match([TokenType.FALSE]):
-            return ast.expressions.Literal(False)
-        elif self.match([TokenType.NIL]):
-            return ast.expressions.Literal(None)
+        token = self.current_token
+        type = token.type
+
+        if type is TokenType.IDENTIFIER:
+            self.advance()
+            return ast.expressions.Variable(token)
 
-        if self.match([TokenType.NUMBER, TokenType.STRING]):
-            return ast.expressions.Literal(self.previous().literal)
+        if type is TokenType.NUMBER or type is TokenType.STRING:
+            self.advance()
+            return ast.expressions.Literal(token.literal)
+
+        if type in LITERALS:
+            self.advance()
+            return ast.expressions.Literal(LITERALS[type])
 
-        if self.match([TokenType.THIS]):
-            return ast.expressions.This(self.previous())
+        if type is TokenType.THIS:
+            self.advance()
+            return ast.expressions.This(token)
 
-        if self.match([TokenType.SUPER]):
-            keyword = self.previous()
+        if type is TokenType.SUPER:
+            self.advance()
             self.consume(TokenType.DOT, "Expected '.' after 'super'.")
             method = self.consume(
                 TokenType.IDENTIFIER, "Expected superclass method name."
             )
 
-            return ast.expressions.Super(keyword, method)
-
-        if self.match([TokenType.IDENTIFIER]):
-            return ast.expressions.Variable(self.previous())
+            return ast.expressions.Super(token, method)
 
-        if self.match([TokenType.LEFT_PAREN]):
+        if type is TokenType.LEFT_PAREN:
+            self.advance()
             expr = self.expression()
             self.consume(TokenType.RIGHT_PAREN, "Expected ')' after expression.")
             return ast.expressions.Grouping(expr)
 
-        raise self.error(self.peek(), "Expected expression.")
+        raise self.error(token, "Expected expression.")
+
+    def nest(self):
+        self.depth += 1
 
-    def match(self, token_types: list["TokenType"]) -> bool:
-        for type in token_types:
-            if self.check(type):
-                self.advance()
-                return True
+        if self.depth > MAX_DEPTH:
+            raise RecursionError("Too deeply nested for the recursive parser.")
+
+    def match(self, *types: "TokenType") -> bool:
+        # EOF is never asked for, so there's no need to check for the end
+        if self.current_token.type in types:
+            self.advance()
+            return True
 
         return False
 
     def check(self, type: "TokenType") -> bool:
-        if self.is_at_end():
-            return False
-
-        return self.peek().type == type
+        return self.current_token.type is type and type is not TokenType.EOF
 
     def advance(self) -> "Token":
-        if not self.is_at_end():
-            self.current += 1
+        if self.current_token.type is not TokenType.EOF:
+            self.previous_token = self.current_token
+            self.current_token = next(self.tokens)
 
-        return self.previous()
+        return self.previous_token
 
     def is_at_end(self) -> bool:
-        return self.peek().type == TokenType.EOF
+        return self.current_token.type is TokenType.EOF
 
     def peek(self) -> "Token":
-        return self.tokens[self.current]
+        return self.current_token
 
     def previous(self) -> "Token":
-        return self.tokens[self.current - 1]
+        return self.previous_token
 
     def consume(self, expected: "TokenType", message: str) -> "Token":
-        if self.check(expected):
+        if self.current_token.type is expected:
             return self.advance()
 
         raise self.error(self.peek(), message)
 
     def error(self, token: "Token", message: str) -> "ParseError":
         error = ParseError(token, message)
-        Lox.parse_error(error)
+        if self.errors is None:
+            Lox.parse_error(error)
+        else:
+            self.errors.append(error)
 
         return error
 
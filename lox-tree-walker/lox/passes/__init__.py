@@ -0,0 +1,42 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import lox.ast as ast
+
+from .cfg import BasicBlock, ControlFlowGraph
+from .closures import convert_closures
+from .constants import devirtualise
+from .dead_code import Eliminated, eliminate_dead_code
+from .folding import fold_constants
+from .inlining import inline_functions
+from .loops import optimise_loops
+from .walker import ScopedWalker, Walker
+
+
+def prepare(
+    program: list["ast.statements.Statement"],
+    dead_code: bool = False,
+    ssa: bool = False,
+) -> "Eliminated | None":
+    """
+    Runs the passes every resolved program goes through before it is
+    interpreted, and optionally eliminates dead code, returning what
+    that removed, and optimises functions in SSA form, see lox.ssa.
+    """
+    fold_constants(program)
+
+    eliminated = None
+    if dead_code:
+        eliminated = eliminate_dead_code(program)
+
+    if ssa:
+        from lox.ssa import optimise
+
+        optimise(program)
+
+    optimise_loops(program)
+    convert_closures(program)
+    devirtualise(program)
+    inline_functions(program)
+
+    return eliminated
@@ -0,0 +1,150 @@
+import lox.ast as ast
+
+
+class BasicBlock:
+    """
+    A run of statements which always execute one after the other,
+    only ever entered at the first.
+
+    An If is the last statement of the block evaluating its condition,
+    and a While the only statement of one. A Block is placed where it
+    is entered, followed by its own statements.
+    """
+
+    __slots__ = ("statements", "successors")
+
+    def __init__(self):
+        self.statements: list["ast.statements.Statement"] = []
+        self.successors: list["BasicBlock"] = []
+
+
+def constant_condition(condition: "ast.expressions.Expression") -> bool | None:
+    """
+    Whether a condition is always truthy or always falsy, or None if it
+    depends on what runs.
+    """
+    from lox.interpreter import Interpreter
+
+    if type(condition) is ast.expressions.Literal:
+        return Interpreter.is_truthy(condition.value)
+    return None
+
+
+class ControlFlowGraph:
+    """
+    The basic blocks of a function body, or of the top level of a
+    program, and the ways control can pass between them.
+
+    Functions declared within are left to graphs of their own. Edges
+    are only added where control can actually go, so the branch a
+    constant condition never takes has no way in.
+
+    Statements following one control never falls through, a return or
+    a loop whose condition is always true, go into a block with no
+    way in, so every statement is in the graph whether it is reachable
+    or not.
+    """
+
+    def __init__(self, statements: list["ast.statements.Statement"]):
+        self.entry = BasicBlock()
+        self.exit = BasicBlock()
+        self.blocks = [self.entry, self.exit]
+
+        end = self.build(statements, self.entry)
+        self.link(end, self.exit)
+
+    def new_block(self) -> "BasicBlock":
+        block = BasicBlock()
+        self.blocks.append(block)
+        return block
+
+    def link(self, block: "BasicBlock | None", successor: "BasicBlock"):
+        if block is not None:
+            block.successors.append(successor)
+
+    def build(
+        self,
+        statements: list["ast.statements.Statement"],
+        current: "BasicBlock | None",
+    ) -> "BasicBlock | None":
+        """
+        Adds statements following on from the current block, and
+        returns the block control falls out of them in, or None if it
+        never does.
+        """
+        for stmt in statements:
+            current = self.build_statement(stmt, current)
+
+        return current
+
+    def build_statement(
+        self, stmt: "ast.statements.Statement", current: "BasicBlock | None"
+    ) -> "BasicBlock | None":
+        if current is None:
+            # unreachable
+            current = self.new_block()
+
+        if type(stmt) is ast.statements.While:
+            taken = constant_condition(stmt.condition)
+
+            # the condition is evaluated again after each iteration
+            header = self.new_block()
+            self.link(current, header)
+            header.statements.append(stmt)
+
+            body = self.new_block()
+            if taken is not False:
+                self.link(header, body)
+            self.link(self.build_statement(stmt.body, body), header)
+
+            if taken is True:
+                return None
+
+            after = self.new_block()
+            self.link(header, after)
+            return after
+
+        current.statements.append(stmt)
+
+        if type(stmt) is ast.statements.Block:
+            return self.build(stmt.statements, current)
+
+        elif type(stmt) is ast.statements.Return:
+            self.link(current, self.exit)
+            return None
+
+        elif type(stmt) is ast.statements.If:
+            taken = constant_condition(stmt.condition)
+            join = self.new_block()
+
+            then = self.new_block()
+            if taken is not False:
+                self.link(current, then)
+            self.link(self.build_statement(stmt.then_branch, then), join)
+
+            if stmt.else_branch:
+                otherwise = self.new_block()
+                if taken is not True:
+                    self.link(current, otherwise)
+                self.link(self.build_statement(stmt.else_branch, otherwise), join)
+            elif taken is not True:
+                self.link(current, join)
+
+            return join
+
+        return current
+
+    def reachable(self) -> set["BasicBlock"]:
+        seen = {self.entry}
+        stack = [self.entry]
+
+        while stack:
+            for successor in stack.pop().successors:
+                if successor not in seen:
+                    seen.add(successor)
+                    stack.append(successor)
+
+        return seen
+
+    def reachable_statements(self) -> set["ast.statements.Statement"]:
+        return {stmt for block in self.reachable() for stmt in block.statements}
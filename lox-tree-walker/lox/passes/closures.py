@@ -0,0 +1,275 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.passes.walker import Walker
+
+Declaration = "ast.statements.Var | ast.statements.Function | ast.statements.Class"
+
+
+class Binding:
+    """
+    A local variable as the pass sees it: the frame and slot it lives
+    in, and what to mark should a closure capture it.
+
+    Until then, the nodes using it are kept, since it is only known
+    to be captured once a closure uses it, and by then uses in its
+    own function have been passed.
+    """
+
+    __slots__ = ("frame", "slot", "declaration", "nodes", "captured")
+
+    def __init__(self, frame: int, slot: int, declaration: "Declaration | None" = None):
+        self.frame = frame
+        self.slot = slot
+        self.declaration = declaration
+        self.nodes: list["ast.expressions.Resolvable"] = []
+        self.captured = False
+
+
+class Frame:
+    """
+    A scope the interpreter allocates, and the function it belongs
+    to, or None for the scopes holding 'this' and 'super', which are
+    part of each method's closure instead.
+    """
+
+    __slots__ = ("function", "bindings")
+
+    def __init__(self, function: "Closure | None"):
+        self.function = function
+        # slot -> the binding using it at this point in the program
+        self.bindings: dict[int, "Binding"] = {}
+
+
+class Closure:
+    """
+    A function being converted: the frame its closure is built from
+    when it is declared, and the index of each binding it captures.
+
+    Methods start with 'this', then 'super' in a subclass, which the
+    interpreter fills in itself.
+    """
+
+    __slots__ = ("declaration", "outer", "indices", "reserved")
+
+    def __init__(
+        self,
+        declaration: "ast.statements.Function | None",
+        outer: int,
+        reserved: "list[Binding] | None" = None,
+    ):
+        self.declaration = declaration
+        self.outer = outer
+        self.reserved = reserved or []
+        self.indices = {binding: i for i, binding in enumerate(self.reserved)}
+
+
+class ClosureConverter(Walker):
+    """
+    Works out which variables each function captures from the
+    functions it is nested in, so that a closure holds just those, in
+    cells, rather than the whole chain of scopes it was declared in.
+
+    A local captured by a closure is kept in a Cell, which both its
+    own function and the closure share, and its uses are marked CELL.
+    Uses of a captured variable are marked FREE, with the slot of its
+    cell in the closure. A function nested more than one deep takes
+    the cell from the closure of the function it is declared in, which
+    captures it in turn.
+
+    Runs once, on a freshly resolved program, since FREE uses lose the
+    depth the resolver gave them.
+    """
+
+    def __init__(self):
+        self.frames: list["Frame"] = []
+        # the top level is a function of its own, capturing nothing
+        self.functions: list["Closure"] = [Closure(None, -1)]
+
+    def convert(self, program: list["ast.statements.Statement"]):
+        self.walk(program)
+
+    def convert_lazy(
+        self, declaration: "ast.statements.Function", method: bool, subclass: bool
+    ):
+        """
+        Converts a lazily compiled top-level function or method, which
+        can only capture 'this' and 'super'.
+        """
+        if method:
+            self.method(declaration, subclass)
+        else:
+            self.function(declaration)
+
+    def declare(self, stmt: "Declaration"):
+        stmt.captured = False
+
+        if stmt.slot is not None:
+            index = len(self.frames) - 1
+            self.frames[-1].bindings[stmt.slot] = Binding(index, stmt.slot, stmt)
+
+    def function(
+        self,
+        stmt: "ast.statements.Function",
+        outer: int | None = None,
+        reserved: "list[Binding] | None" = None,
+    ):
+        if outer is None:
+            outer = len(self.frames) - 1
+
+        stmt.captures = []
+        stmt.captured_params = []
+
+        closure = Closure(stmt, outer, reserved)
+        self.functions.append(closure)
+
+        frame = Frame(closure)
+        self.frames.append(frame)
+        for i in range(len(stmt.params)):
+            frame.bindings[i] = Binding(len(self.frames) - 1, i)
+
+        if stmt.body.statements is None:
+            self.visit_lazy_body(stmt.body)  # type: ignore
+        else:
+            self.walk(stmt.body.statements)
+
+        self.frames.pop()
+        self.functions.pop()
+
+    def method(self, stmt: "ast.statements.Function", subclass: bool):
+        """
+        Converts a method within the scopes of its class, which the
+        interpreter doesn't allocate.
+        """
+        outer = len(self.frames) - 1
+
+        # scoped as the resolver did, 'super' outside 'this', although
+        # 'this' comes first in the closure
+        for _ in range(2 if subclass else 1):
+            frame = Frame(None)
+            frame.bindings[0] = Binding(len(self.frames), 0)
+            self.frames.append(frame)
+
+        reserved = [frame.bindings[0] for frame in reversed(self.frames[outer + 1 :])]
+        self.function(stmt, outer, reserved)
+
+        del self.frames[outer + 1 :]
+
+    def capture(self, level: int, binding: "Binding") -> int:
+        """
+        Captures a binding in the closure of a function, and all those
+        between it and the binding's own, returning its slot there.
+        """
+        closure = self.functions[level]
+
+        index = closure.indices.get(binding)
+        if index is not None:
+            return index
+
+        assert closure.declaration is not None
+        captures = closure.declaration.captures
+
+        if self.frames[binding.frame].function is self.functions[level - 1]:
+            self.mark_captured(binding)
+            captures.append(
+                (VariableKind.CELL, closure.outer - binding.frame, binding.slot)
+            )
+        else:
+            captures.append((VariableKind.FREE, None, self.capture(level - 1, binding)))
+
+        index = closure.indices[binding] = len(closure.reserved) + len(captures) - 1
+        return index
+
+    def mark_captured(self, binding: "Binding"):
+        if binding.captured:
+            return
+
+        binding.captured = True
+        for node in binding.nodes:
+            node.kind = VariableKind.CELL
+        binding.nodes = []
+
+        frame = self.frames[binding.frame]
+        if binding.declaration is not None:
+            binding.declaration.captured = True
+        elif frame.function is not None:
+            # a parameter
+            declaration = frame.function.declaration
+            assert declaration is not None
+            declaration.captured_params.append(binding.slot)
+
+    def binding_of(self, node: "ast.expressions.Resolvable", depth: int = 0):
+        index = len(self.frames) - 1 - node.depth + depth  # type: ignore
+        slot: int = node.slot  # type: ignore
+
+        binding = self.frames[index].bindings.get(slot)
+        if binding is None:
+            # a slot lox.ssa keeps a value in, which it never declares,
+            # as the frame starts out nil, and nothing can capture
+            binding = self.frames[index].bindings[slot] = Binding(index, slot)
+        return binding
+
+    def use(self, node: "ast.expressions.Resolvable"):
+        if node.kind is not VariableKind.LOCAL:
+            return
+
+        binding = self.binding_of(node)
+
+        if self.frames[binding.frame].function is self.functions[-1]:
+            if binding.captured:
+                node.kind = VariableKind.CELL
+            else:
+                binding.nodes.append(node)
+            return
+
+        node.kind = VariableKind.FREE
+        node.depth = None
+        node.slot = self.capture(len(self.functions) - 1, binding)
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        self.use(expr)
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+        self.use(expr)
+
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        self.use(expr)
+
+    def visit_super_expression(self, expr: "ast.expressions.Super"):
+        if expr.kind is not VariableKind.LOCAL:
+            return
+
+        # 'this' is in the scope just inside that of 'super'
+        this = self.binding_of(expr, depth=1)
+        expr.this_slot = self.capture(len(self.functions) - 1, this)
+        self.use(expr)
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        super().visit_var_statement(stmt)
+        self.declare(stmt)
+
+    def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
+        if stmt.frame_size is None:
+            self.walk(stmt.statements)
+            return
+
+        self.frames.append(Frame(self.functions[-1]))
+        self.walk(stmt.statements)
+        self.frames.pop()
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        self.declare(stmt)
+        self.function(stmt)
+
+    def visit_class_statement(self, stmt: "ast.statements.Class") -> None:
+        self.declare(stmt)
+
+        if stmt.superclass:
+            self.walk_expression(stmt.superclass)
+
+        for method in stmt.methods:
+            self.method(method, stmt.superclass is not None)
+
+
+def convert_closures(program: list["ast.statements.Statement"]) -> None:
+    ClosureConverter().convert(program)
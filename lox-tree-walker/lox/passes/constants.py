@@ -0,0 +1,101 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.lexer import TokenType
+from lox.objects import global_slot
+from lox.passes.walker import Walker
+
+
+class GlobalUses(Walker):
+    """
+    Collects the globals assigned to anywhere in a program, and the
+    calls made through a global variable.
+    """
+
+    def __init__(self):
+        self.assigned: set[str] = set()
+        self.calls: list["ast.expressions.Call"] = []
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        if expr.kind is VariableKind.GLOBAL:
+            self.assigned.add(expr.name.raw)
+
+        super().visit_assignment_expression(expr)
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        callee = expr.callee
+        if (
+            isinstance(callee, ast.expressions.Variable)
+            and callee.kind is VariableKind.GLOBAL
+        ):
+            self.calls.append(expr)
+
+        super().visit_call_expression(expr)
+
+    def visit_lazy_body(self, body: "ast.statements.LazyBlock"):
+        # not resolved yet, so any name assigned to might be a global
+        tokens = body.tokens
+        for i in range(len(tokens) - 1):
+            if (
+                tokens[i].type is TokenType.IDENTIFIER
+                and tokens[i + 1].type is TokenType.EQUAL
+            ):
+                self.assigned.add(tokens[i].raw)
+
+
+def constant_functions(
+    program: list["ast.statements.Statement"], uses: "GlobalUses"
+) -> dict[str, "ast.statements.Function"]:
+    """
+    The globals of a resolved program which are declared once, by a
+    top-level 'fun', and never assigned, so once declared they always
+    hold the same function.
+    """
+    declarations: dict[str, "ast.statements.Function | None"] = {}
+
+    for stmt in program:
+        if isinstance(
+            stmt, (ast.statements.Var, ast.statements.Function, ast.statements.Class)
+        ):
+            name = stmt.name.raw
+
+            if name in declarations or not isinstance(stmt, ast.statements.Function):
+                declarations[name] = None
+            else:
+                declarations[name] = stmt
+
+    return {
+        name: stmt
+        for name, stmt in declarations.items()
+        if stmt is not None and name not in uses.assigned
+    }
+
+
+def devirtualise(program: list["ast.statements.Statement"]) -> None:
+    """
+    Binds calls to constant global functions directly to their
+    declaration, for the interpreter to skip looking up the callee
+    and checking it.
+
+    A call is only bound if it passes the right number of arguments,
+    which settles the arity check up front. Calls which don't are left
+    to fail at runtime as usual, if they are ever made.
+
+    The function is still read from its global slot when called and
+    checked to be the one bound, since before its declaration runs the
+    global is undefined, and a later program run by the same
+    interpreter, e.g. in the REPL, may redefine it.
+    """
+    uses = GlobalUses()
+    uses.walk(program)
+
+    constants = constant_functions(program, uses)
+
+    for call in uses.calls:
+        callee: "ast.expressions.Variable" = call.callee  # type: ignore
+        function = constants.get(callee.name.raw)
+
+        if function is not None and len(function.params) == len(call.arguments):
+            callee.slot = global_slot(callee.name.raw)
+            call.function = function
+        else:
+            call.function = None
@@ -0,0 +1,359 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.lexer import TokenType
+from lox.passes.cfg import ControlFlowGraph, constant_condition
+from lox.passes.walker import Declaration, ScopedWalker, Walker
+
+
+class Eliminated:
+    """
+    How many statements dead code elimination removed, counting those
+    nested in them, by why they were removed.
+    """
+
+    __slots__ = ("unreachable", "branches", "declarations")
+
+    def __init__(self):
+        self.unreachable = 0
+        self.branches = 0
+        self.declarations = 0
+
+    @property
+    def total(self) -> int:
+        return self.unreachable + self.branches + self.declarations
+
+    def __str__(self) -> str:
+        return (
+            f"{self.total} statements removed: {self.unreachable} unreachable, "
+            f"{self.branches} in constant branches, "
+            f"{self.declarations} in unused declarations"
+        )
+
+
+def size(stmt: "ast.statements.Statement") -> int:
+    """
+    The number of statements in a statement, itself included.
+    """
+    # nodes are compared by type, since isinstance is slow for an ABC
+    if type(stmt) is ast.statements.Block:
+        return 1 + sum(size(inner) for inner in stmt.statements)
+    elif type(stmt) is ast.statements.If:
+        otherwise = size(stmt.else_branch) if stmt.else_branch else 0
+        return 1 + size(stmt.then_branch) + otherwise
+    elif type(stmt) is ast.statements.While:
+        return 1 + size(stmt.body)
+    elif type(stmt) is ast.statements.Function:
+        # a lazy body hasn't been parsed into statements yet
+        return 1 + sum(size(inner) for inner in stmt.body.statements or [])
+    elif type(stmt) is ast.statements.Class:
+        return 1 + sum(size(method) for method in stmt.methods)
+
+    return 1
+
+
+def is_pure(expr: "ast.expressions.Expression") -> bool:
+    """
+    Whether evaluating an expression can neither fail nor have any
+    effect. Reading a global might fail, if it isn't defined yet.
+    """
+    if type(expr) in (ast.expressions.Literal, ast.expressions.This):
+        return True
+    elif type(expr) is ast.expressions.Grouping:
+        return is_pure(expr.expr)
+    elif type(expr) is ast.expressions.Logical:
+        return is_pure(expr.left) and is_pure(expr.right)
+    elif type(expr) is ast.expressions.Variable:
+        return expr.kind is VariableKind.LOCAL
+
+    return False
+
+
+def is_removable(declaration: "Declaration") -> bool:
+    """
+    Whether a declaration has no effect besides binding its name.
+    """
+    if type(declaration) is ast.statements.Var:
+        return declaration.initialiser is None or is_pure(declaration.initialiser)
+    elif type(declaration) is ast.statements.Class:
+        # the superclass might not be a class
+        return declaration.superclass is None
+
+    return True
+
+
+class DeadBranches(Walker):
+    """
+    Removes the statements control never reaches, as found by the
+    control flow graph of each function, and replaces ifs and whiles
+    whose condition is constant with the branch they always take.
+    """
+
+    def __init__(self, eliminated: "Eliminated"):
+        self.eliminated = eliminated
+        self.reachable: set["ast.statements.Statement"] = set()
+
+    def body(
+        self, statements: list["ast.statements.Statement"]
+    ) -> list["ast.statements.Statement"]:
+        outer = self.reachable
+        self.reachable = ControlFlowGraph(statements).reachable_statements()
+
+        statements = self.prune(statements)
+
+        self.reachable = outer
+        return statements
+
+    def prune(
+        self, statements: list["ast.statements.Statement"]
+    ) -> list["ast.statements.Statement"]:
+        kept = []
+
+        for stmt in statements:
+            if stmt not in self.reachable:
+                self.eliminated.unreachable += size(stmt)
+                continue
+
+            taken = self.branch(stmt)
+            if taken is not None:
+                taken.accept(self)
+                kept.append(taken)
+
+        return kept
+
+    def branch(
+        self, stmt: "ast.statements.Statement"
+    ) -> "ast.statements.Statement | None":
+        """
+        The statement left in place of one whose condition is
+        constant, or None if nothing is.
+        """
+        if type(stmt) is ast.statements.If:
+            taken = constant_condition(stmt.condition)
+            if taken is None:
+                return stmt
+
+            branch = stmt.then_branch if taken else stmt.else_branch
+            self.eliminated.branches += size(stmt) - (size(branch) if branch else 0)
+
+            return self.branch(branch) if branch else None
+
+        elif type(stmt) is ast.statements.While:
+            if constant_condition(stmt.condition) is False:
+                self.eliminated.branches += size(stmt)
+                return None
+
+        return stmt
+
+    def single(self, stmt: "ast.statements.Statement") -> "ast.statements.Statement":
+        taken = self.branch(stmt)
+
+        if taken is None:
+            # runs in the enclosing scope, so costs nothing
+            taken = ast.statements.Block([])
+            taken.frame_size = None
+
+        taken.accept(self)
+        return taken
+
+    def walk_expression(self, expression: "ast.expressions.Expression"):
+        # expressions hold no statements
+        pass
+
+    def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
+        stmt.statements = self.prune(stmt.statements)
+
+    def visit_if_statement(self, stmt: "ast.statements.If") -> None:
+        stmt.then_branch = self.single(stmt.then_branch)
+
+        if stmt.else_branch:
+            stmt.else_branch = self.single(stmt.else_branch)
+
+    def visit_while_statement(self, stmt: "ast.statements.While") -> None:
+        stmt.body = self.single(stmt.body)
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        if stmt.body.statements is not None:
+            stmt.body.statements = self.body(stmt.body.statements)
+
+
+class DeclarationUses(ScopedWalker):
+    """
+    Collects what each declaration in a program uses, local
+    declarations and the names of globals, and which declarations are
+    live: used by code outside any declaration, or by another live one.
+
+    Uses are put down to the innermost declaration they are made in,
+    so a function which is only used by itself, or by other functions
+    which are never used, isn't live.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # what each declaration uses, and what the rest of the program does
+        self.uses: dict["Declaration | None", set["Declaration | str"]] = {}
+        self.globals: dict[str, list["Declaration"]] = {}
+
+        self.declaring: list["Declaration"] = []
+
+    def live(self) -> set["Declaration"]:
+        live: set["Declaration"] = set()
+        stack: list["Declaration | None"] = [None]
+
+        # declaring these may fail, so they always stay
+        stack.extend(
+            declaration
+            for declaration in self.uses
+            if declaration is not None and not is_removable(declaration)
+        )
+
+        while stack:
+            for used in self.uses.get(stack.pop(), ()):
+                declarations = (
+                    self.globals.get(used, []) if isinstance(used, str) else [used]
+                )
+
+                for declaration in declarations:
+                    if declaration not in live:
+                        live.add(declaration)
+                        stack.append(declaration)
+
+        return live
+
+    def declare(self, stmt: "Declaration"):
+        super().declare(stmt)
+
+        if stmt.slot is None:
+            self.globals.setdefault(stmt.name.raw, []).append(stmt)
+
+    def use(self, used: "Declaration | str"):
+        owner = self.declaring[-1] if self.declaring else None
+        self.uses.setdefault(owner, set()).add(used)
+
+    def use_variable(
+        self, node: "ast.expressions.Variable | ast.expressions.Assignment"
+    ):
+        if node.kind is not VariableKind.LOCAL:
+            self.use(node.name.raw)
+            return
+
+        declaration = self.declaration_of(node)
+        if declaration is not None:
+            self.use(declaration)
+
+    def visit_lazy_body(self, body: "ast.statements.LazyBlock"):
+        # not resolved yet, so any name might be a global
+        for token in body.tokens:
+            if token.type is TokenType.IDENTIFIER:
+                self.use(token.raw)
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        self.use_variable(expr)
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+        self.use_variable(expr)
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        if stmt.initialiser:
+            self.declaring.append(stmt)
+            self.walk_expression(stmt.initialiser)
+            self.declaring.pop()
+
+        self.declare(stmt)
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        self.declare(stmt)
+
+        self.declaring.append(stmt)
+        self.function(stmt)
+        self.declaring.pop()
+
+    def visit_class_statement(self, stmt: "ast.statements.Class") -> None:
+        self.declare(stmt)
+
+        self.declaring.append(stmt)
+        if stmt.superclass:
+            self.walk_expression(stmt.superclass)
+
+        for method in stmt.methods:
+            self.method(method, stmt.superclass is not None)
+        self.declaring.pop()
+
+
+class UnusedDeclarations(Walker):
+    """
+    Removes the declarations of variables, functions and classes which
+    are never used, where declaring them has no other effect.
+    """
+
+    def __init__(self, live: set["Declaration"], eliminated: "Eliminated"):
+        self.live = live
+        self.eliminated = eliminated
+
+    def unused(self, stmt: "ast.statements.Statement") -> bool:
+        return (
+            type(stmt)
+            in (ast.statements.Var, ast.statements.Function, ast.statements.Class)
+            and stmt not in self.live
+            and is_removable(stmt)
+        )
+
+    def prune(
+        self, statements: list["ast.statements.Statement"]
+    ) -> list["ast.statements.Statement"]:
+        kept = []
+
+        for stmt in statements:
+            if self.unused(stmt):
+                self.eliminated.declarations += size(stmt)
+            else:
+                stmt.accept(self)
+                kept.append(stmt)
+
+        return kept
+
+    def walk_expression(self, expression: "ast.expressions.Expression"):
+        # expressions hold no statements
+        pass
+
+    def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
+        stmt.statements = self.prune(stmt.statements)
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        if stmt.body.statements is not None:
+            stmt.body.statements = self.prune(stmt.body.statements)
+
+
+def remove_unused_declarations(
+    program: list["ast.statements.Statement"], eliminated: "Eliminated"
+):
+    uses = DeclarationUses()
+    uses.walk(program)
+
+    program[:] = UnusedDeclarations(uses.live(), eliminated).prune(program)
+
+
+def eliminate_dead_code(program: list["ast.statements.Statement"]) -> "Eliminated":
+    """
+    Removes unreachable statements, branches constant conditions never
+    take and unused declarations from a resolved program, in place.
+
+    A global declared but never used in the program is removed too, so
+    this is only for programs run on their own, rather than, e.g., by
+    the REPL, where a later line might use it.
+
+    A declaration only used by declarations which are themselves
+    unused is removed along with them. Those go first, so that only
+    what is left needs a control flow graph, and then again any that
+    were only used in code since found to be dead.
+    """
+    eliminated = Eliminated()
+    remove_unused_declarations(program, eliminated)
+
+    removed = eliminated.total
+    program[:] = DeadBranches(eliminated).body(program)
+
+    if eliminated.total > removed:
+        remove_unused_declarations(program, eliminated)
+
+    return eliminated
@@ -0,0 +1,192 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.errors import RuntimeError
+from lox.lexer import TokenType
+from lox.passes.walker import Declaration, ScopedWalker
+
+
+class LocalAssignments(ScopedWalker):
+    """
+    Collects the local variables assigned to anywhere in a program.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.assigned: set["Declaration"] = set()
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+
+        if expr.kind is VariableKind.LOCAL:
+            declaration = self.declaration_of(expr)
+            if declaration is not None:
+                self.assigned.add(declaration)
+
+
+class ConstantFolder(ScopedWalker):
+    """
+    Replaces expressions whose operands are all constants with their
+    value, and uses of local variables which are never assigned after
+    being initialised to a constant with that constant.
+
+    Each visit of an expression returns the expression to replace it
+    with, which may be itself.
+
+    An operation is folded by running it on the interpreter, so the
+    result is exactly what it would have been at runtime. One which
+    fails, e.g. adding a number to a string, is left in place to fail
+    when it runs, with the same error as before.
+
+    Globals are never propagated, since a function of a program run
+    before by the same interpreter, e.g. in the REPL, may assign them.
+    """
+
+    def __init__(self, assigned: set["Declaration"]):
+        from lox.interpreter import Interpreter
+
+        super().__init__()
+        self.assigned = assigned
+        self.interpreter = Interpreter()
+
+    def fold(self, expr: "ast.expressions.Expression") -> "ast.expressions.Expression":
+        return expr.accept(self)
+
+    def evaluate(
+        self, expr: "ast.expressions.Expression"
+    ) -> "ast.expressions.Expression":
+        try:
+            return ast.expressions.Literal(self.interpreter.evaluate(expr))
+        except (RuntimeError, ArithmeticError):
+            return expr
+
+    def visit_unary_expression(self, expr: "ast.expressions.Unary"):
+        expr.right = self.fold(expr.right)
+
+        if isinstance(expr.right, ast.expressions.Literal):
+            return self.evaluate(expr)
+        return expr
+
+    def visit_literal_expression(self, expr: "ast.expressions.Literal"):
+        return expr
+
+    def visit_grouping_expression(self, expr: "ast.expressions.Grouping"):
+        expr.expr = self.fold(expr.expr)
+
+        if isinstance(expr.expr, ast.expressions.Literal):
+            return expr.expr
+        return expr
+
+    def visit_binary_expression(self, expr: "ast.expressions.Binary"):
+        expr.left = self.fold(expr.left)
+        expr.right = self.fold(expr.right)
+
+        if isinstance(expr.left, ast.expressions.Literal) and isinstance(
+            expr.right, ast.expressions.Literal
+        ):
+            return self.evaluate(expr)
+        return expr
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        if expr.kind is not VariableKind.LOCAL:
+            return expr
+
+        declaration = self.declaration_of(expr)
+        if (
+            not isinstance(declaration, ast.statements.Var)
+            or declaration in self.assigned
+        ):
+            return expr
+
+        if declaration.initialiser is None:
+            return ast.expressions.Literal(None)
+        elif isinstance(declaration.initialiser, ast.expressions.Literal):
+            return ast.expressions.Literal(declaration.initialiser.value)
+
+        return expr
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        expr.value = self.fold(expr.value)
+        return expr
+
+    def visit_logical_expression(self, expr: "ast.expressions.Logical"):
+        expr.left = self.fold(expr.left)
+        expr.right = self.fold(expr.right)
+
+        if not isinstance(expr.left, ast.expressions.Literal):
+            return expr
+
+        # the left operand decides whether the right one is evaluated
+        truthy = self.interpreter.is_truthy(expr.left.value)
+        if truthy is (expr.token.type == TokenType.OR):
+            return expr.left
+        return expr.right
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        expr.callee = self.fold(expr.callee)
+        expr.arguments = [self.fold(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_get_expression(self, expr: "ast.expressions.Get"):
+        expr.object = self.fold(expr.object)
+        return expr
+
+    def visit_set_expression(self, expr: "ast.expressions.Set"):
+        expr.object = self.fold(expr.object)
+        expr.value = self.fold(expr.value)
+        return expr
+
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        return expr
+
+    def visit_super_expression(self, expr: "ast.expressions.Super"):
+        return expr
+
+    def visit_expression_statement(self, stmt: "ast.statements.Expression") -> None:
+        stmt.expr = self.fold(stmt.expr)
+
+    def visit_print_statement(self, stmt: "ast.statements.Print") -> None:
+        stmt.expr = self.fold(stmt.expr)
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        if stmt.initialiser:
+            stmt.initialiser = self.fold(stmt.initialiser)
+
+        self.declare(stmt)
+
+    def visit_if_statement(self, stmt: "ast.statements.If") -> None:
+        stmt.condition = self.fold(stmt.condition)
+        stmt.then_branch.accept(self)
+
+        if stmt.else_branch:
+            stmt.else_branch.accept(self)
+
+    def visit_while_statement(self, stmt: "ast.statements.While") -> None:
+        stmt.condition = self.fold(stmt.condition)
+        stmt.body.accept(self)
+
+    def visit_return_statement(self, stmt: "ast.statements.Return") -> None:
+        if stmt.value:
+            stmt.value = self.fold(stmt.value)
+
+    def visit_class_statement(self, stmt: "ast.statements.Class") -> None:
+        self.declare(stmt)
+
+        # the superclass is only ever a variable, checked when it runs
+        for method in stmt.methods:
+            self.method(method, stmt.superclass is not None)
+
+
+def fold_constants(program: list["ast.statements.Statement"]) -> None:
+    assignments = LocalAssignments()
+    assignments.walk(program)
+
+    ConstantFolder(assignments.assigned).walk(program)
+
+
+def fold_lazy(
+    declaration: "ast.statements.Function", method: bool, subclass: bool
+) -> None:
+    assignments = LocalAssignments()
+    assignments.walk_lazy(declaration, method, subclass)
+
+    ConstantFolder(assignments.assigned).walk_lazy(declaration, method, subclass)
@@ -0,0 +1,274 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.passes.walker import Walker
+from lox.visitors import ExpressionVisitor
+
+# the most nodes the expression a function returns may have to be
+# inlined, counted after calls in it are themselves inlined
+BUDGET = 16
+
+
+class ExpressionSize(Walker):
+    def __init__(self):
+        self.nodes = 0
+
+    def walk_expression(self, expression: "ast.expressions.Expression"):
+        self.nodes += 1
+        super().walk_expression(expression)
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        super().visit_call_expression(expr)
+
+        if expr.inlined is not None:
+            self.walk_expression(expr.inlined)
+
+
+def size(expr: "ast.expressions.Expression") -> int:
+    counter = ExpressionSize()
+    counter.walk_expression(expr)
+    return counter.nodes
+
+
+def returned(
+    function: "ast.statements.Function",
+) -> "ast.expressions.Expression | None":
+    """
+    The expression a function returns, if that is all its body does.
+    """
+    statements = function.body.statements
+    if statements is None or len(statements) != 1:
+        return None
+
+    stmt = statements[0]
+    if type(stmt) is not ast.statements.Return or stmt.value is None:
+        return None
+    return stmt.value
+
+
+class Callees(Walker):
+    """
+    Collects the calls in an expression bound to a function, and
+    whether it uses anything only the function itself can reach:
+    'this', 'super' or a captured variable.
+    """
+
+    def __init__(self):
+        self.calls: list["ast.expressions.Call"] = []
+        self.enclosed = False
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        if expr.kind not in (VariableKind.LOCAL, VariableKind.GLOBAL):
+            self.enclosed = True
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+        self.visit_variable_expression(expr)  # type: ignore
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        super().visit_call_expression(expr)
+
+        if expr.function is not None:
+            self.calls.append(expr)
+
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        self.enclosed = True
+
+    def visit_super_expression(self, expr: "ast.expressions.Super"):
+        self.enclosed = True
+
+
+class Renamer(ExpressionVisitor):
+    """
+    Copies the expression an inlined function returns, moving the
+    slots of its frame to those given in the caller's.
+    """
+
+    def __init__(self, slots: list[int]):
+        self.slots = slots
+
+    def copy(self, expr: "ast.expressions.Expression") -> "ast.expressions.Expression":
+        return expr.accept(self)
+
+    def visit_unary_expression(self, expr: "ast.expressions.Unary"):
+        return ast.expressions.Unary(expr.operator, self.copy(expr.right))
+
+    def visit_literal_expression(self, expr: "ast.expressions.Literal"):
+        return ast.expressions.Literal(expr.value)
+
+    def visit_grouping_expression(self, expr: "ast.expressions.Grouping"):
+        return ast.expressions.Grouping(self.copy(expr.expr))
+
+    def visit_binary_expression(self, expr: "ast.expressions.Binary"):
+        return ast.expressions.Binary(
+            self.copy(expr.left), expr.token, self.copy(expr.right)
+        )
+
+    def rename(
+        self,
+        copy: "ast.expressions.Variable | ast.expressions.Assignment",
+        expr: "ast.expressions.Variable | ast.expressions.Assignment",
+    ):
+        copy.kind = expr.kind
+        copy.depth = expr.depth
+        copy.slot = expr.slot
+
+        if expr.kind is VariableKind.LOCAL:
+            copy.slot = self.slots[expr.slot]  # type: ignore
+        return copy
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        return self.rename(ast.expressions.Variable(expr.name), expr)
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        copy = ast.expressions.Assignment(expr.name, self.copy(expr.value))
+        return self.rename(copy, expr)
+
+    def visit_logical_expression(self, expr: "ast.expressions.Logical"):
+        return ast.expressions.Logical(
+            self.copy(expr.left), expr.token, self.copy(expr.right)
+        )
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        copy = ast.expressions.Call(
+            self.copy(expr.callee),
+            expr.paren,
+            [self.copy(argument) for argument in expr.arguments],
+        )
+        copy.function = expr.function
+
+        if expr.inlined is not None:
+            copy.inlined = self.copy(expr.inlined)
+            copy.parameters = [self.slots[slot] for slot in expr.parameters]
+
+        return copy
+
+    def visit_get_expression(self, expr: "ast.expressions.Get"):
+        return ast.expressions.Get(self.copy(expr.object), expr.name)
+
+    def visit_set_expression(self, expr: "ast.expressions.Set"):
+        return ast.expressions.Set(
+            self.copy(expr.object), expr.name, self.copy(expr.value)
+        )
+
+    # Callees marks functions using these as enclosed, so they are
+    # never inlined
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        raise AssertionError("'this' is never inlined")
+
+    def visit_super_expression(self, expr: "ast.expressions.Super"):
+        raise AssertionError("'super' is never inlined")
+
+
+class Inliner(Walker):
+    """
+    Inlines calls to small functions into the functions calling them:
+    constant global functions, bound to their calls by devirtualise,
+    whose body only returns an expression of at most BUDGET nodes and
+    which never end up calling themselves.
+
+    An inlined call keeps its arguments, which are evaluated into
+    fresh slots of the caller's frame, and a copy of the expression
+    with the function's own slots renamed to those, so they can't
+    clash with the caller's variables. The interpreter evaluates that
+    in place of calling the function, once it has checked the global
+    still holds it, as for any bound call. Calls at the top level,
+    where there is no frame, are left alone.
+
+    Functions are inlined into those calling them first, so a small
+    function built from others is inlined whole, as long as the
+    result is still within budget.
+    """
+
+    def __init__(self):
+        # the expression each function which can be inlined returns
+        self.inlinable: dict[
+            "ast.statements.Function", "ast.expressions.Expression"
+        ] = {}
+        # functions whose calls have been inlined, or are being
+        self.visited: set["ast.statements.Function"] = set()
+        self.active: list["ast.statements.Function"] = []
+        self.recursive: set["ast.statements.Function"] = set()
+
+        # the blocks the frames are for, from the innermost
+        self.blocks: list["ast.statements.Block"] = []
+
+    def visit(self, function: "ast.statements.Function"):
+        """
+        Inlines calls in a function's body, first deciding whether the
+        functions they call can be.
+        """
+        if function in self.active:
+            # every function in the cycle ends up calling itself
+            self.recursive.update(self.active[self.active.index(function) :])
+            return
+        elif function in self.visited or function.body.statements is None:
+            return
+
+        self.visited.add(function)
+        self.active.append(function)
+        self.blocks.append(function.body)
+
+        self.walk(function.body.statements)
+
+        self.blocks.pop()
+        self.active.pop()
+
+        expr = returned(function)
+        if expr is None or function in self.recursive:
+            return
+
+        callees = Callees()
+        callees.walk_expression(expr)
+
+        if (
+            not callees.enclosed
+            and not function.captured_params
+            and all(call.function not in self.recursive for call in callees.calls)
+            and size(expr) <= BUDGET
+        ):
+            self.inlinable[function] = expr
+
+    def inline(self, call: "ast.expressions.Call"):
+        function: "ast.statements.Function" = call.function  # type: ignore
+        block = self.blocks[-1]
+
+        start: int = block.frame_size  # type: ignore
+        block.frame_size = start + function.body.frame_size  # type: ignore
+        slots = list(range(start, block.frame_size))
+
+        call.inlined = Renamer(slots).copy(self.inlinable[function])
+        call.parameters = slots[: len(function.params)]
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        super().visit_call_expression(expr)
+
+        if expr.function is None:
+            return
+
+        self.visit(expr.function)
+        if expr.function in self.inlinable and self.blocks:
+            self.inline(expr)
+
+    def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
+        if stmt.frame_size is None:
+            self.walk(stmt.statements)
+            return
+
+        self.blocks.append(stmt)
+        self.walk(stmt.statements)
+        self.blocks.pop()
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        # another function's frame
+        blocks = self.blocks
+        self.blocks = []
+        self.visit(stmt)
+        self.blocks = blocks
+
+
+def inline_functions(program: list["ast.statements.Statement"]) -> None:
+    """
+    Inlines calls to small functions, once devirtualise has bound the
+    calls to constant global functions.
+    """
+    Inliner().walk(program)
@@ -0,0 +1,925 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.lexer import Token, TokenType
+from lox.passes.walker import Declaration, ScopedWalker, Walker
+
+# the name of the locals loops are given, which are never looked up by
+# name, so can't clash with one in the program
+TEMPORARY = Token(TokenType.IDENTIFIER, "loop temporary", 0)
+STAR = Token(TokenType.STAR, "*", 0)
+PLUS = Token(TokenType.PLUS, "+", 0)
+
+# the largest constant strength reduction works with, keeping induction
+# variables to small integers, which floats add exactly
+LARGEST = 2.0**20
+
+# the nodes updating a strength reduced variable costs each iteration
+UPDATE_COST = 5
+
+# what a local variable is bound by, its declaration or a parameter
+Binding = "Declaration | Token"
+
+
+def nodes(expr: "ast.expressions.Expression") -> int:
+    """
+    The number of nodes the interpreter visits to evaluate an
+    expression with no calls in it.
+    """
+    if type(expr) in (ast.expressions.Binary, ast.expressions.Logical):
+        return 1 + nodes(expr.left) + nodes(expr.right)  # type: ignore
+    elif type(expr) is ast.expressions.Unary:
+        return 1 + nodes(expr.right)  # type: ignore
+    elif type(expr) is ast.expressions.Grouping:
+        return 1 + nodes(expr.expr)  # type: ignore
+
+    return 1
+
+
+def small_integer(expr: "ast.expressions.Expression") -> float | None:
+    if (
+        type(expr) is ast.expressions.Literal
+        and type(expr.value) is float
+        and expr.value.is_integer()
+        and abs(expr.value) <= LARGEST
+    ):
+        return expr.value
+
+    return None
+
+
+def is_trivial(expr: "ast.expressions.Expression") -> bool:
+    # no cheaper to read from a temporary
+    return type(expr) in (
+        ast.expressions.Literal,
+        ast.expressions.Variable,
+        ast.expressions.This,
+    )
+
+
+def temporary(depth: int, slot: int) -> "ast.expressions.Variable":
+    variable = ast.expressions.Variable(TEMPORARY)
+    variable.kind = VariableKind.LOCAL
+    variable.depth = depth
+    variable.slot = slot
+    return variable
+
+
+class LocalValues(ScopedWalker):
+    """
+    Collects every value each local variable of a program is given,
+    and which of them are assigned by a function other than their own,
+    which a call anywhere might run.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.values: dict["Binding", list["ast.expressions.Expression"]] = {}
+        self.escaping: set["Binding"] = set()
+        # the binding each local variable read is of
+        self.resolved: dict["ast.expressions.Variable", "Binding"] = {}
+
+        self.owners: dict["Binding", "ast.statements.Function | None"] = {}
+        self.functions: list["ast.statements.Function | None"] = [None]
+
+    def declare(self, stmt: "Declaration"):
+        super().declare(stmt)
+        self.owners[stmt] = self.functions[-1]
+
+        if type(stmt) is ast.statements.Var:
+            self.values[stmt] = [stmt.initialiser or ast.expressions.Literal(None)]
+
+    def function(self, stmt: "ast.statements.Function"):
+        for param in stmt.params:
+            self.owners[param] = stmt
+
+        self.functions.append(stmt)
+        super().function(stmt)
+        self.functions.pop()
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        if expr.kind is VariableKind.LOCAL:
+            binding = self.declaration_of(expr)
+            if binding is not None:
+                self.resolved[expr] = binding
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+
+        if expr.kind is not VariableKind.LOCAL:
+            return
+
+        binding = self.declaration_of(expr)
+        if binding is not None:
+            self.values.setdefault(binding, []).append(expr.value)
+
+            if self.owners.get(binding) is not self.functions[-1]:
+                self.escaping.add(binding)
+
+    def numbers(self) -> set["Binding"]:
+        """
+        The variables which only ever hold numbers, found by assuming
+        all of them do and ruling out those given anything else.
+        """
+        numbers = {
+            binding for binding in self.values if type(binding) is ast.statements.Var
+        }
+
+        def is_number(expr: "ast.expressions.Expression") -> bool:
+            # the value of an operation which didn't fail
+            match expr:
+                case ast.expressions.Literal():
+                    return type(expr.value) is float
+                case ast.expressions.Grouping():
+                    return is_number(expr.expr)
+                case ast.expressions.Unary():
+                    return expr.operator.type is TokenType.MINUS
+                case ast.expressions.Binary():
+                    if expr.token.type is TokenType.PLUS:
+                        return is_number(expr.left) and is_number(expr.right)
+                    return expr.token.type in (
+                        TokenType.MINUS,
+                        TokenType.STAR,
+                        TokenType.SLASH,
+                    )
+                case ast.expressions.Assignment():
+                    return is_number(expr.value)
+                case ast.expressions.Variable():
+                    return self.resolved.get(expr) in numbers
+
+            return False
+
+        changed = True
+        while changed:
+            changed = False
+
+            for binding in list(numbers):
+                if not all(is_number(value) for value in self.values[binding]):
+                    numbers.discard(binding)
+                    changed = True
+
+        return numbers
+
+    def is_counter(self, binding: "Binding") -> bool:
+        """
+        Whether a variable is only ever given small integers, by its
+        initialiser and by adding or subtracting them from itself.
+        """
+        if type(binding) is not ast.statements.Var or binding in self.escaping:
+            return False
+
+        for value in self.values[binding]:
+            if small_integer(value) is not None:
+                continue
+            if (
+                type(value) is ast.expressions.Binary
+                and value.token.type in (TokenType.PLUS, TokenType.MINUS)
+                and self.resolved.get(value.left) is binding  # type: ignore
+                and small_integer(value.right) is not None
+            ):
+                continue
+            return False
+
+        return True
+
+
+class ScopedLoopWalker(ScopedWalker):
+    """
+    Walks a loop within the scopes it is in, skipping the bodies of
+    functions declared in it, which only run if called.
+    """
+
+    def __init__(self, frames: list[dict[int, "Binding"]]):
+        super().__init__()
+        self.frames = [dict(frame) for frame in frames]
+        self.base = len(frames)
+
+    def walk_loop(self, stmt: "ast.statements.While"):
+        self.walk_expression(stmt.condition)
+        stmt.body.accept(self)
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        self.declare(stmt)
+
+    def visit_class_statement(self, stmt: "ast.statements.Class") -> None:
+        self.declare(stmt)
+
+
+class LoopEffects(ScopedLoopWalker):
+    """
+    What running a loop might change: how many times it assigns each
+    local, and whether it calls anything or sets any field.
+    """
+
+    def __init__(self, frames: list[dict[int, "Binding"]]):
+        super().__init__(frames)
+        self.assigned: dict["Binding", int] = {}
+        self.calls = False
+        self.sets = False
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+
+        if expr.kind is VariableKind.LOCAL:
+            binding = self.declaration_of(expr)
+            if binding is not None:
+                self.assigned[binding] = self.assigned.get(binding, 0) + 1
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        self.calls = True
+        super().visit_call_expression(expr)
+
+    def visit_set_expression(self, expr: "ast.expressions.Set"):
+        self.sets = True
+        super().visit_set_expression(expr)
+
+
+class Rebase(Walker):
+    """
+    Moves the local variables of an expression out of scopes it was
+    nested in.
+    """
+
+    def __init__(self, scopes: int):
+        self.scopes = scopes
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        if expr.kind is VariableKind.LOCAL:
+            expr.depth -= self.scopes  # type: ignore
+
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        expr.depth -= self.scopes  # type: ignore
+
+
+class Hoister(ScopedLoopWalker):
+    """
+    Replaces the expressions of a loop which always evaluate to the
+    same value, and are worth keeping, with temporaries declared before
+    the loop.
+
+    An expression is invariant if it only reads locals which the loop
+    doesn't assign, nor any function other than their own might, and
+    fields only if the loop neither calls anything nor sets any.
+
+    Since a hoisted expression is evaluated even if the loop never runs,
+    it must also be one which can't fail, e.g. arithmetic on variables
+    known to only hold numbers. The exception is one evaluated before
+    anything else in the condition, which would fail just the same the
+    first time the condition is checked.
+    """
+
+    def __init__(
+        self,
+        frames: list[dict[int, "Binding"]],
+        effects: "LoopEffects",
+        values: "LocalValues",
+        numbers: set["Binding"],
+        allocate,
+    ):
+        super().__init__(frames)
+        self.effects = effects
+        self.escaping = values.escaping
+        self.numbers = numbers
+        self.allocate = allocate
+
+        self.hoisted: list["ast.statements.Var"] = []
+        self.slots: dict[tuple, int] = {}
+        self.inside: set["Binding"] = set()
+
+        # what is known of each expression visited
+        self.invariant: set["ast.expressions.Expression"] = set()
+        self.safe: set["ast.expressions.Expression"] = set()
+        self.number: set["ast.expressions.Expression"] = set()
+        self.hoistable: set["ast.expressions.Expression"] = set()
+
+        # whether nothing which could fail has been evaluated yet
+        self.leading = False
+
+    def walk_loop(self, stmt: "ast.statements.While"):
+        self.leading = True
+        stmt.condition = self.root(stmt.condition)
+        self.leading = False
+
+        stmt.body.accept(self)
+
+    def declare(self, stmt: "Declaration"):
+        super().declare(stmt)
+        self.inside.add(stmt)
+
+    def hoist(self, expr: "ast.expressions.Expression") -> "ast.expressions.Variable":
+        depth = len(self.frames) - self.base
+
+        # the same expression hoisted twice shares a temporary
+        key = self.key(expr)
+        slot = self.slots.get(key)
+
+        if slot is None:
+            Rebase(depth).walk_expression(expr)
+
+            stmt = ast.statements.Var(TEMPORARY, expr)
+            stmt.slot = slot = self.allocate()
+            self.hoisted.append(stmt)
+
+            if key is not None:
+                self.slots[key] = slot
+
+        return temporary(depth, slot)  # type: ignore
+
+    def key(self, expr: "ast.expressions.Expression") -> tuple | None:
+        """
+        What an invariant expression evaluates, to tell when two are
+        the same, or None if that isn't worth finding out.
+        """
+        if type(expr) is ast.expressions.Literal:
+            # repr tells 0 from -0, and 1 from true, where == doesn't
+            return (ast.expressions.Literal, repr(expr.value))
+        elif type(expr) is ast.expressions.Variable:
+            return (self.declaration_of(expr),)
+        elif type(expr) is ast.expressions.This:
+            return (TokenType.THIS,)
+        elif type(expr) is ast.expressions.Grouping:
+            return self.key(expr.expr)
+        elif type(expr) is ast.expressions.Unary:
+            right = self.key(expr.right)
+            return None if right is None else (expr.operator.type, right)
+        elif type(expr) in (ast.expressions.Binary, ast.expressions.Logical):
+            left = self.key(expr.left)  # type: ignore
+            right = self.key(expr.right)  # type: ignore
+            if left is None or right is None:
+                return None
+            return (expr.token.type, left, right)  # type: ignore
+        elif type(expr) is ast.expressions.Get:
+            object = self.key(expr.object)
+            return None if object is None else (TokenType.DOT, object, expr.name.raw)
+
+        return None
+
+    def root(self, expr: "ast.expressions.Expression") -> "ast.expressions.Expression":
+        expr = self.expression(expr)
+
+        if expr in self.hoistable and not is_trivial(expr):
+            return self.hoist(expr)
+        return expr
+
+    def expression(
+        self, expr: "ast.expressions.Expression"
+    ) -> "ast.expressions.Expression":
+        leading = self.leading
+        expr.accept(self)
+
+        if expr in self.invariant and (leading or expr in self.safe):
+            self.hoistable.add(expr)
+        else:
+            # hoist the largest parts which are
+            self.hoist_operands(expr)
+
+        self.leading = leading and expr in self.safe
+        return expr
+
+    def hoist_operands(self, expr: "ast.expressions.Expression"):
+        for name in ("left", "right", "expr", "callee", "object", "value"):
+            operand = getattr(expr, name, None)
+            if operand in self.hoistable and not is_trivial(operand):
+                setattr(expr, name, self.hoist(operand))
+
+        if type(expr) is ast.expressions.Call:
+            expr.arguments = [
+                self.hoist(argument)
+                if argument in self.hoistable and not is_trivial(argument)
+                else argument
+                for argument in expr.arguments
+            ]
+
+    def visit_literal_expression(self, expr: "ast.expressions.Literal"):
+        self.invariant.add(expr)
+        self.safe.add(expr)
+
+        if type(expr.value) is float:
+            self.number.add(expr)
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        if expr.kind is not VariableKind.LOCAL:
+            return
+
+        # reading a local never fails
+        self.safe.add(expr)
+
+        binding = self.declaration_of(expr)
+        if binding is None:
+            return
+
+        if (
+            binding not in self.inside
+            and binding not in self.effects.assigned
+            and binding not in self.escaping
+        ):
+            self.invariant.add(expr)
+
+        if binding in self.numbers:
+            self.number.add(expr)
+
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        self.invariant.add(expr)
+        self.safe.add(expr)
+
+    def visit_grouping_expression(self, expr: "ast.expressions.Grouping"):
+        self.expression(expr.expr)
+
+        for known in (self.invariant, self.safe, self.number):
+            if expr.expr in known:
+                known.add(expr)
+
+    def visit_unary_expression(self, expr: "ast.expressions.Unary"):
+        right = self.expression(expr.right)
+
+        if right in self.invariant:
+            self.invariant.add(expr)
+
+        if expr.operator.type is TokenType.BANG:
+            if right in self.safe:
+                self.safe.add(expr)
+        else:
+            self.number.add(expr)
+            if right in self.safe and right in self.number:
+                self.safe.add(expr)
+
+    def visit_binary_expression(self, expr: "ast.expressions.Binary"):
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+
+        if left in self.invariant and right in self.invariant:
+            self.invariant.add(expr)
+
+        numbers = left in self.number and right in self.number
+        type = expr.token.type
+
+        if type in (TokenType.MINUS, TokenType.STAR, TokenType.SLASH):
+            self.number.add(expr)
+        elif type is TokenType.PLUS and numbers:
+            self.number.add(expr)
+
+        if left not in self.safe or right not in self.safe:
+            return
+
+        if type in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+            self.safe.add(expr)
+        elif type is TokenType.SLASH:
+            # dividing by zero fails
+            if numbers and small_integer(right) not in (None, 0):
+                self.safe.add(expr)
+        elif numbers:
+            self.safe.add(expr)
+
+    def visit_logical_expression(self, expr: "ast.expressions.Logical"):
+        left = self.expression(expr.left)
+
+        # might not be evaluated at all
+        self.leading = False
+        right = self.expression(expr.right)
+
+        for known in (self.invariant, self.safe, self.number):
+            if left in known and right in known:
+                known.add(expr)
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        self.expression(expr.callee)
+
+        for argument in expr.arguments:
+            self.expression(argument)
+
+    def visit_get_expression(self, expr: "ast.expressions.Get"):
+        object = self.expression(expr.object)
+
+        if (
+            object in self.invariant
+            and not self.effects.calls
+            and not self.effects.sets
+        ):
+            self.invariant.add(expr)
+
+    def visit_set_expression(self, expr: "ast.expressions.Set"):
+        self.expression(expr.object)
+        self.expression(expr.value)
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        self.expression(expr.value)
+
+    def visit_super_expression(self, expr: "ast.expressions.Super"):
+        pass
+
+    def visit_expression_statement(self, stmt: "ast.statements.Expression") -> None:
+        stmt.expr = self.root(stmt.expr)
+
+    def visit_print_statement(self, stmt: "ast.statements.Print") -> None:
+        stmt.expr = self.root(stmt.expr)
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        if stmt.initialiser:
+            stmt.initialiser = self.root(stmt.initialiser)
+
+        self.declare(stmt)
+
+    def visit_if_statement(self, stmt: "ast.statements.If") -> None:
+        stmt.condition = self.root(stmt.condition)
+        stmt.then_branch.accept(self)
+
+        if stmt.else_branch:
+            stmt.else_branch.accept(self)
+
+    def visit_while_statement(self, stmt: "ast.statements.While") -> None:
+        stmt.condition = self.root(stmt.condition)
+        stmt.body.accept(self)
+
+    def visit_return_statement(self, stmt: "ast.statements.Return") -> None:
+        if stmt.value:
+            stmt.value = self.root(stmt.value)
+
+
+class Reducer(ScopedLoopWalker):
+    """
+    Finds, and then replaces, multiples of induction variables in a
+    loop, i * c or i * c + d for constants c and d.
+    """
+
+    def __init__(
+        self,
+        frames: list[dict[int, "Binding"]],
+        counters: set["Binding"],
+        chosen: "dict[tuple, int] | None" = None,
+    ):
+        super().__init__(frames)
+        self.counters = counters
+
+        # the multiples found, and how many times
+        self.found: dict[tuple, tuple["ast.expressions.Binary", int]] = {}
+        # the temporary's slot for each multiple to replace
+        self.chosen = chosen
+
+    def product(self, expr: "ast.expressions.Expression") -> tuple | None:
+        if type(expr) is not ast.expressions.Binary:
+            return None
+        if expr.token.type is not TokenType.STAR:
+            return None
+
+        for variable, constant in ((expr.left, expr.right), (expr.right, expr.left)):
+            factor = small_integer(constant)
+            if (
+                factor is not None
+                and type(variable) is ast.expressions.Variable
+                and variable.kind is VariableKind.LOCAL
+            ):
+                binding = self.declaration_of(variable)
+                if binding in self.counters:
+                    return binding, factor
+
+        return None
+
+    def multiple(self, expr: "ast.expressions.Expression") -> tuple | None:
+        """
+        The induction variable, factor and offset of a multiple.
+        """
+        product = self.product(expr)
+        if product is not None:
+            return *product, 0.0
+
+        if type(expr) is not ast.expressions.Binary or expr.token.type not in (
+            TokenType.PLUS,
+            TokenType.MINUS,
+        ):
+            return None
+
+        candidates = [(expr.left, expr.right, 1)]
+        if expr.token.type is TokenType.PLUS:
+            candidates.append((expr.right, expr.left, 1))
+        else:
+            candidates[0] = (expr.left, expr.right, -1)
+
+        for operand, constant, sign in candidates:
+            offset = small_integer(constant)
+            product = self.product(operand)
+            # adding 0 or -0 can be told apart, if the product is -0
+            if offset and product is not None:
+                return *product, sign * offset
+
+        return None
+
+    def reduce(
+        self, expr: "ast.expressions.Expression"
+    ) -> "ast.expressions.Expression":
+        multiple = self.multiple(expr)
+
+        if multiple is None:
+            expr.accept(self)
+            return expr
+
+        if self.chosen is None:
+            _, uses = self.found.get(multiple, (expr, 0))
+            self.found[multiple] = (expr, uses + 1)  # type: ignore
+            return expr
+
+        slot = self.chosen.get(multiple)
+        if slot is None:
+            return expr
+        return temporary(len(self.frames) - self.base, slot)
+
+    def walk_loop(self, stmt: "ast.statements.While"):
+        stmt.condition = self.reduce(stmt.condition)
+        stmt.body.accept(self)
+
+    def visit_unary_expression(self, expr: "ast.expressions.Unary"):
+        expr.right = self.reduce(expr.right)
+
+    def visit_grouping_expression(self, expr: "ast.expressions.Grouping"):
+        expr.expr = self.reduce(expr.expr)
+
+    def visit_binary_expression(self, expr: "ast.expressions.Binary"):
+        expr.left = self.reduce(expr.left)
+        expr.right = self.reduce(expr.right)
+
+    def visit_logical_expression(self, expr: "ast.expressions.Logical"):
+        expr.left = self.reduce(expr.left)
+        expr.right = self.reduce(expr.right)
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        expr.callee = self.reduce(expr.callee)
+        expr.arguments = [self.reduce(argument) for argument in expr.arguments]
+
+    def visit_get_expression(self, expr: "ast.expressions.Get"):
+        expr.object = self.reduce(expr.object)
+
+    def visit_set_expression(self, expr: "ast.expressions.Set"):
+        expr.object = self.reduce(expr.object)
+        expr.value = self.reduce(expr.value)
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        expr.value = self.reduce(expr.value)
+
+    def visit_expression_statement(self, stmt: "ast.statements.Expression") -> None:
+        stmt.expr = self.reduce(stmt.expr)
+
+    def visit_print_statement(self, stmt: "ast.statements.Print") -> None:
+        stmt.expr = self.reduce(stmt.expr)
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        if stmt.initialiser:
+            stmt.initialiser = self.reduce(stmt.initialiser)
+
+        self.declare(stmt)
+
+    def visit_if_statement(self, stmt: "ast.statements.If") -> None:
+        stmt.condition = self.reduce(stmt.condition)
+        stmt.then_branch.accept(self)
+
+        if stmt.else_branch:
+            stmt.else_branch.accept(self)
+
+    def visit_while_statement(self, stmt: "ast.statements.While") -> None:
+        stmt.condition = self.reduce(stmt.condition)
+        stmt.body.accept(self)
+
+    def visit_return_statement(self, stmt: "ast.statements.Return") -> None:
+        if stmt.value:
+            stmt.value = self.reduce(stmt.value)
+
+
+class LoopOptimiser(ScopedWalker):
+    """
+    Hoists loop invariant expressions out of while loops, including
+    those for loops are desugared into, and strength reduces multiples
+    of their induction variables.
+
+    Both declare temporaries in spare slots of the scope the loop is
+    in, just before it, in a block which runs in that scope. Loops at
+    the top level, where there is no such scope, are left alone.
+
+    A multiple i * c + d of a variable i the loop only changes by
+    adding a constant k to it, once each iteration, is kept in a
+    temporary updated by k * c alongside i instead. Since that's one
+    more assignment each iteration, it only pays where the multiple is
+    evaluated often enough, so other multiples are left alone.
+    """
+
+    def __init__(self, values: "LocalValues"):
+        super().__init__()
+        self.values = values
+        self.numbers = values.numbers()
+
+        # the block each frame is the scope of, from the innermost
+        self.blocks: list["ast.statements.Block"] = []
+
+    def walk(self, statements: list["ast.statements.Statement"]):
+        statements[:] = [self.optimise(stmt) for stmt in statements]
+
+    def optimise(self, stmt: "ast.statements.Statement") -> "ast.statements.Statement":
+        if type(stmt) is ast.statements.While:
+            return self.loop(stmt)
+
+        stmt.accept(self)
+        return stmt
+
+    def function(self, stmt: "ast.statements.Function"):
+        self.blocks.append(stmt.body)
+        super().function(stmt)
+        self.blocks.pop()
+
+    def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
+        if stmt.frame_size is None:
+            self.walk(stmt.statements)
+            return
+
+        self.blocks.append(stmt)
+        super().visit_block_statement(stmt)
+        self.blocks.pop()
+
+    def visit_if_statement(self, stmt: "ast.statements.If") -> None:
+        stmt.then_branch = self.optimise(stmt.then_branch)
+
+        if stmt.else_branch:
+            stmt.else_branch = self.optimise(stmt.else_branch)
+
+    def loop(self, stmt: "ast.statements.While") -> "ast.statements.Statement":
+        frames = [dict(frame) for frame in self.frames]
+
+        # inner loops first, whose temporaries might be hoisted further
+        stmt.body = self.optimise(stmt.body)
+
+        if not self.blocks:
+            return stmt
+        block = self.blocks[-1]
+
+        def allocate() -> int:
+            slot = block.frame_size
+            block.frame_size += 1  # type: ignore
+            return slot  # type: ignore
+
+        effects = LoopEffects(frames)
+        effects.walk_loop(stmt)
+
+        hoister = Hoister(frames, effects, self.values, self.numbers, allocate)
+        hoister.walk_loop(stmt)
+
+        declarations = hoister.hoisted + self.reduce(stmt, frames, effects, allocate)
+        if not declarations:
+            return stmt
+
+        wrapper = ast.statements.Block(declarations + [stmt])
+        wrapper.frame_size = None
+        return wrapper
+
+    def reduce(
+        self,
+        stmt: "ast.statements.While",
+        frames: list[dict[int, "Binding"]],
+        effects: "LoopEffects",
+        allocate,
+    ) -> list["ast.statements.Var"]:
+        """
+        Strength reduces the multiples of the loop's induction
+        variables, returning the temporaries' declarations.
+        """
+        body = stmt.body
+        if type(body) is not ast.statements.Block:
+            return []
+
+        # statements of the body are in its own scope, if it has one
+        inner = [dict(frame) for frame in frames]
+        if body.frame_size is not None:
+            inner.append({})
+
+        # the statements incrementing each induction variable
+        increments: dict["Binding", tuple[int, float]] = {}
+        for index, statement in enumerate(body.statements):
+            step = self.increment(statement, inner)
+            if step is not None and effects.assigned.get(step[0]) == 1:
+                increments[step[0]] = (index, step[1])
+
+        if not increments:
+            return []
+
+        reducer = Reducer(frames, set(increments))
+        reducer.walk_loop(stmt)
+
+        chosen: dict[tuple, int] = {}
+        declarations: list["ast.statements.Var"] = []
+        updates: list[tuple[int, "ast.statements.Statement"]] = []
+
+        for multiple, (expr, uses) in reducer.found.items():
+            if uses * (nodes(expr) - 1) <= UPDATE_COST:
+                continue
+
+            binding, factor, offset = multiple
+            # the temporary is only ever updated to 0, where i * c
+            # might be -0, but i * c + d for a non-zero d never is
+            if factor <= 0 and not offset:
+                continue
+            index, step = increments[binding]
+
+            declaration = ast.statements.Var(
+                TEMPORARY, self.multiple_of(binding, factor, offset, frames)
+            )
+            declaration.slot = chosen[multiple] = allocate()
+            declarations.append(declaration)
+
+            depth = len(inner) - len(frames)
+            update = ast.expressions.Assignment(
+                TEMPORARY,
+                ast.expressions.Binary(
+                    temporary(depth, declaration.slot),
+                    PLUS,
+                    ast.expressions.Literal(step * factor),
+                ),
+            )
+            update.kind = VariableKind.LOCAL
+            update.depth = depth
+            update.slot = declaration.slot
+            updates.append((index, ast.statements.Expression(update)))
+
+        if not chosen:
+            return []
+
+        Reducer(frames, set(increments), chosen).walk_loop(stmt)
+
+        # from the last, so the indices still hold
+        for index, update in sorted(updates, key=lambda pair: -pair[0]):
+            body.statements.insert(index + 1, update)
+
+        return declarations
+
+    def increment(
+        self, stmt: "ast.statements.Statement", frames: list[dict[int, "Binding"]]
+    ) -> tuple["Binding", float] | None:
+        """
+        The counter an expression statement adds a constant to, and
+        the constant.
+        """
+        if type(stmt) is not ast.statements.Expression:
+            return None
+
+        assignment = stmt.expr
+        if (
+            type(assignment) is not ast.expressions.Assignment
+            or assignment.kind is not VariableKind.LOCAL
+        ):
+            return None
+
+        index = len(frames) - 1 - assignment.depth  # type: ignore
+        if index < 0:
+            return None
+        binding = frames[index].get(assignment.slot)  # type: ignore
+
+        if binding is None or not self.values.is_counter(binding):
+            return None
+
+        value = assignment.value
+        if type(value) is not ast.expressions.Binary:
+            return None
+        if self.values.resolved.get(value.left) is not binding:  # type: ignore
+            return None
+
+        step = small_integer(value.right)
+        if step is None:
+            return None
+        return binding, step if value.token.type is TokenType.PLUS else -step
+
+    def multiple_of(
+        self,
+        binding: "Binding",
+        factor: float,
+        offset: float,
+        frames: list[dict[int, "Binding"]],
+    ) -> "ast.expressions.Expression":
+        """
+        An expression for a multiple of a variable where the loop is.
+        """
+        index = next(
+            index
+            for index in reversed(range(len(frames)))
+            if binding in frames[index].values()
+        )
+
+        variable = ast.expressions.Variable(binding.name)  # type: ignore
+        variable.kind = VariableKind.LOCAL
+        variable.depth = len(frames) - 1 - index
+        variable.slot = binding.slot  # type: ignore
+
+        expr: "ast.expressions.Expression" = ast.expressions.Binary(
+            variable, STAR, ast.expressions.Literal(factor)
+        )
+        if offset:
+            expr = ast.expressions.Binary(expr, PLUS, ast.expressions.Literal(offset))
+        return expr
+
+
+def optimise_loops(program: list["ast.statements.Statement"]) -> None:
+    values = LocalValues()
+    values.walk(program)
+
+    LoopOptimiser(values).walk(program)
+
+
+def optimise_lazy_loops(
+    declaration: "ast.statements.Function", method: bool, subclass: bool
+) -> None:
+    values = LocalValues()
+    values.walk_lazy(declaration, method, subclass)
+
+    LoopOptimiser(values).walk_lazy(declaration, method, subclass)
@@ -0,0 +1,196 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import lox.ast as ast
+    from lox.lexer import Token
+
+from lox.visitors import ExpressionVisitor, StatementVisitor
+
+Declaration = "ast.statements.Var | ast.statements.Function | ast.statements.Class"
+
+
+class Walker(ExpressionVisitor, StatementVisitor):
+    """
+    Visits every node of a program, so a pass need only override the
+    kinds of node it is interested in, calling back up to carry on
+    into their children.
+
+    Function bodies which haven't been parsed yet are skipped, see
+    visit_lazy_body.
+    """
+
+    def walk(self, statements: list["ast.statements.Statement"]):
+        for statement in statements:
+            statement.accept(self)
+
+    def walk_expression(self, expression: "ast.expressions.Expression"):
+        expression.accept(self)
+
+    def visit_lazy_body(self, body: "ast.statements.LazyBlock"):
+        pass
+
+    def visit_unary_expression(self, expr: "ast.expressions.Unary"):
+        self.walk_expression(expr.right)
+
+    def visit_literal_expression(self, expr: "ast.expressions.Literal"):
+        pass
+
+    def visit_grouping_expression(self, expr: "ast.expressions.Grouping"):
+        self.walk_expression(expr.expr)
+
+    def visit_binary_expression(self, expr: "ast.expressions.Binary"):
+        self.walk_expression(expr.left)
+        self.walk_expression(expr.right)
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        pass
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        self.walk_expression(expr.value)
+
+    def visit_logical_expression(self, expr: "ast.expressions.Logical"):
+        self.walk_expression(expr.left)
+        self.walk_expression(expr.right)
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        self.walk_expression(expr.callee)
+
+        for argument in expr.arguments:
+            self.walk_expression(argument)
+
+    def visit_get_expression(self, expr: "ast.expressions.Get"):
+        self.walk_expression(expr.object)
+
+    def visit_set_expression(self, expr: "ast.expressions.Set"):
+        self.walk_expression(expr.object)
+        self.walk_expression(expr.value)
+
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        pass
+
+    def visit_super_expression(self, expr: "ast.expressions.Super"):
+        pass
+
+    def visit_expression_statement(self, stmt: "ast.statements.Expression") -> None:
+        self.walk_expression(stmt.expr)
+
+    def visit_print_statement(self, stmt: "ast.statements.Print") -> None:
+        self.walk_expression(stmt.expr)
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        if stmt.initialiser:
+            self.walk_expression(stmt.initialiser)
+
+    def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
+        self.walk(stmt.statements)
+
+    def visit_if_statement(self, stmt: "ast.statements.If") -> None:
+        self.walk_expression(stmt.condition)
+        stmt.then_branch.accept(self)
+
+        if stmt.else_branch:
+            stmt.else_branch.accept(self)
+
+    def visit_while_statement(self, stmt: "ast.statements.While") -> None:
+        self.walk_expression(stmt.condition)
+        stmt.body.accept(self)
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        if stmt.body.statements is None:
+            self.visit_lazy_body(stmt.body)  # type: ignore
+        else:
+            stmt.body.accept(self)
+
+    def visit_return_statement(self, stmt: "ast.statements.Return") -> None:
+        if stmt.value:
+            self.walk_expression(stmt.value)
+
+    def visit_class_statement(self, stmt: "ast.statements.Class") -> None:
+        if stmt.superclass:
+            self.walk_expression(stmt.superclass)
+
+        for method in stmt.methods:
+            method.accept(self)
+
+
+class ScopedWalker(Walker):
+    """
+    Walks a resolved program keeping track of the scopes the
+    interpreter allocates, to find the declaration a local variable
+    is bound to.
+    """
+
+    def __init__(self):
+        # slot -> the declaration using it at this point in the program,
+        # or for a parameter its name, missing for 'this' and 'super'
+        self.frames: list[dict[int, "Declaration | Token"]] = []
+
+    def walk_lazy(
+        self, declaration: "ast.statements.Function", method: bool, subclass: bool
+    ):
+        """
+        Walks a lazily compiled top-level function or method.
+        """
+        if method:
+            self.method(declaration, subclass)
+        else:
+            self.function(declaration)
+
+    def declare(self, stmt: "Declaration"):
+        if stmt.slot is not None:
+            self.frames[-1][stmt.slot] = stmt
+
+    def declaration_of(
+        self, node: "ast.expressions.Variable | ast.expressions.Assignment"
+    ) -> "Declaration | Token | None":
+        index = len(self.frames) - 1 - node.depth  # type: ignore
+        if index < 0:
+            # outside a lazily compiled body
+            return None
+
+        return self.frames[index].get(node.slot)  # type: ignore
+
+    def function(self, stmt: "ast.statements.Function"):
+        self.frames.append(dict(enumerate(stmt.params)))
+
+        if stmt.body.statements is None:
+            self.visit_lazy_body(stmt.body)  # type: ignore
+        else:
+            self.walk(stmt.body.statements)
+
+        self.frames.pop()
+
+    def method(self, stmt: "ast.statements.Function", subclass: bool):
+        # the scopes of 'super' and 'this'
+        scopes = 2 if subclass else 1
+        self.frames.extend({} for _ in range(scopes))
+
+        self.function(stmt)
+
+        del self.frames[len(self.frames) - scopes :]
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        super().visit_var_statement(stmt)
+        self.declare(stmt)
+
+    def visit_block_statement(self, stmt: "ast.statements.Block") -> None:
+        if stmt.frame_size is None:
+            self.walk(stmt.statements)
+            return
+
+        self.frames.append({})
+        self.walk(stmt.statements)
+        self.frames.pop()
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        self.declare(stmt)
+        self.function(stmt)
+
+    def visit_class_statement(self, stmt: "ast.statements.Class") -> None:
+        self.declare(stmt)
+
+        if stmt.superclass:
+            self.walk_expression(stmt.superclass)
+
+        for method in stmt.methods:
+            self.method(method, stmt.superclass is not None)
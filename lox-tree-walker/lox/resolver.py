@@ -3,10 +3,10 @@ from enum import Enum, auto
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from lox.interpreter import Interpreter
     from lox.lexer import Token
 
 import lox.ast as ast
+from lox.ast.expressions import VariableKind
 from lox.visitors import ExpressionVisitor, StatementVisitor
 from lox import Lox
 from lox.errors import ParseError
@@ -25,12 +25,48 @@ class ClassType(Enum):
     SUBCLASS = auto()
 
 
-class Resolver(ExpressionVisitor, StatementVisitor):
-    def __init__(self, interpreter: "Interpreter"):
-        self.interpreter = interpreter
+class Frame:
+    """
+    The slots of a scope the interpreter allocates at runtime, shared
+    by any blocks within it which run in it rather than their own.
+    """
+
+    __slots__ = ("top", "size")
+
+    def __init__(self):
+        self.top = 0
+        self.size = 0
 
+
+class Resolver(ExpressionVisitor, StatementVisitor):
+    """
+    Annotates each variable reference with where its binding lives:
+    how many frames out, and at which slot, the order it was bound in
+    within that frame. Anything not found is a global.
+
+    Alongside the stack of scopes, each name maps to the stack of
+    (frame index, slot) of its bindings, innermost last. Scopes push and
+    pop their names there as they begin and end, so a reference is
+    resolved by looking at the top of one stack rather than searching
+    every enclosing scope.
+
+    Most scopes get a frame of their own, but a block that binds
+    nothing, or whose bindings no function could capture, shares the
+    frame it is in. Its locals take the next free slots there, which
+    are free again once it ends, so the interpreter needn't allocate
+    a scope each time it runs the block, e.g. on every iteration of a
+    loop.
+    """
+
+    def __init__(self):
         # stack of dict[str, bool]
         self.scopes = deque()
+        # per scope, the top of the frame it shares when it began, or
+        # None if it has its own
+        self.marks: deque[int | None] = deque()
+        self.frames: deque[Frame] = deque()
+        self.bindings: dict[str, list[tuple[int, int]]] = {}
+        self.capture_free = False
         self.current_function = FunctionType.NONE
         self.current_class = ClassType.NONE
 
@@ -44,13 +80,31 @@ class Resolver(ExpressionVisitor, StatementVisitor):
     def resolve_expression(self, expression: "ast.expressions.Expression"):
         expression.accept(self)
 
-    def resolve_local(self, expr: "ast.expressions.Expression", name: "Token"):
-        for i in range(len(self.scopes) - 1, -1, -1):
-            if self.scopes[i].get(name.raw) is not None:
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
-                return
+    def resolve_local(self, expr: "ast.expressions.Resolvable", name: "Token"):
+        bindings = self.bindings.get(name.raw)
+
+        if bindings:
+            index, slot = bindings[-1]
+            expr.kind = VariableKind.LOCAL
+            expr.depth = len(self.frames) - 1 - index
+            expr.slot = slot
+        else:
+            expr.kind = VariableKind.GLOBAL
+            expr.depth = None
+            expr.slot = None
 
     def resolve_function(self, stmt: "ast.statements.Function", type: "FunctionType"):
+        if stmt.body.statements is None:
+            # not parsed yet, resolved by lox.lazy on the first call
+            stmt.body.context = (
+                type,
+                self.current_class,
+                # only top-level functions are lazy, within class
+                # scopes at most, which all have frames of their own
+                [dict(scope) for scope in self.scopes],
+            )
+            return
+
         enclosing_function = self.current_function
         self.current_function = type
 
@@ -61,19 +115,67 @@ class Resolver(ExpressionVisitor, StatementVisitor):
             self.define(param)
 
         self.resolve_statements(stmt.body.statements)
-        self.end_scope()
+        stmt.body.frame_size = self.end_scope()
 
         self.current_function = enclosing_function
 
-    def begin_scope(self):
+    def begin_scope(self, shared: bool = False):
         self.scopes.append({})
 
-    def end_scope(self):
-        self.scopes.pop()
+        if shared:
+            self.marks.append(self.frames[-1].top if self.frames else 0)
+        else:
+            self.marks.append(None)
+            self.frames.append(Frame())
+
+    def end_scope(self) -> int | None:
+        """
+        Ends the innermost scope, returning the size of its frame, or
+        None if it shared the enclosing one.
+        """
+        bindings = self.bindings
+        scope = self.scopes.pop()
+
+        for name in scope:
+            stack = bindings[name]
+            stack.pop()
+            if not stack:
+                del bindings[name]
+
+        mark = self.marks.pop()
+        if mark is None:
+            return self.frames.pop().size
+
+        if self.frames:
+            self.frames[-1].top = mark
+        return None
+
+    def bind(self, name: str, defined: bool) -> int:
+        """
+        Binds a name in the innermost scope, returning its slot.
+        """
+        scope = self.scopes[-1]
+
+        if name in scope:
+            slot = self.bindings[name][-1][1]
+        else:
+            frame = self.frames[-1]
+            slot = frame.top
+            frame.top += 1
+            frame.size = max(frame.size, frame.top)
 
-    def declare(self, name: "Token"):
+            self.bindings.setdefault(name, []).append((len(self.frames) - 1, slot))
+
+        scope[name] = defined
+        return slot
+
+    def declare(self, name: "Token") -> int | None:
+        """
+        Declares a name in the innermost scope, returning its slot, or
+        None at the top level where it is a global.
+        """
         if len(self.scopes) == 0:
-            return
+            return None
 
         scope = self.scopes[-1]
         if name.raw in scope:
@@ -81,22 +183,63 @@ class Resolver(ExpressionVisitor, StatementVisitor):
                 ParseError(name, "Already a variable with this name in this scope.")
             )
 
-        scope[name.raw] = False
+        return self.bind(name.raw, False)
 
     def define(self, name: "Token"):
         if len(self.scopes) == 0:
             return
 
-        scope = self.scopes[-1]
-        scope[name.raw] = True
+        self.bind(name.raw, True)
 
     def visit_block_statement(self, stmt: "ast.statements.Block"):
-        self.begin_scope()
+        capture_free = self.capture_free
+        declarations = (
+            ast.statements.Var,
+            ast.statements.Function,
+            ast.statements.Class,
+        )
+
+        if not any(isinstance(s, declarations) for s in stmt.statements):
+            # binds nothing, so it can share any scope, even the global one
+            shared = True
+        else:
+            # everything within a capture free block is capture free too
+            self.capture_free = capture_free or not self.may_capture(stmt)
+            shared = self.capture_free and len(self.frames) > 0
+
+        self.begin_scope(shared)
         self.resolve_statements(stmt.statements)
-        self.end_scope()
+        stmt.frame_size = self.end_scope()
+
+        self.capture_free = capture_free
+
+    def may_capture(self, block: "ast.statements.Block") -> bool:
+        """
+        Whether a function or class is declared anywhere within a block,
+        which could then capture its locals. Lox has no function
+        expressions, so only the statements need searching.
+        """
+        stack: list["ast.statements.Statement"] = list(block.statements)
+
+        while stack:
+            stmt = stack.pop()
+
+            if isinstance(stmt, (ast.statements.Function, ast.statements.Class)):
+                return True
+
+            if isinstance(stmt, ast.statements.Block):
+                stack += stmt.statements
+            elif isinstance(stmt, ast.statements.If):
+                stack.append(stmt.then_branch)
+                if stmt.else_branch:
+                    stack.append(stmt.else_branch)
+            elif isinstance(stmt, ast.statements.While):
+                stack.append(stmt.body)
+
+        return False
 
     def visit_var_statement(self, stmt: "ast.statements.Var"):
-        self.declare(stmt.name)
+        stmt.slot = self.declare(stmt.name)
 
         if stmt.initialiser:
             self.resolve_expression(stmt.initialiser)
@@ -118,7 +261,7 @@ class Resolver(ExpressionVisitor, StatementVisitor):
         self.resolve_local(expr, expr.name)
 
     def visit_function_statement(self, stmt: "ast.statements.Function"):
-        self.declare(stmt.name)
+        stmt.slot = self.declare(stmt.name)
         self.define(stmt.name)
 
         self.resolve_function(stmt, FunctionType.FUNCTION)
@@ -127,7 +270,7 @@ class Resolver(ExpressionVisitor, StatementVisitor):
         enclosing_class = self.current_class
         self.current_class = ClassType.CLASS
 
-        self.declare(stmt.name)
+        stmt.slot = self.declare(stmt.name)
         self.define(stmt.name)
 
         if stmt.superclass and stmt.superclass.name.raw == stmt.name.raw:
@@ -141,10 +284,10 @@ class Resolver(ExpressionVisitor, StatementVisitor):
 
         if stmt.superclass:
             self.begin_scope()
-            self.scopes[-1]["super"] = True
+            self.bind("super", True)
 
         self.begin_scope()
-        self.scopes[-1]["this"] = True
+        self.bind("this", True)
 
         for method in stmt.methods:
             declaration = FunctionType.METHOD
@@ -0,0 +1,69 @@
+import lox.ast as ast
+
+from .codegen import generate
+from .dse import eliminate_dead_stores
+from .gvn import number_values
+from .ir import Block, Function, Instruction, Op, Phi, Shape, Value
+from .lowering import Unsupported, lower
+from .printer import format_function
+from .verify import VerificationError, verify
+
+
+class Optimised:
+    """
+    What optimising a program did, for reporting.
+    """
+
+    def __init__(self):
+        self.functions = 0
+        self.numbered = 0
+        self.eliminated = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.functions} functions, {self.numbered} values numbered, "
+            f"{self.eliminated} dead stores and values eliminated"
+        )
+
+
+def optimise_function(
+    declaration: "ast.statements.Function", optimised: "Optimised"
+) -> None:
+    try:
+        function = lower(declaration)
+        numbered = number_values(function)
+        eliminated = eliminate_dead_stores(function)
+        statements, frame_size = generate(function)
+    except Unsupported:
+        return
+
+    declaration.body.statements = statements
+    declaration.body.frame_size = frame_size
+
+    optimised.functions += 1
+    optimised.numbered += numbered
+    optimised.eliminated += eliminated
+
+
+def optimise(program: list["ast.statements.Statement"]) -> "Optimised":
+    """
+    Lowers the top-level functions and methods of a resolved program
+    into SSA form, numbers their values and eliminates their dead
+    stores, then lowers them back, returning what that did. Each step
+    can be run on its own: lower, number_values, eliminate_dead_stores,
+    verify, format_function and generate.
+
+    Functions which declare functions or classes of their own, or use
+    'super', are left as they are, as are the bodies of lazily
+    compiled functions which haven't been parsed yet.
+    """
+    optimised = Optimised()
+
+    for statement in program:
+        if type(statement) is ast.statements.Function:
+            optimise_function(statement, optimised)
+        elif type(statement) is ast.statements.Class:
+            for method in statement.methods:
+                optimise_function(method, optimised)
+
+    return optimised
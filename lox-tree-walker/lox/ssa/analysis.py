@@ -0,0 +1,119 @@
+from lox.ssa.ir import Block, Function, Value
+
+
+def reverse_postorder(function: "Function") -> list["Block"]:
+    """
+    The blocks reachable from the entry, each before its successors
+    except along the back edges of loops.
+    """
+    order: list["Block"] = []
+    seen = {function.entry}
+    stack = [(function.entry, iter(function.entry.successors))]
+
+    while stack:
+        block, successors = stack[-1]
+
+        for successor in successors:
+            if successor not in seen:
+                seen.add(successor)
+                stack.append((successor, iter(successor.successors)))
+                break
+        else:
+            stack.pop()
+            order.append(block)
+
+    order.reverse()
+    return order
+
+
+def dominators(function: "Function") -> dict["Block", "Block"]:
+    """
+    The immediate dominator of each reachable block, the entry being
+    its own, found as by Cooper, Harvey and Kennedy.
+    """
+    order = reverse_postorder(function)
+    index = {block: i for i, block in enumerate(order)}
+
+    idom = {function.entry: function.entry}
+
+    def intersect(a: "Block", b: "Block") -> "Block":
+        while a is not b:
+            while index[a] > index[b]:
+                a = idom[a]
+            while index[b] > index[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+
+        for block in order[1:]:
+            processed = [p for p in block.predecessors if p in idom]
+            dominator = processed[0]
+            for predecessor in processed[1:]:
+                dominator = intersect(predecessor, dominator)
+
+            if idom.get(block) is not dominator:
+                idom[block] = dominator
+                changed = True
+
+    return idom
+
+
+def dominator_tree(function: "Function") -> dict["Block", list["Block"]]:
+    """
+    The blocks each reachable block immediately dominates, in reverse
+    postorder.
+    """
+    idom = dominators(function)
+    children: dict["Block", list["Block"]] = {block: [] for block in idom}
+
+    for block in reverse_postorder(function)[1:]:
+        children[idom[block]].append(block)
+
+    return children
+
+
+def dominates(idom: dict["Block", "Block"], a: "Block", b: "Block") -> bool:
+    while b is not a:
+        if idom[b] is b:
+            return False
+        b = idom[b]
+
+    return True
+
+
+def between(start: "Block", end: "Block") -> set["Block"]:
+    """
+    The blocks which can run after leaving one block and before
+    reaching another, including either, around a loop.
+    """
+
+    def reachable(blocks: list["Block"], forwards: bool) -> set["Block"]:
+        seen = set(blocks)
+        work = list(blocks)
+
+        while work:
+            block = work.pop()
+            for next in block.successors if forwards else block.predecessors:
+                if next not in seen:
+                    seen.add(next)
+                    work.append(next)
+
+        return seen
+
+    return reachable(start.successors, True) & reachable(end.predecessors, False)
+
+
+def uses(function: "Function") -> dict["Value", list["Value"]]:
+    """
+    The values using each value as an operand, once for each time.
+    """
+    users: dict["Value", list["Value"]] = {}
+
+    for value in function.values():
+        for operand in value.operands:
+            users.setdefault(operand, []).append(value)
+
+    return users
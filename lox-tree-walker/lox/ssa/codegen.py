@@ -0,0 +1,786 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.lexer import Token, TokenType
+from lox.passes.walker import Walker
+from lox.ssa.analysis import reverse_postorder, uses
+from lox.ssa.ir import REMATERIALISABLE, Block, Function, Instruction, Op, Phi
+from lox.ssa.ir import Shape, Value
+from lox.ssa.lowering import Unsupported
+
+# the name of the locals values are kept in, which are never looked up
+# by name, so can't clash with one in the program
+NAME = Token(TokenType.IDENTIFIER, "ssa value", 0)
+
+LOGICAL = (Shape.AND, Shape.OR)
+
+
+class Fallback(Exception):
+    """
+    Raised building an expression which would need a statement.
+    """
+
+
+def liveness(function: "Function") -> dict["Value", set["Value"]]:
+    """
+    The values live just after each value is defined, the phis of a
+    block all being defined at once as it starts.
+    """
+    order = reverse_postorder(function)
+    live_in: dict["Block", set["Value"]] = {block: set() for block in order}
+
+    def live_out(block: "Block") -> set["Value"]:
+        live: set["Value"] = set()
+        for successor in block.successors:
+            live |= live_in[successor]
+
+            index = successor.predecessors.index(block)
+            live.update(phi.operands[index] for phi in successor.phis)
+        return live
+
+    def values(block: "Block") -> list["Value"]:
+        return block.instructions + [block.terminator]  # type: ignore
+
+    changed = True
+    while changed:
+        changed = False
+
+        for block in reversed(order):
+            live = live_out(block)
+            for value in reversed(values(block)):
+                live.discard(value)
+                live.update(value.operands)
+            live.difference_update(block.phis)
+
+            if live != live_in[block]:
+                live_in[block] = live
+                changed = True
+
+    after: dict["Value", set["Value"]] = {}
+    for block in order:
+        live = live_out(block)
+        for value in reversed(values(block)):
+            live.discard(value)
+            after[value] = set(live)
+            live.update(value.operands)
+
+        for phi in block.phis:
+            after[phi] = (live | set(block.phis)) - {phi}
+
+    return after
+
+
+class Slots(Walker):
+    """
+    The slots of the values an expression reads, and assigns.
+    """
+
+    def __init__(self, expression: "ast.expressions.Expression"):
+        self.read: set[int] = set()
+        self.assigned: set[int] = set()
+        expression.accept(self)
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        if expr.name is NAME:
+            self.read.add(expr.slot)  # type: ignore
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+
+        if expr.name is NAME:
+            self.assigned.add(expr.slot)  # type: ignore
+
+
+class FirstWrites(Walker):
+    """
+    The assignment which first gives each value slot a value, in the
+    order the program runs them.
+    """
+
+    def __init__(self):
+        self.first: dict[int, "ast.expressions.Assignment"] = {}
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        super().visit_assignment_expression(expr)
+
+        if expr.name is NAME:
+            self.first.setdefault(expr.slot, expr)  # type: ignore
+
+
+class CodeGenerator:
+    """
+    Lowers a function in SSA form back into statements for the
+    interpreter, rebuilding the ifs, whiles and logical expressions
+    its branches were lowered from.
+
+    A value used once, by an instruction later in its block, is built
+    into the expression using it as it was originally. Otherwise it is
+    kept in a local slot, its home, assigned as it is computed. Each
+    phi takes its value by assignments at the end of the blocks before
+    it, so a phi shares its home with its operands wherever they are
+    never both needed at once, which leaves a variable like a loop
+    counter assigned in place. Parameters keep their own slots, and
+    constants and 'this' are evaluated again wherever they are used.
+
+    The values waiting to be built into an expression are kept on a
+    stack, and an instruction only takes its operands from the top of
+    it, in order, so nothing is evaluated out of turn. Whenever a
+    statement has to come first, those waiting are assigned to their
+    homes.
+
+    The condition of a while must rebuild as an expression, since it
+    is evaluated again on every iteration, or the function is left as
+    it was. A logical expression whose right operand needs statements
+    becomes an if instead.
+    """
+
+    def __init__(self, function: "Function"):
+        self.function = function
+        self.declaration = function.declaration
+        self.parameters = len(self.declaration.params)
+        self.users = uses(function)
+        self.returns = Token(TokenType.RETURN, "return", self.declaration.name.line)
+
+        # the values waiting to be built into an expression, with whether
+        # that expression already assigns them to their home
+        self.pending: list[tuple["Value", "ast.expressions.Expression", bool]] = []
+        self.materialised: set["Value"] = set()
+        self.expression_only = False
+
+        self.out: list["ast.statements.Statement"] = []
+        self.nesting = 0
+
+        self.trees = self.find_trees()
+
+        self.parent: dict["Value", "Value"] = {}
+        self.members: dict["Value", list["Value"]] = {}
+        self.parameter: dict["Value", int] = {}
+        self.homes: dict["Value", int] = {}
+        self.slots = self.parameters
+        self.coalesce()
+
+    def generate(self) -> list["ast.statements.Statement"]:
+        self.region(self.function.entry, None)
+        return self.declare(self.out)
+
+    # deciding where values live
+
+    def find_trees(self) -> set["Value"]:
+        """
+        The values used once, by an instruction in their own block or a
+        phi after it, which can be built into the expression using
+        them.
+        """
+        trees: set["Value"] = set()
+
+        for value in self.function.values():
+            if type(value) is Phi:
+                if value.branch is None:
+                    self.materialised.add(value)
+                    continue
+            elif value.op in REMATERIALISABLE:  # type: ignore
+                continue
+            elif value.op is Op.PARAMETER:  # type: ignore
+                self.materialised.add(value)
+                continue
+
+            users = list(self.users.get(value, []))
+            for user in users:
+                # the left operand of a logical expression is its value if
+                # it short circuits, which rebuilding it takes care of
+                if (
+                    type(user) is Phi
+                    and user.branch is not None
+                    and user.branch.operands[0] is value
+                ):
+                    users.remove(user)
+                    break
+
+            if len(users) != 1:
+                continue
+
+            user = users[0]
+            if type(user) is not Phi:
+                if user.block is value.block:
+                    trees.add(value)
+                continue
+
+            terminator = value.block.terminator
+            if (
+                terminator.op is Op.JUMP  # type: ignore
+                and terminator.targets[0] is user.block  # type: ignore
+                and user.operands[user.block.predecessors.index(value.block)]
+                is value
+            ):
+                trees.add(value)
+
+        return trees
+
+    def find(self, value: "Value") -> "Value":
+        while value in self.parent:
+            value = self.parent[value]
+        return value
+
+    def coalesce(self):
+        """
+        Gives each phi the same home as its operands where none of them
+        interfere, so that moving them into it does nothing.
+        """
+        live = liveness(self.function)
+
+        def interfere(a: "Value", b: "Value") -> bool:
+            return a in live.get(b, ()) or b in live.get(a, ())
+
+        for value in self.function.values():
+            if type(value) is Instruction and value.op is Op.PARAMETER:
+                self.parameter[value] = value.constant  # type: ignore
+
+        for block in self.function.blocks:
+            for phi in block.phis:
+                if phi.branch is not None:
+                    continue
+
+                for operand in phi.operands:
+                    if type(operand) is Phi and operand.branch is not None:
+                        continue
+                    if type(operand) is Instruction and operand.op in REMATERIALISABLE:
+                        continue
+
+                    a, b = self.find(phi), self.find(operand)
+                    if a is b or (a in self.parameter and b in self.parameter):
+                        continue
+
+                    members_a = self.members.get(a, [a])
+                    members_b = self.members.get(b, [b])
+                    if any(interfere(x, y) for x in members_a for y in members_b):
+                        continue
+
+                    self.parent[b] = a
+                    self.members[a] = members_a + members_b
+                    if b in self.parameter:
+                        self.parameter[a] = self.parameter[b]
+
+    def home(self, value: "Value") -> int:
+        root = self.find(value)
+
+        if root not in self.homes:
+            if root in self.parameter:
+                self.homes[root] = self.parameter[root]
+            else:
+                self.homes[root] = self.new_slot()
+
+        return self.homes[root]
+
+    def new_slot(self) -> int:
+        self.slots += 1
+        return self.slots - 1
+
+    # building expressions
+
+    def variable(self, slot: int) -> "ast.expressions.Variable":
+        variable = ast.expressions.Variable(NAME)
+        variable.kind = VariableKind.LOCAL
+        variable.depth = 0
+        variable.slot = slot
+        return variable
+
+    def assignment(
+        self, slot: int, value: "ast.expressions.Expression"
+    ) -> "ast.expressions.Assignment":
+        assignment = ast.expressions.Assignment(NAME, value)
+        assignment.kind = VariableKind.LOCAL
+        assignment.depth = 0
+        assignment.slot = slot
+        return assignment
+
+    def read(self, value: "Value") -> "ast.expressions.Expression":
+        if type(value) is Instruction and value.op is Op.CONSTANT:
+            return ast.expressions.Literal(value.constant)
+
+        if type(value) is Instruction and value.op is Op.THIS:
+            this = ast.expressions.This(value.token)  # type: ignore
+            # as the resolver leaves it, a scope out from the method
+            this.kind = VariableKind.LOCAL
+            this.depth = 1
+            this.slot = 0
+            return this
+
+        if value not in self.materialised:
+            # computed somewhere it can't be built into this expression
+            if self.expression_only:
+                raise Fallback()
+            raise Unsupported(f"%{value.id} is read before it is assigned")
+
+        return self.variable(self.home(value))
+
+    def is_pending(self, value: "Value") -> bool:
+        return any(entry[0] is value for entry in self.pending)
+
+    def operands(self, values: list["Value"]) -> list["ast.expressions.Expression"]:
+        """
+        The expressions for the operands of an instruction, taking those
+        waiting for it from the stack.
+        """
+        waiting: list["Value"] = []
+        for value in values:
+            if value not in waiting and self.is_pending(value):
+                waiting.append(value)
+
+        top = [entry[0] for entry in self.pending[len(self.pending) - len(waiting) :]]
+        if waiting and (top != waiting or self.out_of_turn(values, waiting)):
+            self.flush()
+            waiting = []
+
+        taken: dict["Value", "ast.expressions.Expression"] = {}
+        for _ in waiting:
+            value, expression, assigns = self.pending.pop()
+            taken[value] = expression
+            if assigns:
+                self.materialised.add(value)
+
+        return [
+            taken.pop(value) if value in taken else self.read(value)
+            for value in values
+        ]
+
+    def out_of_turn(self, values: list["Value"], waiting: list["Value"]) -> bool:
+        """
+        Whether an operand would be read from its home before the one
+        after it, waiting, assigns it.
+        """
+        expressions = {entry[0]: entry[1] for entry in self.pending[-len(waiting) :]}
+
+        assigned: set[int] = set()
+        for value in reversed(values):
+            if value in expressions:
+                assigned |= Slots(expressions[value]).assigned
+            elif value in self.materialised and self.home(value) in assigned:
+                return True
+
+        return False
+
+    def define(self, value: "Value", expression: "ast.expressions.Expression"):
+        """
+        Leaves the expression for a value waiting for what uses it.
+        """
+        if value in self.trees:
+            self.pending.append((value, expression, False))
+        elif self.users.get(value):
+            assignment = self.assignment(self.home(value), expression)
+            self.pending.append((value, assignment, True))
+        else:
+            self.statement(ast.statements.Expression(expression))
+
+    def flush(self):
+        """
+        Assigns the values waiting on the stack to their homes.
+        """
+        if not self.pending:
+            return
+        elif self.expression_only:
+            raise Fallback()
+
+        pending, self.pending = self.pending, []
+        for value, expression, assigns in pending:
+            if not assigns:
+                expression = self.assignment(self.home(value), expression)
+
+            self.out.append(ast.statements.Expression(expression))
+            self.materialised.add(value)
+
+    def statement(self, statement: "ast.statements.Statement"):
+        if self.expression_only:
+            raise Fallback()
+
+        self.flush()
+        self.out.append(statement)
+
+    def instructions(self, block: "Block"):
+        for instruction in block.instructions:
+            op = instruction.op
+            token: "Token" = instruction.token  # type: ignore
+
+            if op in REMATERIALISABLE or op is Op.PARAMETER:
+                continue
+
+            operands = self.operands(instruction.operands)
+            expression: "ast.expressions.Expression"
+
+            if op is Op.UNARY:
+                expression = ast.expressions.Unary(token, operands[0])
+            elif op is Op.BINARY:
+                expression = ast.expressions.Binary(operands[0], token, operands[1])
+            elif op is Op.GLOBAL:
+                expression = ast.expressions.Variable(token)
+            elif op is Op.GET:
+                expression = ast.expressions.Get(operands[0], token)
+            elif op is Op.CALL:
+                expression = ast.expressions.Call(operands[0], token, operands[1:])
+            elif op is Op.SET:
+                self.statement(
+                    ast.statements.Expression(
+                        ast.expressions.Set(operands[0], token, operands[1])
+                    )
+                )
+                continue
+            elif op is Op.SET_GLOBAL:
+                self.statement(
+                    ast.statements.Expression(
+                        ast.expressions.Assignment(token, operands[0])
+                    )
+                )
+                continue
+            else:
+                self.statement(ast.statements.Print(operands[0]))
+                continue
+
+            self.define(instruction, expression)
+
+    # control flow
+
+    def region(self, block: "Block | None", stop: "Block | None"):
+        """
+        Emits the blocks from the given one until control reaches the
+        stop block, or returns.
+        """
+        while block is not None and block is not stop:
+            if block.loop is not None:
+                block = self.loop(block)
+                continue
+
+            self.instructions(block)
+            terminator: "Instruction" = block.terminator  # type: ignore
+
+            if terminator.op is Op.RETURN:
+                self.return_statement(terminator)
+                return
+            elif terminator.op is Op.JUMP:
+                self.copies(block, terminator.targets[0])
+                block = terminator.targets[0]
+            elif terminator.shape is Shape.IF:
+                block = self.if_statement(terminator)
+            elif terminator.shape in LOGICAL:
+                block = self.logical(terminator)
+            else:
+                raise Unsupported(f"block {block.id} branches out of place")
+
+    def nested(self, block: "Block", stop: "Block") -> list["ast.statements.Statement"]:
+        out, self.out = self.out, []
+        self.nesting += 1
+
+        self.region(block, stop)
+
+        statements, self.out = self.out, out
+        self.nesting -= 1
+        return statements
+
+    def return_statement(self, terminator: "Instruction"):
+        (value,) = terminator.operands
+        (expression,) = self.operands([value])
+
+        if (
+            self.nesting == 0
+            and type(value) is Instruction
+            and value.op is Op.CONSTANT
+            and value.constant is None
+        ):
+            # falls off the end of the function
+            self.flush()
+            return
+
+        self.statement(ast.statements.Return(self.returns, expression))
+
+    def if_statement(self, branch: "Instruction") -> "Block | None":
+        (condition,) = self.operands(branch.operands)
+        self.flush()
+
+        then, otherwise = branch.targets
+        join: "Block" = branch.join  # type: ignore
+
+        then_branch = self.nested(then, join)
+        else_branch = self.nested(otherwise, join)
+
+        self.statement(
+            ast.statements.If(
+                condition,
+                self.block(then_branch),
+                self.block(else_branch) if else_branch else None,
+            )
+        )
+
+        # both branches may return
+        return join if join.predecessors else None
+
+    def block(
+        self, statements: list["ast.statements.Statement"]
+    ) -> "ast.statements.Block":
+        block = ast.statements.Block(statements)
+        # runs in the function's scope, where every value has its slot
+        block.frame_size = None
+        return block
+
+    def loop(self, header: "Block") -> "Block":
+        branch: "Instruction" = header.loop  # type: ignore
+        self.flush()
+
+        self.expression_only = True
+        try:
+            end = self.chain(header, branch)
+            if end.terminator is not branch:
+                raise Fallback()
+
+            (condition,) = self.operands(branch.operands)
+            if self.pending:
+                raise Fallback()
+        except Fallback:
+            raise Unsupported(f"the condition in block {header.id} needs statements")
+        finally:
+            self.expression_only = False
+
+        body, exit = branch.targets
+        statements = self.nested(body, header)
+
+        self.statement(ast.statements.While(condition, self.block(statements)))
+        return exit
+
+    def chain(self, block: "Block", end: "Instruction | None") -> "Block":
+        """
+        Builds the blocks of an expression from the given one, through
+        any logical expressions in it, returning the block it ends in.
+        """
+        while True:
+            self.instructions(block)
+            terminator: "Instruction" = block.terminator  # type: ignore
+
+            if terminator is end or terminator.shape not in LOGICAL:
+                return block
+
+            block = self.logical(terminator)
+
+    def skip(self, branch: "Instruction") -> "Block":
+        """
+        The block a logical expression goes through when it short
+        circuits.
+        """
+        truthy, falsy = branch.targets
+        return falsy if branch.shape is Shape.AND else truthy
+
+    def logical(self, branch: "Instruction") -> "Block":
+        join: "Block" = branch.join  # type: ignore
+        skip = self.skip(branch)
+        right = branch.targets[0] if branch.shape is Shape.AND else branch.targets[1]
+
+        phi = None
+        for candidate in join.phis:
+            if candidate.branch is branch:
+                phi = candidate
+
+        if phi is not None and join.phis == [phi]:
+            saved = (list(self.pending), set(self.materialised), self.expression_only)
+
+            try:
+                self.logical_expression(branch, phi, right)
+                self.expression_only = saved[2]
+                return join
+            except Fallback:
+                if saved[2]:
+                    raise
+
+                self.pending, self.materialised, self.expression_only = saved
+
+        # as an if, assigning the phi the left operand as it is tested
+        (condition,) = self.operands(branch.operands)
+        if phi is not None:
+            condition = self.assignment(self.home(phi), condition)
+        self.flush()
+
+        right_branch = self.nested(right, join)
+        skip_branch = self.nested(skip, join)
+        if branch.shape is Shape.OR:
+            right_branch, skip_branch = skip_branch, right_branch
+
+        self.statement(
+            ast.statements.If(
+                condition,
+                self.block(right_branch),
+                self.block(skip_branch) if skip_branch else None,
+            )
+        )
+
+        if phi is not None:
+            self.materialised.add(phi)
+        return join
+
+    def logical_expression(self, branch: "Instruction", phi: "Phi", right: "Block"):
+        (left,) = self.operands(branch.operands)
+
+        pending, self.pending = self.pending, []
+        self.expression_only = True
+
+        end = self.chain(right, None)
+        if end.terminator.op is not Op.JUMP:  # type: ignore
+            raise Fallback()
+
+        (operand,) = self.operands([phi.operands[phi.block.predecessors.index(end)]])
+        if self.pending:
+            raise Fallback()
+
+        self.pending = pending
+        self.define(
+            phi, ast.expressions.Logical(left, branch.token, operand)  # type: ignore
+        )
+
+    def copies(self, block: "Block", successor: "Block"):
+        """
+        Gives the phis of a block's successor their values for control
+        coming from it, all at once.
+        """
+        index = successor.predecessors.index(block)
+
+        moves: list[tuple[int, "Value"]] = []
+        for phi in successor.phis:
+            if phi.branch is not None and block is self.skip(phi.branch):
+                # assigned as the branch tested it
+                continue
+
+            moves.append((self.home(phi), phi.operands[index]))
+
+        sources = [value for _, value in moves]
+        trees = {value for value in sources if self.is_pending(value)}
+        if (
+            len(trees) != len(self.pending)
+            or any(
+                assigns or sources.count(value) > 1
+                for value, _, assigns in self.pending
+            )
+            or not self.in_order(moves)
+        ):
+            self.flush()
+        else:
+            destinations = {value: slot for slot, value in moves}
+            for value, expression, _ in list(self.pending):
+                self.out.append(
+                    ast.statements.Expression(
+                        self.assignment(destinations[value], expression)
+                    )
+                )
+            self.pending = []
+            moves = [(slot, value) for slot, value in moves if value not in trees]
+
+        self.parallel(moves)
+
+    def in_order(self, moves: list[tuple[int, "Value"]]) -> bool:
+        """
+        Whether the values waiting can be assigned straight to the phis
+        they are moved into, in the order they wait, without any of
+        them overwriting a home another move still has to read.
+        """
+        destinations = {value: slot for slot, value in moves}
+
+        later: set[int] = set()
+        for slot, value in moves:
+            if not self.is_pending(value) and value in self.materialised:
+                later.add(self.home(value))
+
+        for value, expression, _ in reversed(self.pending):
+            if destinations[value] in later:
+                return False
+
+            later |= Slots(expression).read
+
+        return True
+
+    def parallel(self, moves: list[tuple[int, "Value"]]):
+        """
+        Assigns each home its value as if all at once, saving one
+        being overwritten before it is read in a temporary.
+        """
+        remaining: list[tuple[int, "Value | int"]] = []
+        for slot, value in moves:
+            if (
+                type(value) is Instruction and value.op in REMATERIALISABLE
+            ) or self.home(value) != slot:
+                remaining.append((slot, value))
+
+        def source(value: "Value | int") -> int | None:
+            if type(value) is int:
+                return value
+            if type(value) is Instruction and value.op in REMATERIALISABLE:
+                return None
+            return self.home(value)  # type: ignore
+
+        while remaining:
+            read = {source(value) for _, value in remaining}
+
+            for i, (slot, value) in enumerate(remaining):
+                if slot not in read:
+                    if type(value) is int:
+                        expression = self.variable(value)
+                    else:
+                        expression = self.read(value)  # type: ignore
+
+                    self.statement(
+                        ast.statements.Expression(self.assignment(slot, expression))
+                    )
+                    del remaining[i]
+                    break
+            else:
+                # every home left is still to be read, round a cycle
+                slot = remaining[0][0]
+                temporary = self.new_slot()
+                self.statement(
+                    ast.statements.Expression(
+                        self.assignment(temporary, self.variable(slot))
+                    )
+                )
+                remaining = [
+                    (destination, temporary if source(value) == slot else value)
+                    for destination, value in remaining
+                ]
+
+    # declaring slots
+
+    def declare(
+        self, statements: list["ast.statements.Statement"]
+    ) -> list["ast.statements.Statement"]:
+        """
+        Turns the first assignment to each slot values are kept in into
+        its declaration, where that is a statement of its own in the
+        body. Other slots are left undeclared, since a frame starts out
+        nil, rather than spending a statement on each as the function
+        starts.
+        """
+        writes = FirstWrites()
+        writes.walk(statements)
+
+        for i, statement in enumerate(statements):
+            if type(statement) is not ast.statements.Expression:
+                continue
+
+            expression = statement.expr
+            if (
+                type(expression) is ast.expressions.Assignment
+                and expression.name is NAME
+                and writes.first.get(expression.slot) is expression  # type: ignore
+            ):
+                slot: int = expression.slot  # type: ignore
+                statements[i] = self.var(slot, expression.value)
+
+        return statements
+
+    def var(
+        self, slot: int, initialiser: "ast.expressions.Expression | None"
+    ) -> "ast.statements.Var":
+        var = ast.statements.Var(NAME, initialiser)
+        var.slot = slot
+        return var
+
+
+def generate(function: "Function") -> tuple[list["ast.statements.Statement"], int]:
+    """
+    Lowers a function in SSA form back into the statements of its
+    body, returning them and the number of slots its frame needs,
+    raising Unsupported if it can't be.
+    """
+    generator = CodeGenerator(function)
+    statements = generator.generate()
+    return statements, generator.slots
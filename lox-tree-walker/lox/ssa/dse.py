@@ -0,0 +1,206 @@
+from lox.lexer import TokenType
+from lox.ssa.analysis import dominates, dominators
+from lox.ssa.ir import EFFECTS, TERMINATORS, Block, Function, Instruction, Op, Phi
+from lox.ssa.ir import Value
+
+# the operators which only take numbers, and always give one
+ARITHMETIC = frozenset((TokenType.MINUS, TokenType.STAR, TokenType.SLASH))
+
+
+def numbers(function: "Function") -> set["Value"]:
+    """
+    The values which are always numbers, if they are computed at all,
+    assuming each phi is until one of its operands might not be.
+    """
+    known: set["Value"] = set()
+    pending: list["Value"] = []
+
+    for value in function.values():
+        if type(value) is Phi:
+            pending.append(value)
+            continue
+
+        instruction: "Instruction" = value  # type: ignore
+        op = instruction.op
+        operator = instruction.token.type if instruction.token else None
+        if op is Op.CONSTANT and type(instruction.constant) is float:
+            known.add(value)
+        elif op is Op.UNARY and operator is TokenType.MINUS:
+            known.add(value)
+        elif op is Op.BINARY and operator in ARITHMETIC:
+            known.add(value)
+        elif op is Op.BINARY and operator is TokenType.PLUS:
+            pending.append(value)
+
+    known.update(pending)
+
+    changed = True
+    while changed:
+        changed = False
+
+        for value in pending:
+            if value in known and not all(o in known for o in value.operands):
+                known.discard(value)
+                changed = True
+
+    return known
+
+
+def can_fail(instruction: "Instruction", numbers: set["Value"]) -> bool:
+    """
+    Whether an instruction could raise a runtime error.
+    """
+    op = instruction.op
+
+    if op in (Op.CONSTANT, Op.PARAMETER, Op.THIS, Op.PRINT) or op in TERMINATORS:
+        return False
+
+    if op is Op.UNARY:
+        if instruction.token.type is TokenType.BANG:  # type: ignore
+            return False
+        return instruction.operands[0] not in numbers
+
+    if op is Op.BINARY:
+        operator = instruction.token.type  # type: ignore
+        left, right = instruction.operands
+
+        if operator in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+            return False
+        elif left not in numbers or right not in numbers:
+            return True
+        elif operator is TokenType.SLASH:
+            return not (
+                type(right) is Instruction
+                and right.op is Op.CONSTANT
+                and right.constant != 0
+            )
+
+        return False
+
+    # reading a global or a field, or calling
+    return True
+
+
+class DeadStores:
+    """
+    Removes the stores to fields which are overwritten before they
+    could be read, then the values which nothing needs.
+
+    A store is overwritten by a later one to the same field of the
+    same object in its block, with nothing in between which could see
+    it: a read of a field, a call, or anything else that could fail,
+    after which the REPL could. The object must be known to be an
+    instance, as 'this' or something a field was read from or set on
+    before, or the store removed could have been the one to fail.
+
+    A value is needed if it has an effect, could fail, or is used by
+    something needed.
+    """
+
+    def __init__(self, function: "Function"):
+        self.function = function
+        self.numbers = numbers(function)
+        self.idom = dominators(function)
+
+        # where each value is used as the object of a field
+        self.objects: dict["Value", list[tuple["Block", int]]] = {}
+        for block in function.blocks:
+            for index, instruction in enumerate(block.instructions):
+                if instruction.op is Op.GET or instruction.op is Op.SET:
+                    location = (block, index)
+                    self.objects.setdefault(instruction.operands[0], []).append(
+                        location
+                    )
+
+    def is_instance(self, object: "Value", block: "Block", index: int) -> bool:
+        """
+        Whether an object is known to be an instance before the given
+        index in a block.
+        """
+        if type(object) is Instruction and object.op is Op.THIS:
+            return True
+
+        for used, position in self.objects.get(object, []):
+            if used is block and position < index:
+                return True
+            elif used is not block and dominates(self.idom, used, block):
+                return True
+
+        return False
+
+    def overwritten(self, block: "Block") -> set["Instruction"]:
+        removed: set["Instruction"] = set()
+        # the stores which nothing has seen yet, by object and field
+        stores: dict[tuple["Value", str], tuple["Instruction", int]] = {}
+
+        for index, instruction in enumerate(block.instructions):
+            op = instruction.op
+
+            if op is Op.SET:
+                object = instruction.operands[0]
+                key = (object, instruction.token.raw)  # type: ignore
+
+                if key in stores:
+                    store, position = stores[key]
+                    if self.is_instance(object, block, position):
+                        removed.add(store)
+
+                if not self.is_instance(object, block, index):
+                    stores.clear()
+                stores[key] = (instruction, index)
+            elif can_fail(instruction, self.numbers):
+                stores.clear()
+
+        return removed
+
+    def run(self) -> int:
+        removed = 0
+
+        for block in self.function.blocks:
+            stores = self.overwritten(block)
+            if stores:
+                block.instructions = [i for i in block.instructions if i not in stores]
+                removed += len(stores)
+
+        needed: set["Value"] = set()
+        work: list["Value"] = []
+
+        for value in self.function.values():
+            if type(value) is Phi:
+                continue
+
+            instruction: "Instruction" = value  # type: ignore
+            op = instruction.op
+            if (
+                op in EFFECTS
+                or op in TERMINATORS
+                or can_fail(instruction, self.numbers)
+            ):
+                needed.add(value)
+                work.append(value)
+
+        while work:
+            for operand in work.pop().operands:
+                if operand not in needed:
+                    needed.add(operand)
+                    work.append(operand)
+
+        for block in self.function.blocks:
+            phis = [phi for phi in block.phis if phi in needed]
+            instructions = [i for i in block.instructions if i in needed]
+
+            removed += len(block.phis) - len(phis)
+            removed += len(block.instructions) - len(instructions)
+            block.phis = phis
+            block.instructions = instructions
+
+        return removed
+
+
+def eliminate_dead_stores(function: "Function") -> int:
+    """
+    Removes the field stores of a function which are overwritten
+    before anything could see them, and the values which are never
+    needed, returning how many it removed.
+    """
+    return DeadStores(function).run()
@@ -0,0 +1,249 @@
+from lox.lexer import TokenType
+from lox.ssa.analysis import between, dominator_tree, dominators
+from lox.ssa.ir import Block, Function, Instruction, Op, Phi, Value
+
+# the operators whose operands can be swapped, for numbers or by equality
+COMMUTATIVE = frozenset((TokenType.STAR, TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL))
+
+MISSING = object()
+
+
+class ValueNumbering:
+    """
+    Numbers the values of a function a block at a time down its
+    dominator tree, replacing each with an earlier one it is known to
+    equal, as a dominating instruction with the same operator and
+    operands.
+
+    Reads of fields and globals are numbered too, by the state of
+    memory they read. A field keeps its value until something sets a
+    field of the same name or calls a function, and a global until
+    something assigns a global or calls a function, and the value just
+    set is known to be the one read back, so a read after a write is
+    replaced by the value written. That state is carried into a block
+    from its immediate dominator, less what the blocks which can run in
+    between write, on another path or around a loop. A read which would
+    fail can only be replaced by one which already succeeded.
+
+    A field read is only ever replaced by the value just set, though,
+    never by an earlier read: if the name is a method, each read binds
+    it afresh, and the two bound methods aren't equal.
+    """
+
+    def __init__(self, function: "Function"):
+        self.function = function
+
+        self.table: dict[tuple, "Value"] = {}
+        # how to undo the entries a block added, as it is left
+        self.log: list[tuple[tuple, object]] = []
+        self.replacements: dict["Value", "Value"] = {}
+
+        self.epochs = 0
+        self.fields = self.globals = 0
+        # the epochs of the fields set since the last call, by name
+        self.names: dict[str, int] = {}
+
+    def run(self) -> int:
+        idom = dominators(self.function)
+        children = dominator_tree(self.function)
+        # the state of memory at the end of each block
+        ends: dict["Block", tuple[int, int, dict[str, int]]] = {}
+        self.writes: dict["Block", tuple[bool, bool, set[str]]] = {}
+
+        stack: list[tuple["Block", int | None]] = [(self.function.entry, None)]
+        while stack:
+            block, undo = stack.pop()
+
+            if undo is not None:
+                while len(self.log) > undo:
+                    key, previous = self.log.pop()
+                    if previous is MISSING:
+                        del self.table[key]
+                    else:
+                        self.table[key] = previous  # type: ignore
+                continue
+
+            dominator = idom[block]
+            if block is self.function.entry:
+                self.fields = self.new_epoch()
+                self.globals = self.new_epoch()
+                self.names = {}
+            else:
+                self.fields, self.globals, self.names = ends[dominator]
+                if block.predecessors != [dominator]:
+                    self.forget(between(dominator, block))
+
+            stack.append((block, len(self.log)))
+            self.number(block)
+            ends[block] = (self.fields, self.globals, self.names)
+
+            for child in reversed(children[block]):
+                stack.append((child, None))
+
+        # the operands of phis along back edges, which were numbered later
+        for value in self.function.values():
+            value.operands = [self.leader(operand) for operand in value.operands]
+
+        return len(self.replacements)
+
+    def forget(self, blocks: set["Block"]):
+        """
+        Moves memory on past whatever the blocks could write.
+        """
+        calls = globals = False
+        names: set[str] = set()
+
+        for block in blocks:
+            if block not in self.writes:
+                self.writes[block] = self.summarise(block)
+
+            call, assigns, sets = self.writes[block]
+            calls |= call
+            globals |= assigns
+            names |= sets
+
+        if calls:
+            self.fields = self.new_epoch()
+            self.names = {}
+        elif names:
+            self.names = {**self.names}
+            for name in names:
+                self.names[name] = self.new_epoch()
+
+        if calls or globals:
+            self.globals = self.new_epoch()
+
+    def summarise(self, block: "Block") -> tuple[bool, bool, set[str]]:
+        """
+        Whether a block calls, or assigns a global, and the names of
+        the fields it sets.
+        """
+        ops = {instruction.op for instruction in block.instructions}
+        names = {
+            instruction.token.raw  # type: ignore
+            for instruction in block.instructions
+            if instruction.op is Op.SET
+        }
+        return (Op.CALL in ops, Op.SET_GLOBAL in ops, names)
+
+    def new_epoch(self) -> int:
+        self.epochs += 1
+        return self.epochs
+
+    def leader(self, value: "Value") -> "Value":
+        while value in self.replacements:
+            value = self.replacements[value]
+        return value
+
+    def define(self, key: tuple, value: "Value"):
+        self.log.append((key, self.table.get(key, MISSING)))
+        self.table[key] = value
+
+    def replace(self, key: tuple, value: "Value", number: bool = True) -> bool:
+        """
+        Replaces a value with the one numbered under the key before it,
+        if any, or else numbers it, if asked to.
+        """
+        existing = self.table.get(key)
+        if existing is None:
+            if number:
+                self.define(key, value)
+            return False
+
+        self.replacements[value] = existing
+        return True
+
+    def number(self, block: "Block"):
+        for phi in list(block.phis):
+            if phi.branch is not None:
+                # rebuilt as the value of a logical expression
+                continue
+
+            phi.operands = [self.leader(operand) for operand in phi.operands]
+            distinct = {operand for operand in phi.operands if operand is not phi}
+
+            if len(distinct) == 1:
+                self.replacements[phi] = distinct.pop()
+            elif not self.replace((Phi, block, *phi.operands), phi):
+                continue
+
+            block.phis.remove(phi)
+
+        instructions = []
+        for instruction in block.instructions:
+            instruction.operands = [
+                self.leader(operand) for operand in instruction.operands
+            ]
+
+            key = self.key(instruction)
+            number = instruction.op is not Op.GET
+            if key is not None and self.replace(key, instruction, number):
+                continue
+
+            self.clobber(instruction)
+            instructions.append(instruction)
+
+        block.instructions = instructions
+
+        terminator: "Instruction" = block.terminator  # type: ignore
+        terminator.operands = [self.leader(operand) for operand in terminator.operands]
+
+    def key(self, instruction: "Instruction") -> tuple | None:
+        op = instruction.op
+        operands = instruction.operands
+
+        if op is Op.CONSTANT:
+            # 1.0 and true are equal but not the same
+            return (op, repr(instruction.constant))
+        elif op is Op.THIS:
+            return (op,)
+        elif op is Op.UNARY:
+            return (op, instruction.token.type, *operands)  # type: ignore
+        elif op is Op.BINARY:
+            operator = instruction.token.type  # type: ignore
+            if operator in COMMUTATIVE:
+                operands = sorted(operands, key=lambda operand: operand.id)
+            return (op, operator, *operands)
+        elif op is Op.GET:
+            return (op, *self.field(instruction.token.raw), operands[0])  # type: ignore
+        elif op is Op.GLOBAL:
+            return (op, instruction.token.raw, self.globals)  # type: ignore
+
+        return None
+
+    def clobber(self, instruction: "Instruction"):
+        """
+        Moves memory on past an instruction which writes to it,
+        remembering the value written.
+        """
+        op = instruction.op
+        token = instruction.token
+
+        if op is Op.CALL:
+            self.fields = self.new_epoch()
+            self.globals = self.new_epoch()
+            self.names = {}
+        elif op is Op.SET:
+            name: str = token.raw  # type: ignore
+            # copied, as the blocks it dominates may still see the old one
+            self.names = {**self.names, name: self.new_epoch()}
+            object, value = instruction.operands
+            self.define((Op.GET, *self.field(name), object), value)
+        elif op is Op.SET_GLOBAL:
+            self.globals = self.new_epoch()
+            value = instruction.operands[0]
+            self.define((Op.GLOBAL, token.raw, self.globals), value)  # type: ignore
+
+    def field(self, name: str) -> tuple[str, int, int]:
+        """
+        A field's name with the state of memory it is read in.
+        """
+        return (name, self.fields, self.names.get(name, 0))
+
+
+def number_values(function: "Function") -> int:
+    """
+    Global value numbering: removes the values of a function which
+    equal one computed before them, returning how many it removed.
+    """
+    return ValueNumbering(function).run()
@@ -0,0 +1,166 @@
+from enum import Enum, auto
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import lox.ast as ast
+    from lox.lexer import Token
+
+
+class Op(Enum):
+    CONSTANT = auto()
+    PARAMETER = auto()
+    THIS = auto()
+
+    UNARY = auto()
+    BINARY = auto()
+    GLOBAL = auto()
+    GET = auto()
+
+    CALL = auto()
+    SET = auto()
+    SET_GLOBAL = auto()
+    PRINT = auto()
+
+    JUMP = auto()
+    BRANCH = auto()
+    RETURN = auto()
+
+
+# evaluated anywhere, any number of times, to the same value
+REMATERIALISABLE = frozenset((Op.CONSTANT, Op.THIS))
+
+# change something another instruction, or the program, could observe
+EFFECTS = frozenset((Op.CALL, Op.SET, Op.SET_GLOBAL, Op.PRINT))
+
+TERMINATORS = frozenset((Op.JUMP, Op.BRANCH, Op.RETURN))
+
+
+class Shape(Enum):
+    """
+    The statement or expression a branch was lowered from, which
+    lowering it back rebuilds.
+    """
+
+    IF = auto()
+    WHILE = auto()
+    AND = auto()
+    OR = auto()
+
+
+class Value:
+    """
+    Something a function computes, exactly once wherever it is
+    defined: an instruction or a phi.
+    """
+
+    __slots__ = ("id", "block", "operands")
+
+    def __init__(self, id: int, block: "Block", operands: list["Value"]):
+        self.id = id
+        self.block = block
+        self.operands = operands
+
+
+class Instruction(Value):
+    """
+    The token is the one the AST node it was lowered from reports
+    errors at: the operator of a unary or binary operation, the name
+    of a variable or field, or the closing parenthesis of a call.
+
+    A branch goes to its first target if its operand is truthy and to
+    its second if not, and keeps the shape it was lowered from and the
+    block its arms join at, the exit of a loop.
+    """
+
+    __slots__ = ("op", "token", "constant", "targets", "shape", "join")
+
+    def __init__(
+        self,
+        id: int,
+        block: "Block",
+        op: "Op",
+        operands: list["Value"],
+        token: "Token | None" = None,
+        constant: object = None,
+    ):
+        super().__init__(id, block, operands)
+        self.op = op
+        self.token = token
+        # the value of a constant, or the index of a parameter
+        self.constant = constant
+
+        self.targets: list["Block"] = []
+        self.shape: "Shape | None" = None
+        self.join: "Block | None" = None
+
+
+class Phi(Value):
+    """
+    Takes the operand for whichever predecessor control came from, in
+    the order of its block's predecessors.
+
+    The phi of a logical expression is the value of the expression,
+    and keeps the branch on its left operand.
+    """
+
+    __slots__ = ("branch",)
+
+    def __init__(self, id: int, block: "Block", branch: "Instruction | None" = None):
+        super().__init__(id, block, [])
+        self.branch = branch
+
+
+class Block:
+    """
+    A basic block: phis, then instructions which run one after the
+    other, ending in a terminator.
+
+    The header of a loop keeps the branch ending its condition.
+    """
+
+    __slots__ = ("id", "phis", "instructions", "terminator", "predecessors", "loop")
+
+    def __init__(self, id: int):
+        self.id = id
+        self.phis: list["Phi"] = []
+        self.instructions: list["Instruction"] = []
+        self.terminator: "Instruction | None" = None
+        self.predecessors: list["Block"] = []
+        self.loop: "Instruction | None" = None
+
+    @property
+    def successors(self) -> list["Block"]:
+        return self.terminator.targets if self.terminator else []
+
+
+class Function:
+    """
+    A function in SSA form, lowered from its declaration, whose
+    parameters are the first instructions of the entry block.
+    """
+
+    __slots__ = ("declaration", "blocks", "entry", "next_id")
+
+    def __init__(self, declaration: "ast.statements.Function"):
+        self.declaration = declaration
+        self.blocks: list["Block"] = []
+        self.next_id = 0
+
+        self.entry = self.new_block()
+
+    def new_block(self) -> "Block":
+        block = Block(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+    def values(self):
+        for block in self.blocks:
+            yield from block.phis
+            yield from block.instructions
+
+            if block.terminator:
+                yield block.terminator
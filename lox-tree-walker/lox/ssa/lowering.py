@@ -0,0 +1,417 @@
+import lox.ast as ast
+from lox.ast.expressions import VariableKind
+from lox.lexer import Token, TokenType
+from lox.passes.walker import Declaration, ScopedWalker
+from lox.ssa.analysis import reverse_postorder
+from lox.ssa.ir import REMATERIALISABLE, Block, Function, Instruction, Op, Phi, Shape
+from lox.ssa.ir import Value
+
+
+class Unsupported(Exception):
+    """
+    Raised lowering a function which declares functions or classes of
+    its own, or uses 'super', which the IR doesn't cover, or which sets
+    a field on something other than 'this' to a value that takes more
+    than a constant to compute.
+    """
+
+
+class Lowerer(ScopedWalker):
+    """
+    Lowers the body of a resolved function into SSA form, building
+    phis on the fly as described by Braun et al. in "Simple and
+    Efficient Construction of Static Single Assignment Form".
+
+    Local variables are tracked by the declaration, or the parameter,
+    they are bound to, so they become values and no longer need the
+    slots the resolver gave them. A block is sealed once all of its
+    predecessors are known, and reading a variable in one which isn't
+    yet, a loop header, leaves a phi to complete when it is.
+
+    The conditions of ifs and whiles, and the left operands of logical
+    expressions, each end their block in a branch, which keeps the
+    shape it was lowered from so it can be rebuilt. An if always gets
+    an else branch, if only an empty one, so that no block with more
+    than one successor leads straight to one with more than one
+    predecessor, where moving values into phis would have nowhere to
+    go.
+    """
+
+    def __init__(self, declaration: "ast.statements.Function"):
+        super().__init__()
+        self.function = Function(declaration)
+        self.block: "Block | None" = self.function.entry
+
+        self.definitions: dict["Declaration | Token", dict["Block", "Value"]] = {}
+        self.sealed: set["Block"] = set()
+        self.incomplete: dict["Block", dict["Declaration | Token", "Phi"]] = {}
+        self.replaced: dict["Phi", "Value"] = {}
+
+    def lower_function(self) -> "Function":
+        declaration = self.function.declaration
+        if declaration.body.statements is None:
+            raise Unsupported()
+
+        self.frames.append(dict(enumerate(declaration.params)))
+        for index, param in enumerate(declaration.params):
+            value = self.emit(Op.PARAMETER, [], param, index)
+            self.write(param, self.function.entry, value)
+        self.seal(self.function.entry)
+
+        self.walk(declaration.body.statements)
+        if self.block is not None:
+            self.terminate(Op.RETURN, [self.constant(None)])
+
+        self.simplify()
+        return self.function
+
+    def walk(self, statements: list["ast.statements.Statement"]):
+        for statement in statements:
+            if self.block is None:
+                # unreachable, after a return
+                return
+
+            statement.accept(self)
+
+    def lower(self, expr: "ast.expressions.Expression") -> "Value":
+        return expr.accept(self)
+
+    # building blocks
+
+    def emit(
+        self,
+        op: "Op",
+        operands: list["Value"],
+        token: "Token | None" = None,
+        constant: object = None,
+    ) -> "Instruction":
+        block: "Block" = self.block  # type: ignore
+        instruction = Instruction(
+            self.function.new_id(), block, op, operands, token, constant
+        )
+        block.instructions.append(instruction)
+        return instruction
+
+    def constant(self, value: object) -> "Instruction":
+        return self.emit(Op.CONSTANT, [], constant=value)
+
+    def terminate(
+        self,
+        op: "Op",
+        operands: list["Value"],
+        targets: list["Block"] | None = None,
+        token: "Token | None" = None,
+    ) -> "Instruction":
+        block: "Block" = self.block  # type: ignore
+        terminator = Instruction(self.function.new_id(), block, op, operands, token)
+        terminator.targets = targets or []
+        block.terminator = terminator
+
+        for target in terminator.targets:
+            target.predecessors.append(block)
+
+        self.block = None
+        return terminator
+
+    def branch(
+        self,
+        condition: "Value",
+        truthy: "Block",
+        falsy: "Block",
+        shape: "Shape",
+        join: "Block",
+        token: "Token | None" = None,
+    ) -> "Instruction":
+        branch = self.terminate(Op.BRANCH, [condition], [truthy, falsy], token)
+        branch.shape = shape
+        branch.join = join
+        return branch
+
+    def jump(self, target: "Block"):
+        if self.block is not None:
+            self.terminate(Op.JUMP, [], [target])
+
+    # variables
+
+    def write(self, variable: "Declaration | Token", block: "Block", value: "Value"):
+        self.definitions.setdefault(variable, {})[block] = value
+
+    def read(self, variable: "Declaration | Token", block: "Block") -> "Value":
+        value = self.definitions.get(variable, {}).get(block)
+        if value is None:
+            value = self.read_recursive(variable, block)
+
+        return self.resolve(value)
+
+    def read_recursive(
+        self, variable: "Declaration | Token", block: "Block"
+    ) -> "Value":
+        value: "Value"
+
+        if block not in self.sealed:
+            value = self.new_phi(block)
+            self.incomplete.setdefault(block, {})[variable] = value  # type: ignore
+        elif len(block.predecessors) == 1:
+            value = self.read(variable, block.predecessors[0])
+        else:
+            # breaks cycles through loops
+            phi = self.new_phi(block)
+            self.write(variable, block, phi)
+            value = self.add_operands(variable, phi)
+
+        self.write(variable, block, value)
+        return value
+
+    def new_phi(self, block: "Block") -> "Phi":
+        phi = Phi(self.function.new_id(), block)
+        block.phis.append(phi)
+        return phi
+
+    def add_operands(self, variable: "Declaration | Token", phi: "Phi") -> "Value":
+        for predecessor in phi.block.predecessors:
+            phi.operands.append(self.read(variable, predecessor))
+
+        return self.remove_trivial(phi)
+
+    def remove_trivial(self, phi: "Phi") -> "Value":
+        """
+        Replaces a phi whose operands are all the same value, other
+        than itself, with that value.
+        """
+        same = None
+
+        for operand in phi.operands:
+            operand = self.resolve(operand)
+            if operand is same or operand is phi:
+                continue
+            elif same is not None:
+                return phi
+            same = operand
+
+        if same is None:
+            # only reachable through itself
+            return phi
+
+        self.replaced[phi] = same
+        phi.block.phis.remove(phi)
+        return same
+
+    def resolve(self, value: "Value") -> "Value":
+        while value in self.replaced:
+            value = self.replaced[value]  # type: ignore
+        return value
+
+    def seal(self, block: "Block"):
+        for variable, phi in self.incomplete.pop(block, {}).items():
+            self.add_operands(variable, phi)
+
+        self.sealed.add(block)
+
+    def simplify(self):
+        """
+        Points uses of removed phis at what replaced them, removing any
+        phis which that leaves trivial in turn, and drops the blocks
+        nothing jumps to.
+        """
+        reachable = set(reverse_postorder(self.function))
+        self.function.blocks = [
+            block for block in self.function.blocks if block in reachable
+        ]
+
+        changed = True
+        while changed:
+            changed = False
+
+            for value in self.function.values():
+                value.operands = [self.resolve(operand) for operand in value.operands]
+
+            for block in self.function.blocks:
+                for phi in list(block.phis):
+                    if phi.branch is None and self.remove_trivial(phi) is not phi:
+                        changed = True
+
+    # statements
+
+    def visit_expression_statement(self, stmt: "ast.statements.Expression") -> None:
+        self.lower(stmt.expr)
+
+    def visit_print_statement(self, stmt: "ast.statements.Print") -> None:
+        self.emit(Op.PRINT, [self.lower(stmt.expr)])
+
+    def visit_var_statement(self, stmt: "ast.statements.Var") -> None:
+        if stmt.initialiser:
+            value = self.lower(stmt.initialiser)
+        else:
+            value = self.constant(None)
+
+        self.declare(stmt)
+        self.write(stmt, self.block, value)  # type: ignore
+
+    def visit_if_statement(self, stmt: "ast.statements.If") -> None:
+        condition = self.lower(stmt.condition)
+
+        then = self.function.new_block()
+        otherwise = self.function.new_block()
+        join = self.function.new_block()
+
+        self.branch(condition, then, otherwise, Shape.IF, join)
+        self.seal(then)
+        self.seal(otherwise)
+
+        self.block = then
+        stmt.then_branch.accept(self)
+        self.jump(join)
+
+        self.block = otherwise
+        if stmt.else_branch:
+            stmt.else_branch.accept(self)
+        self.jump(join)
+
+        self.seal(join)
+        self.block = join if join.predecessors else None
+
+    def visit_while_statement(self, stmt: "ast.statements.While") -> None:
+        header = self.function.new_block()
+        self.jump(header)
+
+        self.block = header
+        condition = self.lower(stmt.condition)
+
+        body = self.function.new_block()
+        exit = self.function.new_block()
+
+        header.loop = self.branch(condition, body, exit, Shape.WHILE, exit)
+        self.seal(body)
+        self.seal(exit)
+
+        self.block = body
+        stmt.body.accept(self)
+        self.jump(header)
+
+        # now every way into the header is known
+        self.seal(header)
+        self.block = exit
+
+    def visit_return_statement(self, stmt: "ast.statements.Return") -> None:
+        if stmt.value:
+            value = self.lower(stmt.value)
+        else:
+            value = self.constant(None)
+
+        self.terminate(Op.RETURN, [value])
+
+    def visit_function_statement(self, stmt: "ast.statements.Function") -> None:
+        raise Unsupported()
+
+    def visit_class_statement(self, stmt: "ast.statements.Class") -> None:
+        raise Unsupported()
+
+    # expressions
+
+    def visit_literal_expression(self, expr: "ast.expressions.Literal"):
+        return self.constant(expr.value)
+
+    def visit_grouping_expression(self, expr: "ast.expressions.Grouping"):
+        return self.lower(expr.expr)
+
+    def visit_unary_expression(self, expr: "ast.expressions.Unary"):
+        return self.emit(Op.UNARY, [self.lower(expr.right)], expr.operator)
+
+    def visit_binary_expression(self, expr: "ast.expressions.Binary"):
+        left = self.lower(expr.left)
+        right = self.lower(expr.right)
+        return self.emit(Op.BINARY, [left, right], expr.token)
+
+    def visit_variable_expression(self, expr: "ast.expressions.Variable"):
+        if expr.kind is not VariableKind.LOCAL:
+            return self.emit(Op.GLOBAL, [], expr.name)
+
+        variable = self.declaration_of(expr)
+        if variable is None:
+            raise Unsupported()
+        return self.read(variable, self.block)  # type: ignore
+
+    def visit_assignment_expression(self, expr: "ast.expressions.Assignment"):
+        value = self.lower(expr.value)
+
+        if expr.kind is not VariableKind.LOCAL:
+            self.emit(Op.SET_GLOBAL, [value], expr.name)
+            return value
+
+        variable = self.declaration_of(expr)
+        if variable is None:
+            raise Unsupported()
+
+        self.write(variable, self.block, value)  # type: ignore
+        return value
+
+    def visit_logical_expression(self, expr: "ast.expressions.Logical"):
+        left = self.lower(expr.left)
+
+        # the right operand, or straight to the join
+        right_block = self.function.new_block()
+        skip = self.function.new_block()
+        join = self.function.new_block()
+
+        if expr.token.type is TokenType.AND:
+            branch = self.branch(left, right_block, skip, Shape.AND, join, expr.token)
+        else:
+            branch = self.branch(left, skip, right_block, Shape.OR, join, expr.token)
+        self.seal(skip)
+        self.seal(right_block)
+
+        self.block = skip
+        self.jump(join)
+
+        self.block = right_block
+        right = self.lower(expr.right)
+        self.jump(join)
+
+        self.seal(join)
+        self.block = join
+
+        phi = Phi(self.function.new_id(), join, branch)
+        phi.operands = [left, right]
+        join.phis.insert(0, phi)
+        return phi
+
+    def visit_call_expression(self, expr: "ast.expressions.Call"):
+        callee = self.lower(expr.callee)
+        arguments = [self.lower(argument) for argument in expr.arguments]
+        return self.emit(Op.CALL, [callee] + arguments, expr.paren)
+
+    def visit_get_expression(self, expr: "ast.expressions.Get"):
+        return self.emit(Op.GET, [self.lower(expr.object)], expr.name)
+
+    def visit_set_expression(self, expr: "ast.expressions.Set"):
+        object = self.lower(expr.object)
+
+        block = self.block
+        start = len(block.instructions)  # type: ignore
+        value = self.lower(expr.value)
+
+        # the interpreter checks the object is an instance before it
+        # evaluates the value, which only 'this' is known to be
+        if not (type(object) is Instruction and object.op is Op.THIS):
+            if self.block is not block or any(
+                instruction.op not in REMATERIALISABLE
+                for instruction in block.instructions[start:]  # type: ignore
+            ):
+                raise Unsupported()
+
+        self.emit(Op.SET, [object, value], expr.name)
+        return value
+
+    def visit_this_expression(self, expr: "ast.expressions.This"):
+        return self.emit(Op.THIS, [], expr.keyword)
+
+    def visit_super_expression(self, expr: "ast.expressions.Super"):
+        raise Unsupported()
+
+
+def lower(declaration: "ast.statements.Function") -> "Function":
+    """
+    Lowers a resolved function, or method, into SSA form, raising
+    Unsupported if it can't be.
+    """
+    return Lowerer(declaration).lower_function()
@@ -0,0 +1,59 @@
+from lox.ssa.ir import Function, Instruction, Op, Phi
+
+
+def format_value(value: "Instruction | Phi") -> str:
+    operands = ", ".join(f"%{operand.id}" for operand in value.operands)
+
+    if type(value) is Phi:
+        name = f"phi {value.branch.shape.name.lower()}" if value.branch else "phi"
+        return f"%{value.id} = {name} {operands}"
+
+    instruction: "Instruction" = value  # type: ignore
+    op = instruction.op
+
+    if op is Op.CONSTANT:
+        text = f"constant {instruction.constant!r}"
+    elif op is Op.PARAMETER:
+        name = instruction.token.raw  # type: ignore
+        text = f"parameter {instruction.constant} {name}"
+    elif op is Op.JUMP:
+        text = f"jump block {instruction.targets[0].id}"
+    elif op is Op.BRANCH:
+        truthy, falsy = instruction.targets
+        shape = instruction.shape.name.lower()  # type: ignore
+        text = f"branch {shape} {operands} ? block {truthy.id} : block {falsy.id}"
+    else:
+        text = op.name.lower()
+        if instruction.token and op is not Op.THIS and op is not Op.CALL:
+            text += f" {instruction.token.raw}"
+        if operands:
+            text += f" {operands}"
+
+    if op in (Op.SET, Op.SET_GLOBAL, Op.PRINT, Op.JUMP, Op.BRANCH, Op.RETURN):
+        return text
+    return f"%{value.id} = {text}"
+
+
+def format_function(function: "Function") -> str:
+    """
+    A readable listing of a function, a block at a time, for instance
+
+        block 0:
+          %0 = parameter 0 n
+          %1 = constant 1.0
+          %2 = binary + %0, %1
+          return %2
+    """
+    lines = []
+
+    for block in function.blocks:
+        header = f"block {block.id}:"
+        if block.predecessors:
+            predecessors = ", ".join(str(p.id) for p in block.predecessors)
+            header = f"block {block.id}: (from {predecessors})"
+        lines.append(header)
+
+        for value in block.phis + block.instructions + [block.terminator]:
+            lines.append(f"  {format_value(value)}")  # type: ignore
+
+    return "\n".join(lines)
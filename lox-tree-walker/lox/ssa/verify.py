@@ -0,0 +1,108 @@
+from lox.ssa.analysis import dominates, dominators, reverse_postorder
+from lox.ssa.ir import TERMINATORS, Block, Function, Instruction, Op, Phi, Value
+
+
+class VerificationError(Exception):
+    """
+    A function broke one of the rules of the IR, which a pass got
+    wrong rather than anything about the program.
+    """
+
+
+def verify(function: "Function") -> None:
+    """
+    Checks the blocks of a function are well formed and every value
+    is defined before it is used, raising VerificationError if not.
+    """
+
+    def fail(block: "Block", message: str):
+        raise VerificationError(f"block {block.id}: {message}")
+
+    if function.entry.predecessors or function.entry.phis:
+        fail(function.entry, "the entry has predecessors or phis")
+
+    reachable = set(reverse_postorder(function))
+    blocks = set(function.blocks)
+    if reachable != blocks:
+        fail(function.entry, "not every block is reachable")
+
+    # where each value is defined, and its index in its block
+    defined: dict["Value", tuple["Block", int]] = {}
+
+    for block in function.blocks:
+        terminator = block.terminator
+        if terminator is None or terminator.op not in TERMINATORS:
+            fail(block, "doesn't end in a terminator")
+
+        for successor in block.successors:
+            if successor not in blocks:
+                fail(block, f"jumps to a missing block {successor.id}")
+            if successor.predecessors.count(block) != block.successors.count(
+                successor
+            ):
+                fail(successor, f"doesn't list block {block.id} as a predecessor")
+
+        for predecessor in block.predecessors:
+            if block not in predecessor.successors:
+                fail(block, f"block {predecessor.id} doesn't jump here")
+
+        if len(block.predecessors) != len(set(block.predecessors)):
+            fail(block, "is reached twice from the same block")
+
+        for phi in block.phis:
+            if type(phi) is not Phi or phi.block is not block:
+                fail(block, f"%{phi.id} isn't a phi of this block")
+            if len(phi.operands) != len(block.predecessors):
+                fail(block, f"%{phi.id} doesn't have an operand per predecessor")
+
+            defined[phi] = (block, -1)
+
+        for index, instruction in enumerate(block.instructions + [terminator]):
+            if type(instruction) is not Instruction or instruction.block is not block:
+                fail(block, f"%{instruction.id} isn't an instruction of this block")
+            if instruction.op in TERMINATORS and instruction is not terminator:
+                fail(block, f"%{instruction.id} terminates the middle of the block")
+            if instruction.op is Op.BRANCH and len(instruction.targets) != 2:
+                fail(block, f"%{instruction.id} doesn't branch two ways")
+
+            defined[instruction] = (block, index)
+
+    idom = dominators(function)
+
+    def available(value: "Value", block: "Block", index: int) -> bool:
+        """
+        Whether a value is defined before the given index of a block
+        on every path from the entry.
+        """
+        definition, position = defined[value]
+        if definition is block:
+            return position < index
+
+        return dominates(idom, definition, block)
+
+    for block in function.blocks:
+        for phi in block.phis:
+            for predecessor, operand in zip(block.predecessors, phi.operands):
+                if operand not in defined:
+                    fail(block, f"%{phi.id} uses %{operand.id}, which isn't defined")
+                if not available(operand, predecessor, len(predecessor.instructions)):
+                    fail(
+                        block,
+                        f"%{phi.id} uses %{operand.id}, which isn't defined at the "
+                        f"end of block {predecessor.id}",
+                    )
+
+        for index, instruction in enumerate(block.instructions + [block.terminator]):
+            for operand in instruction.operands:  # type: ignore
+                if operand not in defined:
+                    fail(
+                        block,
+                        f"%{instruction.id} uses %{operand.id}, "  # type: ignore
+                        "which isn't defined",
+                    )
+                if not available(operand, block, index):
+                    fail(
+                        block,
+                        f"%{instruction.id} uses %{operand.id} "  # type: ignore
+                        "before it is defined",
+                    )
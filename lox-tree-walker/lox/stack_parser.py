@@ -0,0 +1,346 @@
+from typing import TYPE_CHECKING, Generator
+
+if TYPE_CHECKING:
+    from lox.lexer import Token
+
+import lox.ast as ast
+from lox.lexer import TokenType
+from lox.errors import ParseError
+from lox.parser import INFIX, UNARY, Parser, Precedence
+
+
+# A rule yields the frames of the rules it calls, and is sent back
+# what each returned
+Frame = Generator["Frame", object, object]
+
+
+class StackParser(Parser):
+    """
+    The same parser with its call stack kept on the heap, so nesting
+    is limited by memory rather than by Python's recursion limit.
+
+    Each recursive rule is a generator. Where the recursive parser
+    calls a rule, a frame yields the generator for it instead, and
+    run() pushes it onto an explicit stack, steps it to completion
+    and sends the result back to the frame that asked. ParseErrors
+    are thrown into the waiting frames the same way, so the rules
+    read, and recover, exactly as they do in Parser.
+
+    Driving generators costs more per rule than plain calls, about
+    half again on typical code even with leaf primaries parsed
+    directly, so Parser only falls back to this for declarations
+    which overflow the recursion limit.
+    """
+
+    def declaration(self) -> "ast.statements.Statement | None":
+        return self.run(self.declaration_frame())  # type: ignore
+
+    def expression(self) -> "ast.expressions.Expression":
+        return self.run(self.expression_frame())  # type: ignore
+
+    @staticmethod
+    def run(frame: "Frame"):
+        stack = [frame]
+        value = None
+        error: "ParseError | None" = None
+
+        while True:
+            frame = stack[-1]
+
+            try:
+                if error is None:
+                    call = frame.send(value)
+                else:
+                    thrown, error = error, None
+                    call = frame.throw(thrown)
+            except StopIteration as done:
+                stack.pop()
+                value = done.value
+
+                if not stack:
+                    return value
+                continue
+            except ParseError as e:
+                stack.pop()
+                error = e
+
+                if not stack:
+                    raise
+                continue
+
+            stack.append(call)
+            value = None
+
+    """
+    Statements
+    """
+
+    def declaration_frame(self) -> "Frame":
+        try:
+            if self.match(TokenType.CLASS):
+                return (yield self.class_declaration_frame())
+
+            if self.match(TokenType.FUN):
+                return (yield self.function_declaration_frame("function"))
+
+            if self.match(TokenType.VAR):
+                return (yield self.variable_declaration_frame())
+
+            return (yield self.statement_frame())
+        except ParseError:
+            self.synchronise()
+            return None
+
+    def class_declaration_frame(self) -> "Frame":
+        name = self.consume(TokenType.IDENTIFIER, "Expected class name.")
+
+        superclass: "ast.expressions.Variable | None" = None
+        if self.match(TokenType.LESS):
+            self.consume(TokenType.IDENTIFIER, "Expected superclass name.")
+            superclass = ast.expressions.Variable(self.previous())
+
+        self.consume(TokenType.LEFT_BRACE, "Expected '{' before class body.")
+
+        methods: list["ast.statements.Function"] = []
+        while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+            methods.append((yield self.function_declaration_frame("method")))
+
+        self.consume(TokenType.RIGHT_BRACE, "Expected '}' after class body.")
+
+        return ast.statements.Class(name, superclass, methods)
+
+    def function_declaration_frame(self, kind: str) -> "Frame":
+        name = self.consume(TokenType.IDENTIFIER, f"Expected {kind} name.")
+        self.consume(TokenType.LEFT_PAREN, f"Expected '(' after {kind} name.")
+
+        params: list["Token"] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            params.append(
+                self.consume(TokenType.IDENTIFIER, f"Expected {kind} parameter name.")
+            )
+            while self.match(TokenType.COMMA):
+                if len(params) >= 255:
+                    self.error(self.peek(), "Can't have more than 255 parameters.")
+
+                params.append(
+                    self.consume(
+                        TokenType.IDENTIFIER, f"Expected {kind} parameter name."
+                    )
+                )
+
+        self.consume(TokenType.RIGHT_PAREN, f"Expected ')' after {kind} parameters.")
+        self.consume(TokenType.LEFT_BRACE, f"Expected '{{' before {kind} body.")
+
+        if self.lazy_functions and self.depth == 0:
+            body = self.skip_block()
+        else:
+            body = yield self.block_frame()
+
+        return ast.statements.Function(name, params, body)
+
+    def variable_declaration_frame(self) -> "Frame":
+        name = self.consume(TokenType.IDENTIFIER, "Expected variable name.")
+
+        initialiser = None
+        if self.match(TokenType.EQUAL):
+            initialiser = yield self.expression_frame()
+
+        self.consume(TokenType.SEMICOLON, "Expected assignment to end with ';'.")
+        return ast.statements.Var(name, initialiser)
+
+    def statement_frame(self) -> "Frame":
+        if self.match(TokenType.FOR):
+            return (yield self.for_statement_frame())
+
+        if self.match(TokenType.IF):
+            return (yield self.if_statement_frame())
+
+        if self.match(TokenType.WHILE):
+            return (yield self.while_statement_frame())
+
+        if self.match(TokenType.RETURN):
+            return (yield self.return_statement_frame())
+
+        if self.match(TokenType.PRINT):
+            return (yield self.print_statement_frame())
+
+        if self.match(TokenType.LEFT_BRACE):
+            return (yield self.block_frame())
+
+        return (yield self.expression_statement_frame())
+
+    def if_statement_frame(self) -> "Frame":
+        self.consume(TokenType.LEFT_PAREN, "Expected '(' after 'if'.")
+        condition = yield self.expression_frame()
+        self.consume(TokenType.RIGHT_PAREN, "Expected ')' after 'if'.")
+
+        then_branch = yield self.statement_frame()
+        else_branch = None
+        if self.match(TokenType.ELSE):
+            else_branch = yield self.statement_frame()
+
+        return ast.statements.If(condition, then_branch, else_branch)
+
+    def while_statement_frame(self) -> "Frame":
+        self.consume(TokenType.LEFT_PAREN, "Expected '(' after 'while'.")
+        condition = yield self.expression_frame()
+        self.consume(TokenType.RIGHT_PAREN, "Expected ')' after 'while'.")
+
+        body = yield self.statement_frame()
+
+        return ast.statements.While(condition, body)
+
+    def return_statement_frame(self) -> "Frame":
+        token = self.previous()
+
+        value = None
+        if not self.check(TokenType.SEMICOLON):
+            value = yield self.expression_frame()
+
+        self.consume(TokenType.SEMICOLON, "Expected ';' after 'return'.")
+        return ast.statements.Return(token, value)
+
+    def for_statement_frame(self) -> "Frame":
+        self.consume(TokenType.LEFT_PAREN, "Expected '(' after 'for'.")
+
+        initialiser = None
+        if self.match(TokenType.SEMICOLON):
+            initialiser = None
+        elif self.match(TokenType.VAR):
+            initialiser = yield self.variable_declaration_frame()
+        else:
+            initialiser = yield self.expression_statement_frame()
+
+        condition = None
+        if not self.check(TokenType.SEMICOLON):
+            condition = yield self.expression_frame()
+        self.consume(TokenType.SEMICOLON, "Expected ';' after loop condition.")
+
+        increment = None
+        if not self.check(TokenType.RIGHT_PAREN):
+            increment = yield self.expression_frame()
+        self.consume(TokenType.RIGHT_PAREN, "Expected ')' after loop condition.")
+
+        body = yield self.statement_frame()
+
+        if increment:
+            body = ast.statements.Block([body, ast.statements.Expression(increment)])
+
+        if condition is None:
+            condition = ast.expressions.Literal(True)
+        body = ast.statements.While(condition, body)
+
+        if initialiser:
+            body = ast.statements.Block([initialiser, body])
+
+        return body
+
+    def print_statement_frame(self) -> "Frame":
+        expr = yield self.expression_frame()
+        self.consume(TokenType.SEMICOLON, "Expected ';' after value.")
+
+        return ast.statements.Print(expr)
+
+    def block_frame(self) -> "Frame":
+        statements = []
+
+        self.depth += 1
+        while not (self.check(TokenType.RIGHT_BRACE) or self.is_at_end()):
+            declaration = yield self.declaration_frame()
+            if declaration:
+                statements.append(declaration)
+        self.depth -= 1
+
+        self.consume(TokenType.RIGHT_BRACE, "Expected closing '}'.")
+
+        return ast.statements.Block(statements)
+
+    def expression_statement_frame(self) -> "Frame":
+        expr = yield self.expression_frame()
+        self.consume(TokenType.SEMICOLON, "Expected ';' after expression.")
+
+        return ast.statements.Expression(expr)
+
+    """
+    Expressions
+    """
+
+    def expression_frame(self) -> "Frame":
+        expr = yield self.binary_frame(Precedence.OR)
+
+        if self.match(TokenType.EQUAL):
+            equals = self.previous()
+            value = yield self.expression_frame()
+
+            if isinstance(expr, ast.expressions.Variable):
+                return ast.expressions.Assignment(expr.name, value)
+            elif isinstance(expr, ast.expressions.Get):
+                return ast.expressions.Set(expr.object, expr.name, value)
+
+            self.error(equals, "Invalid assignment target.")
+
+        return expr
+
+    def binary_frame(self, precedence: int) -> "Frame":
+        expr = yield self.unary_frame()
+
+        while True:
+            rule = INFIX.get(self.current_token.type)
+            if rule is None or rule[0] < precedence:
+                return expr
+
+            _, right_precedence, node = rule
+            operator = self.advance()
+            right = yield self.binary_frame(right_precedence)
+
+            expr = node(expr, operator, right)
+
+    def unary_frame(self) -> "Frame":
+        if self.current_token.type in UNARY:
+            operator = self.advance()
+            right = yield self.call_frame()
+
+            return ast.expressions.Unary(operator, right)
+
+        return (yield self.call_frame())
+
+    def call_frame(self) -> "Frame":
+        # only a grouping recurses, every other primary is a leaf
+        if self.current_token.type is TokenType.LEFT_PAREN:
+            expr = yield self.grouping_frame()
+        else:
+            expr = self.primary()
+
+        while True:
+            if self.match(TokenType.LEFT_PAREN):
+                expr = yield self.finish_call_frame(expr)
+            elif self.match(TokenType.DOT):
+                name = self.consume(
+                    TokenType.IDENTIFIER, "Expected property name after '.'."
+                )
+                expr = ast.expressions.Get(expr, name)
+            else:
+                break
+
+        return expr
+
+    def finish_call_frame(self, callee: "ast.expressions.Expression") -> "Frame":
+        arguments: list["ast.expressions.Expression"] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            arguments.append((yield self.expression_frame()))
+            while self.match(TokenType.COMMA):
+                if len(arguments) >= 255:
+                    self.error(self.peek(), "Can't have more than 255 arguments.")
+
+                arguments.append((yield self.expression_frame()))
+
+        token = self.consume(TokenType.RIGHT_PAREN, "Expected ')' after arguments.")
+
+        return ast.expressions.Call(callee, token, arguments)
+
+    def grouping_frame(self) -> "Frame":
+        self.advance()
+        expr = yield self.expression_frame()
+        self.consume(TokenType.RIGHT_PAREN, "Expected ')' after expression.")
+
+        return ast.expressions.Grouping(expr)
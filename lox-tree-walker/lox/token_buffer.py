@@ -0,0 +1,73 @@
+from array import array
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from mmap import mmap
+
+from lox.lexer import RegexLexer, Token, TokenType, make_token
+
+
+# TokenType values start at 1, index 0 is never used
+TYPES: list[TokenType] = [TokenType.NONE, *TokenType]
+
+
+class TokenBuffer:
+    """
+    A struct-of-arrays token store over the original source string.
+
+    A list of Token objects costs a Python object and a copy of the
+    lexeme per token. Here a token is a row across four
+    machine-int columns, so the whole stream costs a handful of bytes
+    per token. Token objects are only built when indexed or iterated,
+    which is when the parser or error reporting actually needs one,
+    and are dropped again unless something like the AST keeps them.
+
+    Over UTF-8 bytes, offsets and lengths are in bytes and lexemes are
+    decoded as their tokens are built.
+    """
+
+    def __init__(self, source: "str | bytes | mmap"):
+        self.source = source
+
+        self.types = array("B")
+        self.starts = array("I")
+        self.lengths = array("I")
+        self.lines = array("I")
+
+    @classmethod
+    def from_source(cls, source: "str | bytes | mmap") -> "TokenBuffer":
+        buffer = cls(source)
+
+        types = buffer.types
+        starts = buffer.starts
+        lengths = buffer.lengths
+        lines = buffer.lines
+
+        for type, start, end, line in RegexLexer(source).iter_spans():
+            types.append(type.value)
+            starts.append(start)
+            lengths.append(end - start)
+            lines.append(line)
+
+        return buffer
+
+    def type_at(self, index: int) -> TokenType:
+        return TYPES[self.types[index]]
+
+    def raw_at(self, index: int) -> str:
+        start = self.starts[index]
+        raw = self.source[start : start + self.lengths[index]]
+
+        return raw if isinstance(raw, str) else raw.decode()
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        return make_token(
+            TYPES[self.types[index]], self.raw_at(index), self.lines[index]
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield self[index]
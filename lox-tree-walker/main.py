@@ -1,18 +1,23 @@
+import os
 import sys
 
 from lox import Lox
+from lox.cache import ENVIRONMENT
 
 
 def main():
-    if len(sys.argv) > 2:
-        print("Usage: python main.py [script]")
-    elif len(sys.argv) == 2:
-        with open(sys.argv[1], "r") as f:
-            Lox.run_program(f.read())
-            if Lox.had_parse_error:
-                sys.exit(1)
-            elif Lox.had_runtime_error:
-                sys.exit(2)
+    if len(sys.argv) > 1:
+        use_cache = os.environ.get(ENVIRONMENT, "") not in ("", "0")
+
+        if len(sys.argv) == 2:
+            Lox.run_file(sys.argv[1], use_cache)
+        else:
+            Lox.run_files(sys.argv[1:], use_cache=use_cache)
+
+        if Lox.had_parse_error:
+            sys.exit(1)
+        elif Lox.had_runtime_error:
+            sys.exit(2)
     else:
         Lox.start_repl()
 
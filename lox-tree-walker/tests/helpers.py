@@ -0,0 +1,62 @@
+import io
+from contextlib import redirect_stdout
+
+from lox import Lox
+from lox.interpreter import Interpreter
+from lox.lexer import RegexLexer, Token
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+
+def dump(node) -> object:
+    """
+    A comparable structure for an AST, so trees produced by
+    different front ends can be checked for equality.
+    """
+    if isinstance(node, Token):
+        return (node.type, node.raw, node.line, node.literal)
+
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+
+    if not hasattr(node, "accept"):
+        return node
+
+    fields = {}
+    for klass in type(node).__mro__:
+        for name in getattr(klass, "__slots__", ()):
+            fields[name] = getattr(node, name)
+    fields.update(getattr(node, "__dict__", {}))
+
+    return (
+        type(node).__qualname__,
+        {name: dump(value) for name, value in sorted(fields.items())},
+    )
+
+
+def run(source: str, **options) -> str:
+    """
+    Runs a program on a fresh interpreter and returns what it printed,
+    including any errors.
+    """
+    Lox._interpreter = Interpreter()
+    Lox.had_parse_error = False
+    Lox.had_runtime_error = False
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        Lox.run_program(source, **options)
+
+    Lox.had_parse_error = False
+    Lox.had_runtime_error = False
+    return output.getvalue()
+
+
+def resolve(source: str, lazy_functions: bool = False) -> list:
+    """
+    Parses and resolves a program, ready for the passes under test to
+    run over.
+    """
+    program = Parser(RegexLexer(source).iter_tokens(), lazy_functions).parse()
+    Resolver().resolve_statements(program)
+    return program
@@ -0,0 +1,95 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from lox import Lox
+from lox.batch import front_end, load_files
+from lox.interpreter import Interpreter
+
+
+class TestBatch(unittest.TestCase):
+    files = {
+        "a.lox": 'fun greet(name) { return "hi " + name; }\nvar count = 1;',
+        "b.lox": "class Counter {\n  init() { this.n = count; }\n"
+        "  next() { var n = this.n; this.n = n + 1; return n; } }",
+        "c.lox": 'var c = Counter();\nc.next();\nprint greet("there");\n'
+        "{ var count = 10; fun get() { return count; } print get() + c.next(); }",
+    }
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+
+        for name, source in self.files.items():
+            path = os.path.join(self.directory.name, name)
+            with open(path, "w") as f:
+                f.write(source)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        Lox.had_parse_error = False
+        Lox.had_runtime_error = False
+
+    def run_files(self, paths: list[str], **options) -> str:
+        Lox._interpreter = Interpreter()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            Lox.run_files(paths, **options)
+
+        return output.getvalue()
+
+    def test_matches_single_program(self):
+        expected = "hi there\n12\n"
+
+        self.assertEqual(self.run_files(self.paths, max_workers=1), expected)
+        self.assertEqual(
+            self.run_files(self.paths, max_workers=2, use_cache=False), expected
+        )
+        # and again from the cache the first run filled
+        self.assertEqual(self.run_files(self.paths, max_workers=2), expected)
+
+    def test_errors_in_file_order(self):
+        with open(self.paths[0], "w") as f:
+            f.write("print ;")
+        with open(self.paths[2], "w") as f:
+            f.write("return 1;")
+
+        output = self.run_files(self.paths, max_workers=2, use_cache=False)
+
+        self.assertTrue(Lox.had_parse_error)
+        self.assertEqual(
+            output,
+            "[line 1] ParseError at ';': Expected expression.\n"
+            "[line 1] ParseError at 'return': Can't return from top-level code.\n",
+        )
+
+    def test_front_end_returns_nothing_on_error(self):
+        with open(self.paths[0], "w") as f:
+            f.write("var;")
+
+        data, errors = front_end(self.paths[0], use_cache=False)
+
+        self.assertIsNone(data)
+        self.assertIn("ParseError", errors)
+        self.assertFalse(Lox.had_parse_error)
+
+    def test_front_end_hits_empty_cached_file(self):
+        path = os.path.join(self.directory.name, "empty.lox")
+        open(path, "w").close()
+
+        expected = front_end(path, use_cache=True)
+        with mock.patch("lox.parser.Parser", side_effect=AssertionError):
+            self.assertEqual(front_end(path, use_cache=True), expected)
+
+    def test_program_is_stitched_in_order(self):
+        program = load_files(self.paths, max_workers=2, use_cache=False)
+
+        names = [type(statement).__name__ for statement in program]
+        self.assertEqual(
+            names, ["Function", "Var", "Class", "Var", "Expression", "Print", "Block"]
+        )
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import lox
+from lox.cache import ProgramCache
+
+from tests.helpers import run
+
+
+class TestProgramCache(unittest.TestCase):
+    source = """var a = "global";
+{
+  fun show() { print a; }
+  show();
+  var a = "block";
+  show();
+  print a;
+}
+"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ProgramCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def entries(self) -> list[str]:
+        return sorted(os.listdir(self.directory.name))
+
+    def test_hit_keeps_resolution(self):
+        expected = "global\nglobal\nblock\n"
+
+        self.assertEqual(run(self.source, cache=self.cache), expected)
+        self.assertEqual(len(self.entries()), 1)
+        self.assertIsNotNone(self.cache.load(self.source))
+
+        self.assertEqual(run(self.source, cache=self.cache), expected)
+
+    def test_hit_skips_front_end(self):
+        run(self.source, cache=self.cache)
+
+        with mock.patch("lox.parser.Parser", side_effect=AssertionError):
+            output = run(self.source, cache=self.cache)
+
+        self.assertEqual(output, "global\nglobal\nblock\n")
+
+    def test_empty_program_is_a_hit(self):
+        run("", cache=self.cache)
+
+        with mock.patch("lox.parser.Parser", side_effect=AssertionError):
+            self.assertEqual(run("", cache=self.cache), "")
+
+    def test_hit_in_read_only_directory(self):
+        run(self.source, cache=self.cache)
+
+        with mock.patch("os.utime", side_effect=PermissionError):
+            self.assertIsNotNone(self.cache.load(self.source))
+
+    def test_errors_are_not_cached(self):
+        run("print ;", cache=self.cache)
+        run("return 1;", cache=self.cache)
+
+        self.assertEqual(self.entries(), [])
+
+    def test_key_includes_version(self):
+        key = self.cache.key(self.source)
+        self.assertEqual(self.cache.key(self.source.encode()), key)
+
+        version = lox.__version__
+        lox.__version__ = version + "+changed"
+        try:
+            self.assertNotEqual(self.cache.key(self.source), key)
+        finally:
+            lox.__version__ = version
+
+    def test_corrupt_entry_is_a_miss(self):
+        run(self.source, cache=self.cache)
+        with open(self.cache.path(self.cache.key(self.source)), "wb") as f:
+            f.write(b"not a program")
+
+        self.assertIsNone(self.cache.load(self.source))
+        self.assertEqual(run(self.source, cache=self.cache), "global\nglobal\nblock\n")
+
+    def test_least_recently_used_is_evicted(self):
+        sources = [f"print {i};" for i in range(3)]
+        for source in sources:
+            run(source, cache=self.cache)
+
+        size = os.path.getsize(self.cache.path(self.cache.key(sources[0])))
+        for i, source in enumerate(sources):
+            path = self.cache.path(self.cache.key(source))
+            os.utime(path, ns=(i, i))
+
+        # reading the oldest makes the second the least recently used
+        self.cache.load(sources[0])
+        self.cache.max_size = 3 * size
+        run("print 3;", cache=self.cache)
+
+        self.assertIsNotNone(self.cache.load(sources[0]))
+        self.assertIsNone(self.cache.load(sources[1]))
+        self.assertIsNotNone(self.cache.load(sources[2]))
+        self.assertIsNotNone(self.cache.load("print 3;"))
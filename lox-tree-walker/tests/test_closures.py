@@ -0,0 +1,141 @@
+import unittest
+
+from lox.ast.expressions import VariableKind
+from lox.passes import convert_closures
+
+from tests.helpers import resolve, run
+
+
+class TestClosureConversion(unittest.TestCase):
+    def convert(self, source: str):
+        program = resolve(source)
+
+        convert_closures(program)
+        return program
+
+    def test_captures_only_free_variables(self):
+        source = """fun outer(unused, a) {
+  var big = "big";
+  var b = 1;
+  fun middle() {
+    fun inner() { return a + b; }
+    return inner;
+  }
+  return middle;
+}
+"""
+        outer = self.convert(source)[0]
+        big, b, middle = outer.body.statements[:3]
+        inner = middle.body.statements[0]
+
+        self.assertEqual(outer.captured_params, [1])
+        self.assertEqual((big.captured, b.captured), (False, True))
+
+        self.assertEqual(
+            middle.captures, [(VariableKind.CELL, 0, 1), (VariableKind.CELL, 0, 3)]
+        )
+        self.assertEqual(
+            inner.captures, [(VariableKind.FREE, None, 0), (VariableKind.FREE, None, 1)]
+        )
+
+        add = inner.body.statements[0].value
+        self.assertEqual((add.left.kind, add.left.slot), (VariableKind.FREE, 0))
+        self.assertEqual((add.right.kind, add.right.slot), (VariableKind.FREE, 1))
+
+    def test_uses_before_capture_become_cells(self):
+        source = """fun f() {
+  { var a = 1; print a; }
+  var b = 2;
+  print b;
+  fun g() { return b; }
+}
+"""
+        f = self.convert(source)[0]
+        block, b, print_b = f.body.statements[:3]
+
+        # a and b share a slot, but only b is captured
+        self.assertEqual(block.statements[1].expr.kind, VariableKind.LOCAL)
+        self.assertEqual(print_b.expr.kind, VariableKind.CELL)
+
+    def test_closures(self):
+        source = """fun counter() {
+  var count = 0;
+  fun increment() { count = count + 1; return count; }
+  fun get() { return count; }
+  increment();
+  print count;
+  return get;
+}
+print counter()();
+
+fun adder(a) {
+  return curry(a);
+}
+fun curry(a) {
+  fun add(b) {
+    fun again(c) { a = a + 1; return a + b + c; }
+    return again;
+  }
+  return add;
+}
+var add = adder(1)(2);
+print add(3);
+print add(3);
+"""
+        self.assertEqual(run(source), "1\n1\n7\n8\n")
+
+    def test_loop_variables(self):
+        source = """var closures = nil;
+class Node { init(value, next) { this.value = value; this.next = next; } }
+for (var i = 0; i < 3; i = i + 1) {
+  var j = i;
+  fun get() { return i * 10 + j; }
+  closures = Node(get, closures);
+}
+while (closures != nil) {
+  print closures.value();
+  closures = closures.next;
+}
+"""
+        self.assertEqual(run(source), "32\n31\n30\n")
+
+    def test_recursive_local_functions_and_classes(self):
+        source = """{
+  fun count(n) { if (n > 0) count(n - 1); print n; }
+  count(2);
+
+  class Tree {
+    init(depth) {
+      if (depth > 0) this.child = Tree(depth - 1);
+      this.depth = depth;
+    }
+  }
+  print Tree(2).child.child.depth;
+}
+"""
+        self.assertEqual(run(source), "0\n1\n2\n0\n")
+
+    def test_this_and_super_in_nested_functions(self):
+        source = """class A { name() { return "A"; } }
+fun make(prefix) {
+  class B < A {
+    init() { this.suffix = "!"; }
+    name() {
+      fun inner() { return prefix + super.name() + this.suffix; }
+      return inner;
+    }
+  }
+  return B;
+}
+var b = make("B")();
+print b.name()();
+print b.init() == b;
+"""
+        self.assertEqual(run(source), "BA!\ntrue\n")
+
+    def test_lazy_methods(self):
+        source = """class A { get() { return "A"; } }
+class B < A { get() { fun inner() { return super.get() + "B"; } return inner(); } }
+print B().get();
+"""
+        self.assertEqual(run(source, lazy_functions=True), "AB\n")
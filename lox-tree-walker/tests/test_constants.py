@@ -0,0 +1,85 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from lox import Lox
+from lox.interpreter import Interpreter
+from lox.passes import devirtualise
+from lox.passes.constants import GlobalUses
+
+from tests.helpers import resolve, run
+
+
+class TestDevirtualise(unittest.TestCase):
+    def bound(self, source: str, lazy_functions: bool = False) -> dict[str, bool]:
+        """
+        Devirtualises a program and returns, for each call through a
+        global, whether it was bound.
+        """
+        program = resolve(source, lazy_functions)
+
+        devirtualise(program)
+
+        uses = GlobalUses()
+        uses.walk(program)
+        return {
+            f"{call.callee.name.raw}/{len(call.arguments)}": call.function is not None
+            for call in uses.calls
+        }
+
+    def test_binds_constant_functions(self):
+        source = """fun f(a) { return a; }
+fun g() { return f(1) + f(1, 2); }
+print g();
+"""
+        self.assertEqual(self.bound(source), {"f/1": True, "f/2": False, "g/0": True})
+
+    def test_leaves_other_globals(self):
+        source = """fun assigned() {} fun reassign() { assigned = nil; }
+fun twice() {} fun twice() {}
+var variable = assigned;
+class Klass {}
+fun shadowed() {}
+fun local() { fun shadowed() {} shadowed(); }
+assigned(); twice(); variable(); Klass(); clock(); local();
+"""
+        self.assertEqual(
+            self.bound(source),
+            {
+                "assigned/0": False,
+                "twice/0": False,
+                "variable/0": False,
+                "Klass/0": False,
+                "clock/0": False,
+                "local/0": True,
+            },
+        )
+
+    def test_lazy_bodies_count_as_assigning(self):
+        source = "fun f() {} fun g() { f = nil; } fun h() {} f(); h();"
+
+        self.assertEqual(
+            self.bound(source, lazy_functions=True), {"f/0": False, "h/0": True}
+        )
+
+    def test_runtime_errors_are_unchanged(self):
+        self.assertEqual(
+            run("f();\nfun f() {}"),
+            "[line 1] RuntimeError: Undefined variable 'f'.\n",
+        )
+        self.assertEqual(
+            run("fun f(a) {}\nf();"),
+            "[line 2] RuntimeError: Expected 1 arguments but received 0.\n",
+        )
+
+    def test_redefined_in_later_program(self):
+        Lox._interpreter = Interpreter()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            Lox.run_program("fun f() { return 1; } fun g() { return f(); }")
+            Lox.run_program("print g();")
+            Lox.run_program("fun f() { return 2; }")
+            Lox.run_program("print g();")
+
+        self.assertEqual(output.getvalue(), "1\n2\n")
@@ -0,0 +1,135 @@
+import unittest
+
+from lox import Lox
+from lox.passes import ControlFlowGraph, eliminate_dead_code, fold_constants
+
+from tests.helpers import resolve, run
+
+
+def parse(source: str, lazy_functions: bool = False):
+    program = resolve(source, lazy_functions)
+
+    fold_constants(program)
+    return program
+
+
+class TestControlFlowGraph(unittest.TestCase):
+    def reachable(self, source: str) -> list[bool]:
+        """
+        Whether each statement in the body of the function declared
+        first is reachable.
+        """
+        body = parse(source)[0].body.statements
+        reachable = ControlFlowGraph(body).reachable_statements()
+
+        return [stmt in reachable for stmt in body]
+
+    def test_return(self):
+        source = "fun f(a) { print a; if (a) return 1; else return 2; print a; }"
+        self.assertEqual(self.reachable(source), [True, True, False])
+
+        source = "fun f(a) { if (a) return 1; print a; { return 2; } print a; }"
+        self.assertEqual(self.reachable(source), [True, True, True, False])
+
+    def test_constant_conditions(self):
+        source = "fun f(a) { while (true) print a; print a; }"
+        self.assertEqual(self.reachable(source), [True, False])
+
+        source = "fun f(a) { while (true) return a; print a; }"
+        self.assertEqual(self.reachable(source), [True, False])
+
+        source = "fun f(a) { if (nil) return a; print a; }"
+        self.assertEqual(self.reachable(source), [True, True])
+
+        source = 'fun f(a) { if ("") return 1; else return 2; print a; }'
+        self.assertEqual(self.reachable(source), [True, False])
+
+    def test_loops(self):
+        source = "fun f(a) { while (a) { return a; print a; } print a; }"
+        body = parse(source)[0].body.statements
+        graph = ControlFlowGraph(body)
+        reachable = graph.reachable_statements()
+
+        loop = body[0].body.statements
+        self.assertEqual([stmt in reachable for stmt in loop], [True, False])
+        self.assertIn(body[1], reachable)
+
+
+class TestDeadCodeElimination(unittest.TestCase):
+    def test_removes_dead_code(self):
+        source = """fun unused() { return 1; }
+fun even(n) { if (n == 0) return true; return odd(n - 1); }
+fun odd(n) { if (n == 0) return false; return even(n - 1); }
+fun helper() { return 2; }
+fun main() {
+  var debug = false;
+  if (debug) print "debug";
+  while (false) print "never";
+  var k = 3;
+  {
+    return k + helper();
+    print "after";
+  }
+}
+print main();
+"""
+        program = parse(source)
+        eliminated = eliminate_dead_code(program)
+
+        self.assertEqual(len(program), 3)
+        helper, main = program[:2]
+        self.assertEqual(helper.name.raw, "helper")
+        self.assertEqual(len(main.body.statements), 1)
+        self.assertEqual(len(main.body.statements[0].statements), 1)
+
+        self.assertEqual(
+            (eliminated.unreachable, eliminated.branches, eliminated.declarations),
+            (1, 4, 12),
+        )
+
+    def test_keeps_effects(self):
+        source = """class A {}
+class B < A {}
+var a = clock;
+var b = 1 + "b";
+fun f() { var c = d; }
+print f;
+"""
+        program = parse(source)
+        eliminate_dead_code(program)
+
+        self.assertEqual(
+            [stmt.name.raw for stmt in program[:5]], ["A", "B", "a", "b", "f"]
+        )
+        self.assertEqual(len(program[4].body.statements), 1)
+
+    def test_lazy_bodies_use_globals(self):
+        source = "fun f() { return g(); } fun g() { return 1; } fun h() {} print f();"
+
+        program = parse(source, lazy_functions=True)
+        eliminate_dead_code(program)
+
+        self.assertEqual([stmt.name.raw for stmt in program[:2]], ["f", "g"])
+        self.assertEqual(len(program), 3)
+
+    def test_run_program(self):
+        source = """fun count(n) {
+  var total = 0;
+  while (n > 0) {
+    if (false) print "never"; else total = total + n;
+    n = n - 1;
+  }
+  return total;
+  print "after";
+}
+print count(4);
+"""
+        self.assertEqual(run(source, eliminate_dead_code=True), "10\n")
+        self.assertEqual(
+            str(Lox.dead_code),
+            "3 statements removed: 1 unreachable, 2 in constant branches, "
+            "0 in unused declarations",
+        )
+
+        run(source)
+        self.assertIsNone(Lox.dead_code)
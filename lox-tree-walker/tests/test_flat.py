@@ -0,0 +1,76 @@
+import unittest
+
+from lox.ast.flat import FlatAST, FlatVisitor, NodeKind
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+from tests.helpers import dump
+
+
+class TestFlatAST(unittest.TestCase):
+    source = """fun fib(n) {
+  if (n <= 1) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+
+class A { init(x) { this.x = x; } get() { return this.x; } }
+class B < A { get() { return super.get() + 1; } }
+
+for (var i = 0; i < 3; i = i + 1) {
+  var b = B(i);
+  b.x = !(b.get() == 1.0) or nil and true;
+  print "got" + " " + -b.x;
+}
+
+var empty;
+while (false) {}
+"""
+
+    def parse(self, source: str):
+        return Parser(RegexLexer(source).iter_tokens()).parse()
+
+    def test_round_trip(self):
+        program = self.parse(self.source)
+        flat = FlatAST.from_tree(program)
+
+        self.assertEqual(dump(flat.to_tree()), dump(program))
+
+    def test_round_trip_through_bytes(self):
+        program = self.parse(self.source)
+        flat = FlatAST.from_bytes(FlatAST.from_tree(program).to_bytes())
+
+        self.assertEqual(dump(flat.to_tree()), dump(program))
+
+    def test_round_trip_keeps_resolution(self):
+        program = self.parse(self.source)
+        Resolver().resolve_statements(program)
+
+        flat = FlatAST.from_bytes(FlatAST.from_tree(program).to_bytes())
+
+        self.assertEqual(dump(flat.to_tree()), dump(program))
+
+    def test_constants_are_shared(self):
+        flat = FlatAST.from_tree(self.parse("print 1; print 1; print true;"))
+
+        self.assertEqual(flat.constants, [1.0, True])
+
+    def test_visitor(self):
+        class Counter(FlatVisitor):
+            def __init__(self, flat):
+                super().__init__(flat)
+                self.binaries = 0
+
+            def __getattr__(self, name):
+                return lambda index: None
+
+            def visit_binary(self, index):
+                self.binaries += 1
+
+        flat = FlatAST.from_tree(self.parse("print 1 + 2; print 3 * 4; print 5;"))
+        counter = Counter(flat)
+        for root in flat.roots:
+            counter.visit(flat.a[root])
+
+        self.assertEqual(counter.binaries, 2)
+        self.assertEqual(flat.kinds[flat.roots[2]], NodeKind.PRINT)
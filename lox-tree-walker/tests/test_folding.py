@@ -0,0 +1,87 @@
+import unittest
+
+from lox.ast.expressions import Binary, Literal, Variable
+from lox.passes import fold_constants
+
+from tests.helpers import resolve, run
+
+
+class TestConstantFolding(unittest.TestCase):
+    def fold(self, source: str):
+        program = resolve(source)
+
+        fold_constants(program)
+        return program
+
+    def folded(self, source: str) -> object:
+        """
+        The value an expression statement folds to, or None if it
+        isn't folded.
+        """
+        expr = self.fold(source)[0].expr
+        return expr.value if isinstance(expr, Literal) else None
+
+    def test_folds_operations(self):
+        self.assertEqual(self.folded("60 * 60 * 24;"), 86400.0)
+        self.assertEqual(self.folded("-(1 + 2) / 2;"), -1.5)
+        self.assertEqual(self.folded('"a" + "b" + "c";'), "abc")
+        self.assertEqual(self.folded("1 < 2 == !nil;"), True)
+        self.assertEqual(self.folded('nil or "x";'), "x")
+        self.assertEqual(self.folded("0 and 1;"), 0.0)
+
+    def test_leaves_failing_operations(self):
+        self.assertIsNone(self.folded('1 + "a";'))
+        self.assertIsNone(self.folded('-"a";'))
+        self.assertIsNone(self.folded("1 / 0;"))
+
+        self.assertEqual(
+            run('print 1;\nprint -"a";'),
+            "1\n[line 2] RuntimeError: Operand must be a number.\n",
+        )
+
+    def test_propagates_unassigned_locals(self):
+        source = """fun f(p) {
+  var a = 2 * 3;
+  var b = 1;
+  var c = p;
+  var d;
+  while (b < a) { b = b + 1; }
+  print a + 1;
+  print b;
+  print c;
+  print d;
+}
+"""
+        body = self.fold(source)[0].body.statements
+        a, b, c, d = (stmt.expr for stmt in body[5:])
+
+        self.assertEqual(a.value, 7.0)
+        self.assertIsInstance(b, Variable)
+        self.assertIsInstance(c, Variable)
+        self.assertIsNone(d.value)
+
+    def test_leaves_globals(self):
+        expr = self.fold("var a = 1; a + 1;")[1].expr
+        self.assertIsInstance(expr, Binary)
+
+    def test_programs(self):
+        source = """fun f() {
+  var a = "a";
+  { var b = 1; print a + b; }
+  { var b = 2; fun g() { return a + "g"; } print b; print g(); }
+}
+f();
+"""
+        self.assertEqual(
+            run(source),
+            "[line 3] RuntimeError: Operands must be two numbers or two strings.\n",
+        )
+        self.assertEqual(run(source.replace("a + b", "b")), "1\n2\nag\n")
+
+    def test_lazy_bodies(self):
+        source = """class A { get() { var a = 1; return a + 2; } }
+fun f() { var s = "s"; return s + s; }
+print A().get();
+print f();
+"""
+        self.assertEqual(run(source, lazy_functions=True), "3\nss\n")
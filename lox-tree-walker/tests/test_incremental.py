@@ -0,0 +1,81 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+from lox.incremental import IncrementalFrontEnd
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+from tests.helpers import dump
+
+
+class TestIncrementalFrontEnd(unittest.TestCase):
+    source = """fun add(a, b) {
+  return a + b;
+}
+
+// the first class
+class Point {
+  init(x, y) { this.x = x; this.y = y; }
+}
+
+var p = Point(1, 2);
+print add(p.x, p.y);
+print "done
+here";
+"""
+
+    def assert_matches_full_parse(self, front_end: IncrementalFrontEnd):
+        with redirect_stdout(io.StringIO()):
+            expected = Parser(RegexLexer(front_end.source).iter_tokens()).parse()
+            Resolver().resolve_statements(expected)
+
+        self.assertEqual(dump(front_end.program), dump(expected))
+
+    def test_initial_parse(self):
+        front_end = IncrementalFrontEnd(self.source)
+
+        self.assertEqual(len(front_end.program), 5)
+        self.assert_matches_full_parse(front_end)
+
+    def test_edit_only_reparses_damaged_declaration(self):
+        front_end = IncrementalFrontEnd(self.source)
+        before = front_end.program
+
+        start = self.source.index("a + b")
+        reparsed = front_end.edit(start, start + 5, "a * b\n")
+
+        self.assertEqual(len(reparsed), 1)
+        self.assertIsNot(front_end.program[0], before[0])
+        for old, new in zip(before[1:], front_end.program[1:]):
+            self.assertIs(old, new)
+
+        self.assert_matches_full_parse(front_end)
+
+    def test_edit_merging_declarations(self):
+        front_end = IncrementalFrontEnd(self.source)
+
+        # turning the comment into code swallows the class declaration
+        start = self.source.index("// the first")
+        with redirect_stdout(io.StringIO()):
+            front_end.edit(start, start + 2, "print")
+
+        self.assert_matches_full_parse(front_end)
+
+    def test_random_edits(self):
+        rng = random.Random(42)
+        snippets = ["", " ", "\n", ";", "}", "{", "var x = 1;", "//", '"', "print 1;"]
+
+        # edits are free to break the program, errors are expected
+        with redirect_stdout(io.StringIO()):
+            for _ in range(200):
+                front_end = IncrementalFrontEnd(self.source)
+
+                for _ in range(3):
+                    start = rng.randint(0, len(front_end.source))
+                    end = min(len(front_end.source), start + rng.randint(0, 10))
+                    front_end.edit(start, end, rng.choice(snippets))
+
+                    self.assert_matches_full_parse(front_end)
@@ -0,0 +1,109 @@
+import unittest
+
+from lox.passes import devirtualise, inline_functions
+
+from tests.helpers import resolve, run
+
+
+class TestInlining(unittest.TestCase):
+    def inline(self, source: str):
+        program = resolve(source)
+
+        devirtualise(program)
+        inline_functions(program)
+        return program
+
+    def calls(self, source: str) -> list:
+        """
+        The calls the last function returns.
+        """
+        statements = self.inline(source)[-1].body.statements
+        return [stmt.value for stmt in statements if hasattr(stmt, "value")]
+
+    def test_inlines_small_functions(self):
+        source = """fun square(x) { return x * x; }
+fun f(x) {
+  var y = 2;
+  return square(y + x);
+}
+"""
+        f = self.inline(source)[1]
+        call = f.body.statements[1].value
+
+        # the parameter is renamed to a slot of its own in the caller
+        self.assertEqual(call.parameters, [2])
+        self.assertEqual(f.body.frame_size, 3)
+        self.assertEqual((call.inlined.left.slot, call.inlined.right.slot), (2, 2))
+
+        self.assertEqual(run(source + "print f(1);"), "9\n")
+
+    def test_inlines_nested_calls_within_budget(self):
+        source = """fun square(x) { return x * x; }
+fun distance(x, y) { return square(x) + square(y); }
+fun f(a) {
+  return distance(a, a + 1);
+  return distance(square(a), square(square(a + 1) + a) - 1);
+}
+"""
+        first, second = self.calls(source)
+
+        self.assertIsNotNone(first.inlined.left.inlined)
+        self.assertEqual(first.parameters, [1, 2])
+        self.assertEqual(first.inlined.left.parameters, [3])
+
+        self.assertIsNotNone(second.inlined)
+        self.assertIsNotNone(second.arguments[0].inlined)
+        self.assertIsNotNone(second.arguments[1].left.inlined)
+
+        self.assertEqual(run(source + "print f(2);"), "13\n")
+
+    def test_leaves_recursive_and_large_functions(self):
+        source = """fun fact(n) { return n < 2 and 1 or n * fact(n - 1); }
+fun even(n) { return n == 0 or odd(n - 1); }
+fun odd(n) { return n != 0 and even(n - 1); }
+fun big(n) { return n + n + n + n + n + n + n + n + n; }
+fun twice(n) { print n; return n * 2; }
+fun f(n) {
+  return fact(n);
+  return even(n);
+  return big(n);
+  return twice(n);
+}
+"""
+        for call in self.calls(source):
+            self.assertIsNone(call.inlined)
+
+        self.assertEqual(run(source + "print f(5);"), "120\n")
+
+    def test_leaves_top_level_calls(self):
+        program = self.inline("fun id(x) { return x; }\nprint id(1);")
+        self.assertIsNone(program[1].expr.inlined)
+
+    def test_behaves_as_a_call(self):
+        source = """fun f(x) { return g(x); }
+print f(1);
+fun g(x) { return -x; }
+"""
+        self.assertEqual(
+            run(source), "[line 1] RuntimeError: Undefined variable 'g'.\n"
+        )
+
+        source = """fun negate(x) {
+  return -x;
+}
+fun f(x) { var y = negate(x); print "unreachable"; }
+f("a");
+"""
+        self.assertEqual(
+            run(source), "[line 2] RuntimeError: Operand must be a number.\n"
+        )
+
+    def test_arguments_are_evaluated_in_order(self):
+        source = """fun first(a, b) { return a; }
+fun f() {
+  var a = 1;
+  return first(a = a + 1, a = a * 10) + a;
+}
+print f();
+"""
+        self.assertEqual(run(source), "22\n")
@@ -0,0 +1,144 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from lox import Lox
+from lox.interpreter import Interpreter
+from lox.lexer import RegexLexer
+from lox.objects.environment import SLOTS, UNDEFINED
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+from tests.helpers import run
+
+
+class TestInterpreter(unittest.TestCase):
+    def test_shadowing(self):
+        source = """var a = "global";
+{
+  var a = "outer";
+  {
+    var b = a;
+    var a = "inner";
+    print a + " " + b;
+  }
+  print a;
+}
+print a;
+"""
+        self.assertEqual(run(source), "inner outer\nouter\nglobal\n")
+
+    def test_closures(self):
+        source = """fun counter() {
+  var count = 0;
+  fun increment() { count = count + 1; return count; }
+  return increment;
+}
+var a = counter();
+var b = counter();
+a(); a();
+print a();
+print b();
+"""
+        self.assertEqual(run(source), "3\n1\n")
+
+    def test_closures_capture_loop_scope(self):
+        source = """var first;
+for (var i = 0; i < 3; i = i + 1) {
+  var j = i;
+  fun get() { return i + j; }
+  if (first == nil) first = get;
+}
+print first();
+"""
+        self.assertEqual(run(source), "3\n")
+
+    def test_shared_scopes(self):
+        source = """fun f() {
+  for (var i = 0; i < 2; i = i + 1) {
+    var fresh;
+    print fresh;
+    fresh = i;
+    { var a = "a" + "1"; print a; }
+    { var b; print b; }
+  }
+}
+f();
+var n = 0;
+while (n < 2) { n = n + 1; }
+print n;
+"""
+        self.assertEqual(run(source), "nil\na1\nnil\n" * 2 + "2\n")
+
+    def test_local_functions_and_classes(self):
+        source = """{
+  fun twice(x) { return x * 2; }
+  class Box { init(v) { this.v = v; } get() { return twice(this.v); } }
+  var box = Box(4);
+  print box.get();
+  print box.init(5).v;
+}
+"""
+        self.assertEqual(run(source), "8\n5\n")
+
+    def test_super(self):
+        source = """class A { name() { return "A"; } }
+class B < A { name() { return "B" + super.name(); } }
+{
+  class C < B { name() { var suffix = "C"; return super.name() + suffix; } }
+  print C().name();
+}
+"""
+        self.assertEqual(run(source), "BAC\n")
+
+    def test_globals_persist_between_runs(self):
+        Lox._interpreter = Interpreter()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for line in ["var a = 1;", "fun f() { return a; }", "var a = 2;"]:
+                Lox.run_program(line)
+            Lox.run_program("print f();")
+
+        self.assertEqual(output.getvalue(), "2\n")
+
+    def test_undefined_globals(self):
+        self.assertEqual(
+            run("print missing;"),
+            "[line 1] RuntimeError: Undefined variable 'missing'.\n",
+        )
+        self.assertEqual(
+            run("fun f() { late = 1; }\nf();"),
+            "[line 1] RuntimeError: Undefined variable 'late'.\n",
+        )
+        self.assertEqual(
+            run("fun f() { return late; }\nvar late = 2;\nprint f();"), "2\n"
+        )
+
+    def test_global_slots_are_shared_between_interpreters(self):
+        program = Parser(RegexLexer("var x = 1; print x;").iter_tokens()).parse()
+        Resolver().resolve_statements(program)
+
+        # the second run reuses the slots cached on the nodes by the first
+        for _ in range(2):
+            output = io.StringIO()
+            with redirect_stdout(output):
+                Interpreter().interpret(program)
+
+            self.assertEqual(output.getvalue(), "1\n")
+
+    def test_global_slots_grow_with_names(self):
+        run("var slotA = 1; var slotB = 2;")
+        seen = len(SLOTS)
+
+        # names seen before keep their slots
+        self.assertEqual(run("var slotB = 3; var slotA = 4; print slotA;"), "4\n")
+        self.assertEqual(len(SLOTS), seen)
+
+        # a fresh interpreter pads its table up to the slot it defines
+        interpreter = Interpreter()
+        interpreter.globals.define("slotB", 4)
+        values = interpreter.globals.values
+
+        self.assertEqual(len(values), SLOTS["slotB"] + 1)
+        self.assertEqual(values[SLOTS["slotA"]], UNDEFINED)
@@ -0,0 +1,105 @@
+import unittest
+
+import lox.ast as ast
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+
+from tests.helpers import run
+
+
+class TestLazyFunctions(unittest.TestCase):
+    source = """var prefix = "p";
+
+fun counter() {
+  var n = 0;
+  fun next() { n = n + 1; return n; }
+  return next;
+}
+
+class Base {
+  init(name) { this.name = name; }
+  describe() { return "base " + this.name; }
+}
+
+class Derived < Base {
+  describe() { { var inner = super.describe(); return inner + "!"; } }
+}
+
+fun fib(n) { if (n <= 1) return n; return fib(n - 2) + fib(n - 1); }
+
+fun unused() { this is not even Lox }
+
+var next = counter();
+next();
+print next();
+print Derived("d").describe();
+print fib(10);
+{
+  fun local() { return prefix; }
+  print local();
+}
+"""
+
+    def parse(self, source: str) -> list["ast.statements.Statement"]:
+        return Parser(RegexLexer(source).iter_tokens(), lazy_functions=True).parse()
+
+    def test_matches_eager(self):
+        expected = "2\nbase d!\n55\np\n"
+
+        eager = self.source.replace("fun unused() { this is not even Lox }", "")
+        self.assertEqual(run(eager), expected)
+        self.assertEqual(run(self.source, lazy_functions=True), expected)
+
+    def test_only_top_level_bodies_are_lazy(self):
+        program = self.parse(self.source)
+
+        lazy = [
+            stmt.name.raw
+            for stmt in program
+            if isinstance(stmt, ast.statements.Function)
+            and isinstance(stmt.body, ast.statements.LazyBlock)
+        ]
+        self.assertEqual(lazy, ["counter", "fib", "unused"])
+
+        derived = next(
+            stmt for stmt in program if isinstance(stmt, ast.statements.Class)
+        )
+        self.assertIsNone(derived.methods[0].body.statements)
+
+        block = program[-1]
+        self.assertIsInstance(block.statements[0].body.statements, list)
+
+    def test_body_errors_are_reported_on_call(self):
+        source = "fun broken() { print ; }\nprint 1;\nbroken();\nprint 2;"
+
+        self.assertEqual(
+            run(source, lazy_functions=True),
+            "1\n"
+            "[line 1] ParseError at ';': Expected expression.\n"
+            "[line 1] RuntimeError: Couldn't compile 'broken'.\n",
+        )
+
+    def test_deep_body_errors_are_reported_once(self):
+        source = "fun f() { print ; print " + "(" * 500 + "1" + ")" * 500 + "; }\nf();"
+
+        self.assertEqual(
+            run(source, lazy_functions=True),
+            "[line 1] ParseError at ';': Expected expression.\n"
+            "[line 1] RuntimeError: Couldn't compile 'f'.\n",
+        )
+
+    def test_body_resolution_errors_are_reported_on_call(self):
+        source = "class A { init() { return 1; } }\nprint 1;\nA();"
+
+        self.assertEqual(
+            run(source, lazy_functions=True),
+            "1\n"
+            "[line 1] ParseError at 'return': Can't return a value from an initialiser.\n"
+            "[line 1] RuntimeError: Couldn't compile 'init'.\n",
+        )
+
+    def test_unclosed_body(self):
+        self.assertEqual(
+            run("fun f() { {", lazy_functions=True),
+            "[line 1] ParseError at end of file: Expected closing '}'.\n",
+        )
@@ -0,0 +1,158 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+from lox import Lox
+from lox.lexer import Lexer, RegexLexer
+from lox.token_buffer import TokenBuffer
+
+
+class TestRegexLexer(unittest.TestCase):
+    def lex(self, lexer_class, source: str):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tokens = lexer_class(source).read_tokens()
+
+        Lox.had_parse_error = False
+        return [
+            (token.type, token.raw, token.line, token.literal) for token in tokens
+        ], output.getvalue()
+
+    def assert_parity(self, source: str):
+        self.assertEqual(self.lex(Lexer, source), self.lex(RegexLexer, source))
+
+    def test_parity_with_lexer(self):
+        source = """// a comment
+class Point < Base {
+    init(x, y) { this.x = x; this.y = y; }
+    sum() { return super.sum() + this.x * this.y / 2.5 - 1; }
+}
+
+fun check(a, b) {
+    if (a != b and !(a == b) or a <= b) print "multi
+line";
+    else while (a >= b) a = a - 1;
+    for (var i = 0; i < 10; i = i + 1) print nil;
+    return true == false;
+}
+"""
+        self.assert_parity(source)
+
+    def test_parity_on_edge_cases(self):
+        tests = [
+            "",
+            "\n\n\n",
+            "1.",
+            ".5",
+            "12.34.56",
+            "abc123def",
+            "a_b",
+            "x = 1 // trailing comment",
+            "/ // /",
+            '"unclosed\nstring\n',
+            '"a""b"',
+            "@#$ ^ 1 & 2",
+            "\f\v",
+        ]
+
+        for source in tests:
+            self.assert_parity(source)
+
+    def test_parity_on_random_input(self):
+        alphabet = 'abcfnorstuvw019 \t\n(){},.-+;/*!=<>"@_'
+        rng = random.Random(1234)
+
+        for _ in range(500):
+            source = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            self.assert_parity(source)
+
+
+class TestInterning(unittest.TestCase):
+    def test_identifiers_are_interned(self):
+        source = "var name = name + other; print this;"
+
+        for lexer_class in [Lexer, RegexLexer]:
+            first, second = lexer_class(source), lexer_class(source)
+            tokens = first.read_tokens() + second.read_tokens()
+
+            names = [token.raw for token in tokens if token.raw == "name"]
+            self.assertEqual(len(names), 4)
+            self.assertTrue(all(name is names[0] for name in names))
+
+            this = next(token.raw for token in tokens if token.raw == "this")
+            self.assertIs(this, "this")
+
+    def test_string_literals_are_interned(self):
+        source = 'print "hello" + "hello";'
+
+        for lexer_class in [Lexer, RegexLexer]:
+            strings = [
+                token.literal
+                for token in lexer_class(source).read_tokens()
+                if token.literal is not None
+            ]
+            self.assertIs(strings[0], strings[1])
+
+
+class TestBytesSource(unittest.TestCase):
+    def lex(self, source):
+        return [
+            (token.type, token.raw, token.line, token.literal)
+            for token in RegexLexer(source).read_tokens()
+        ]
+
+    def test_bytes_match_str(self):
+        source = 'class A { f() { return "a\nb" + 1.5 <= 2; } } // done\nprint A;'
+
+        self.assertEqual(self.lex(source.encode()), self.lex(source))
+
+    def test_non_ascii_words_match_str(self):
+        for source in ["var café = 1;\nprint café;", "var a€b = 2;", "if€if naïve"]:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(self.lex(source.encode()), self.lex(source))
+            Lox.had_parse_error = False
+
+    def test_non_ascii_is_decoded(self):
+        source = 'print "héllo";'
+
+        tokens = self.lex(source.encode())
+        self.assertEqual(tokens[1][3], "héllo")
+
+    def test_mmap_source(self):
+        import mmap
+        import tempfile
+
+        source = "var a = 1;\nprint a;"
+        with tempfile.TemporaryFile() as f:
+            f.write(source.encode())
+            f.flush()
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(self.lex(mapped), self.lex(source))
+                self.assertEqual(
+                    [token.raw for token in TokenBuffer.from_source(mapped)],
+                    [token[1] for token in self.lex(source)],
+                )
+
+    def test_unclosed_string_in_mmap(self):
+        import mmap
+        import tempfile
+
+        source = 'print 1;\nprint "one\ntwo\n'
+        with tempfile.TemporaryFile() as f:
+            f.write(source.encode())
+            f.flush()
+
+            output = io.StringIO()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with redirect_stdout(output):
+                    tokens = self.lex(mapped)
+            Lox.had_parse_error = False
+
+        self.assertEqual(tokens[-1][2], 4)
+        self.assertEqual(
+            output.getvalue(),
+            "[line 4] ParseError at end of file: Unclosed string literal.\n",
+        )
@@ -0,0 +1,163 @@
+import unittest
+
+from lox.ast.expressions import Assignment, Unary
+from lox.ast.statements import Block, While
+from lox.passes import fold_constants
+from lox.passes.loops import TEMPORARY, optimise_loops
+
+from tests.helpers import resolve, run
+
+
+class TestLoopOptimisation(unittest.TestCase):
+    def optimise(self, source: str):
+        program = resolve(source)
+
+        fold_constants(program)
+        optimise_loops(program)
+        return program
+
+    def loop(self, source: str) -> tuple[list, While]:
+        """
+        The temporaries declared before the loop in a function, and the
+        loop itself.
+        """
+        body = self.optimise(source)[0].body.statements
+        statements = body[1].statements
+
+        if type(statements[-1]) is Block:
+            statements = statements[-1].statements
+        return statements[:-1], statements[-1]
+
+    def test_hoists_invariant_expressions(self):
+        source = """fun f(n) {
+  var limit = n - 1;
+  for (var i = 0; i < limit * 2; i = i + 1) {
+    print (limit + 1) * (limit - 1) + i;
+    print (limit + 1) * (limit - 1);
+  }
+}
+"""
+        temporaries, loop = self.loop(source)
+
+        self.assertEqual(len(temporaries), 2)
+        self.assertTrue(all(var.name is TEMPORARY for var in temporaries))
+        self.assertIs(loop.condition.right.name, TEMPORARY)
+
+        # the same expression shares a temporary
+        first, second = loop.body.statements[0].statements
+        self.assertIs(second.expr.name, TEMPORARY)
+        self.assertEqual(first.expr.left.slot, temporaries[1].slot)
+        self.assertEqual(second.expr.slot, temporaries[1].slot)
+
+        self.assertEqual(run(source + "f(3);"), "3\n3\n4\n3\n5\n3\n6\n3\n")
+
+    def test_signed_zeros_do_not_share_a_temporary(self):
+        source = """fun f() {
+  var z = -0;
+  z = -0;
+  var i = 0;
+  while (i < 1) { print z + 0; print z + -0; i = i + 1; }
+}
+f();
+"""
+        self.assertEqual(run(source), "0\n-0\n")
+
+    def test_leaves_expressions_which_might_change_or_fail(self):
+        source = """fun f(n, o) {
+  var a = 1;
+  var i = 0;
+  while (i < 3) {
+    print n + 1;
+    print a * 2;
+    print o.x;
+    o.x = o.x + 1;
+    if (i > 5) print 1 / a;
+    i = i + 1;
+    a = a + 1;
+  }
+}
+"""
+        program = self.optimise(source)
+        self.assertIs(type(program[0].body.statements[2]), While)
+
+    def test_hoists_failing_expression_first_in_condition(self):
+        source = """fun f(n) {
+  var i = 0;
+  while (-n < i and -n < 0) i = i + 1;
+}
+f("a");
+"""
+        temporaries, loop = self.loop(source)
+
+        # the second negation is only evaluated if the first is truthy
+        self.assertEqual(len(temporaries), 1)
+        self.assertIs(loop.condition.left.left.name, TEMPORARY)
+        self.assertIs(type(loop.condition.right.left), Unary)
+
+        self.assertEqual(
+            run(source), "[line 3] RuntimeError: Operand must be a number.\n"
+        )
+
+    def test_strength_reduces_induction_variables(self):
+        source = """fun f() {
+  var total = 0;
+  for (var i = 0; i < 4; i = i + 1) {
+    total = total + (i * 3 + 1) * (i * 3 + 1);
+  }
+  return total;
+}
+print f();
+"""
+        (index,), loop = self.loop(source)
+        increment, update = loop.body.statements[1:]
+
+        self.assertEqual(index.initialiser.left.right.value, 3.0)
+        self.assertEqual(index.initialiser.right.value, 1.0)
+        self.assertIs(type(update.expr), Assignment)
+        self.assertEqual(update.expr.value.right.value, 3.0)
+        self.assertEqual(update.expr.slot, index.slot)
+
+        self.assertEqual(run(source), "166\n")
+
+    def test_keeps_negative_zero_multiples(self):
+        source = """fun f() {
+  var i = 1;
+  while (i > -1) { print i * -1; print i * -1; print i * -1; i = i - 1; }
+  var j = 0;
+  while (j > -2) { print j * 0; print 0 * j; print j * 0; j = j - 1; }
+}
+f();
+"""
+        self.assertEqual(
+            run(source), "-1\n-1\n-1\n-0\n-0\n-0\n0\n0\n0\n-0\n-0\n-0\n"
+        )
+
+    def test_leaves_top_level_loops(self):
+        program = self.optimise("var n = 2;\nwhile (n < 3) { print n * 2; n = n + 1; }")
+        self.assertIs(type(program[1]), While)
+
+    def test_nested_loops(self):
+        source = """fun f(size) {
+  var last = size - 1;
+  var total = 0;
+  for (var y = 0; y < size; y = y + 1) {
+    for (var x = 0; x < size; x = x + 1) {
+      var dx = last - x;
+      if (dx * dx + (last - y) * (last - y) < last * last)
+        total = total + (x * 2 + 1) * (x * 2 + 1);
+    }
+  }
+  return total;
+}
+print f(10);
+fun g() {
+  var i = 0;
+  fun next() { i = i + 1; }
+  var seen = "";
+  while (i * 2 < 6) { seen = seen + "x"; next(); }
+  return seen;
+}
+print g();
+"""
+        self.assertEqual(run(source), "11671\nxxx\n")
+        self.assertEqual(run(source, lazy_functions=True), "11671\nxxx\n")
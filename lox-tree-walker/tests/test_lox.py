@@ -0,0 +1,56 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from lox import Lox
+from lox.cache import DIRECTORY
+from lox.interpreter import Interpreter
+
+
+class TestLox(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_file(self, source: bytes, use_cache: bool = False) -> str:
+        Lox._interpreter = Interpreter()
+
+        path = os.path.join(self.directory.name, "script.lox")
+        with open(path, "wb") as f:
+            f.write(source)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            Lox.run_file(path, use_cache)
+
+        return output.getvalue()
+
+    def test_run_file(self):
+        source = 'var greeting = "héllo";\nprint greeting + " world";'
+
+        self.assertEqual(self.run_file(source.encode()), "héllo world\n")
+
+    def test_run_file_with_non_ascii_identifiers(self):
+        source = "var café = 1;\nprint café + 1;"
+
+        self.assertEqual(self.run_file(source.encode()), "2\n")
+
+    def test_run_file_from_cache(self):
+        source = b"fun add(a, b) { return a + b; }\nprint add(1, 2);"
+
+        self.assertEqual(self.run_file(source, use_cache=True), "3\n")
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.directory.name, DIRECTORY))), 1
+        )
+        self.assertEqual(self.run_file(source, use_cache=True), "3\n")
+
+    def test_run_file_caches_only_when_asked(self):
+        self.assertEqual(self.run_file(b"print 1;"), "1\n")
+        self.assertEqual(os.listdir(self.directory.name), ["script.lox"])
+
+    def test_run_empty_file(self):
+        self.assertEqual(self.run_file(b""), "")
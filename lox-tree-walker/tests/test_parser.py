@@ -0,0 +1,147 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+import lox.ast as ast
+from lox.lexer import Lexer, RegexLexer, TokenType
+from lox.parser import Parser
+
+from tests.helpers import dump
+
+
+class GrammarParser(Parser):
+    """
+    Parses expressions by following the grammar one rule per method,
+    as a reference for the precedence climbing parser.
+    """
+
+    def assignment(self):
+        expr = self.logic_or()
+
+        if self.match(TokenType.EQUAL):
+            equals = self.previous()
+            value = self.assignment()
+
+            if isinstance(expr, ast.expressions.Variable):
+                return ast.expressions.Assignment(expr.name, value)
+            elif isinstance(expr, ast.expressions.Get):
+                return ast.expressions.Set(expr.object, expr.name, value)
+
+            self.error(equals, "Invalid assignment target.")
+
+        return expr
+
+    def logic_or(self):
+        expr = self.logic_and()
+        while self.match(TokenType.OR):
+            expr = ast.expressions.Logical(expr, self.previous(), self.logic_and())
+        return expr
+
+    def logic_and(self):
+        expr = self.equality()
+        while self.match(TokenType.AND):
+            expr = ast.expressions.Logical(expr, self.previous(), self.equality())
+        return expr
+
+    def equality(self):
+        expr = self.comparison()
+        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
+            expr = ast.expressions.Binary(expr, self.previous(), self.equality())
+        return expr
+
+    def comparison(self):
+        expr = self.term()
+        while self.match(
+            TokenType.LESS,
+            TokenType.LESS_EQUAL,
+            TokenType.GREATER,
+            TokenType.GREATER_EQUAL,
+        ):
+            expr = ast.expressions.Binary(expr, self.previous(), self.comparison())
+        return expr
+
+    def term(self):
+        expr = self.factor()
+        while self.match(TokenType.PLUS, TokenType.MINUS):
+            expr = ast.expressions.Binary(expr, self.previous(), self.factor())
+        return expr
+
+    def factor(self):
+        expr = self.unary()
+        while self.match(TokenType.STAR, TokenType.SLASH):
+            expr = ast.expressions.Binary(expr, self.previous(), self.unary())
+        return expr
+
+
+class TestParser(unittest.TestCase):
+    def test_parse_streams_tokens(self):
+        source = "var a = 1;\n" * 1000
+        pulled = 0
+
+        def tokens():
+            nonlocal pulled
+            for token in RegexLexer(source).iter_tokens():
+                pulled += 1
+                yield token
+
+        statements = Parser(tokens()).iter_parse()
+
+        first = next(statements)
+        self.assertIsInstance(first, ast.statements.Var)
+        self.assertLessEqual(pulled, 6)
+
+        self.assertEqual(len(list(statements)), 999)
+        self.assertEqual(pulled, 5001)
+
+    def test_parse_accepts_token_list(self):
+        source = "print 1 + 2; { var a; }"
+
+        from_list = Parser(Lexer(source).read_tokens()).parse()
+        from_stream = Parser(Lexer(source).iter_tokens()).parse()
+
+        self.assertEqual(
+            [type(stmt) for stmt in from_list], [type(stmt) for stmt in from_stream]
+        )
+        self.assertEqual(
+            [ast.statements.Print, ast.statements.Block],
+            [type(stmt) for stmt in from_list],
+        )
+
+    def test_matches_grammar(self):
+        tests = [
+            "1;",
+            "a = b = c;",
+            "a.b = c or d and e;",
+            "a == b != c == d;",
+            "a < b <= c > d >= e;",
+            "a - b - c + d * e / f * g;",
+            "-a * !b - -c;",
+            "a + b = c;",
+            "!a.b(c, d)(e).f;",
+            "a or b == c < d + e * -f and g;",
+            "(a + b) * (c = d);",
+            "super.method(this, nil, true, false, 1.5, \"s\");",
+        ]
+
+        for source in tests:
+            self.assert_matches_grammar(source)
+
+    def test_matches_grammar_on_random_expressions(self):
+        operands = ["a", "1", "(b)", "c.d", "e(f)", "-g", "!h", "true"]
+        operators = ["or", "and", "==", "!=", "<", "<=", ">", ">=", "+", "-", "*", "/"]
+        rng = random.Random(7)
+
+        for _ in range(300):
+            parts = [rng.choice(operands)]
+            for _ in range(rng.randint(0, 8)):
+                parts += [rng.choice(operators + ["="]), rng.choice(operands)]
+
+            self.assert_matches_grammar(" ".join(parts) + ";")
+
+    def assert_matches_grammar(self, source: str):
+        with redirect_stdout(io.StringIO()):
+            expected = GrammarParser(Lexer(source).iter_tokens()).parse()
+            actual = Parser(Lexer(source).iter_tokens()).parse()
+
+        self.assertEqual(dump(actual), dump(expected), source)
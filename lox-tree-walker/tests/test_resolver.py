@@ -0,0 +1,144 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from lox import Lox
+from lox.ast.expressions import VariableKind
+from lox.ast.flat import FlatAST
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.resolver import Resolver
+
+from benchmarks import sources
+
+
+class ScanningResolver(Resolver):
+    """
+    Resolves by searching the scopes innermost first, as a reference
+    for the binding stacks, counting the scopes with frames of their
+    own on the way out.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.slots = []
+
+    def begin_scope(self, shared=False):
+        super().begin_scope(shared)
+        self.slots.append({})
+
+    def end_scope(self):
+        self.slots.pop()
+        return super().end_scope()
+
+    def bind(self, name, defined):
+        slot = super().bind(name, defined)
+        self.slots[-1][name] = slot
+        return slot
+
+    def resolve_local(self, expr, name):
+        depth = 0
+
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if name.raw in self.scopes[i]:
+                expr.kind = VariableKind.LOCAL
+                expr.depth = depth
+                expr.slot = self.slots[i][name.raw]
+                return
+
+            if self.marks[i] is None:
+                depth += 1
+
+
+class TestResolver(unittest.TestCase):
+    def resolve(self, resolver_class, source: str):
+        program = Parser(RegexLexer(source).iter_tokens()).parse()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            resolver_class().resolve_statements(program)
+
+        Lox.had_parse_error = False
+
+        # the flat columns list every annotation in a fixed order
+        flat = FlatAST.from_tree(program)
+        return [
+            (flat.kinds[i], flat.tokens[i], flat.depths[i], flat.slots[i])
+            for i in range(len(flat))
+        ], output.getvalue()
+
+    def assert_matches_scan(self, source: str):
+        expected, expected_errors = self.resolve(ScanningResolver, source)
+        actual, errors = self.resolve(Resolver, source)
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(errors, expected_errors)
+
+    def test_matches_scan(self):
+        source = """var a = 1;
+fun outer(a, b) {
+  { var a = b; { print a; var b = a; print b; } print b; }
+  fun inner() { return a + b; }
+  return inner;
+}
+class A { init() { this.x = a; } get() { return this.x; } }
+class B < A { get() { var this_x = super.get(); return this_x; } }
+{ var c; { var c = c; } }
+{ var d = 1; var d = 2; }
+"""
+        self.assert_matches_scan(source)
+
+    def test_matches_scan_on_generated_sources(self):
+        self.assert_matches_scan(sources.program(20))
+        self.assert_matches_scan(sources.nested(5, 30))
+
+    def test_bindings_are_released(self):
+        resolver = Resolver()
+        program = Parser(RegexLexer(sources.nested(3, 10)).iter_tokens()).parse()
+
+        resolver.resolve_statements(program)
+
+        self.assertEqual(resolver.bindings, {})
+        self.assertEqual(len(resolver.scopes), 0)
+
+    def test_annotations(self):
+        source = "fun f(a, b) { var c; { print b + c + d; } }"
+        program = Parser(RegexLexer(source).iter_tokens()).parse()
+
+        Resolver().resolve_statements(program)
+
+        expr = program[0].body.statements[1].statements[0].expr
+        b, c, d = expr.left.left, expr.left.right, expr.right
+
+        # the inner block binds nothing, so it shares the function's frame
+        self.assertEqual((b.kind, b.depth, b.slot), (VariableKind.LOCAL, 0, 1))
+        self.assertEqual((c.kind, c.depth, c.slot), (VariableKind.LOCAL, 0, 2))
+        self.assertEqual((d.kind, d.depth, d.slot), (VariableKind.GLOBAL, None, None))
+
+    def test_frames(self):
+        source = """fun f(a) {
+  { var b; { var c; } { var d; var e; } }
+  for (var i = 0; i < a; i = i + 1) { var g; fun h() { return g; } }
+}
+"""
+        program = Parser(RegexLexer(source).iter_tokens()).parse()
+
+        Resolver().resolve_statements(program)
+
+        body = program[0].body
+        block, loop = body.statements
+        inner, sibling = block.statements[1:]
+        loop_body = loop.statements[1].body.statements[0]
+
+        # capture free blocks reuse slots of the function's frame
+        self.assertEqual(body.frame_size, 4)
+        self.assertEqual(block.frame_size, None)
+        self.assertEqual((inner.frame_size, inner.statements[0].slot), (None, 2))
+        self.assertEqual(sibling.frame_size, None)
+        self.assertEqual([var.slot for var in sibling.statements], [2, 3])
+
+        # h could capture i or g, so they get scopes of their own, with
+        # a fresh one for g on each iteration
+        self.assertEqual(loop.frame_size, 1)
+        self.assertEqual(loop.statements[1].body.frame_size, None)
+        self.assertEqual(loop_body.frame_size, 2)
@@ -0,0 +1,211 @@
+import unittest
+
+from lox import ssa
+from lox.passes import fold_constants
+
+from tests.helpers import resolve, run
+
+
+def parse(source: str):
+    program = resolve(source)
+
+    fold_constants(program)
+    return program
+
+
+def lower(source: str) -> "ssa.Function":
+    """
+    The first function declared, or the first method of the first
+    class, in SSA form.
+    """
+    declaration = parse(source)[0]
+    if hasattr(declaration, "methods"):
+        declaration = declaration.methods[0]
+
+    function = ssa.lower(declaration)
+    ssa.verify(function)
+    return function
+
+
+class TestLowering(unittest.TestCase):
+    def test_format(self):
+        function = lower("fun f(a, b) { var c = a + b; return c * (a + b); }")
+
+        self.assertEqual(
+            ssa.format_function(function),
+            """block 0:
+  %0 = parameter 0 a
+  %1 = parameter 1 b
+  %2 = binary + %0, %1
+  %3 = binary + %0, %1
+  %4 = binary * %2, %3
+  return %4""",
+        )
+
+    def test_loops_join_in_phis(self):
+        function = lower("fun f(a) { var x = 0; while (x < a) x = x + 1; return x; }")
+        header = function.blocks[1]
+
+        self.assertEqual([p.id for p in header.predecessors], [0, 2])
+        self.assertEqual(len(header.phis), 1)
+        self.assertIn("%3 = phi %1, %8", ssa.format_function(function))
+
+    def test_verify(self):
+        function = lower("fun f(a) { if (a) print 1; else print 2; return a; }")
+        then_branch = function.blocks[1]
+        then_branch.predecessors = []
+
+        with self.assertRaises(ssa.VerificationError):
+            ssa.verify(function)
+
+    def test_verify_dominance(self):
+        function = lower("fun f(a) { var b = a; if (a) b = -a; return b; }")
+        then_branch, join = function.blocks[1], function.blocks[-1]
+        negated = then_branch.instructions[0]
+        join.terminator.operands = [negated]
+
+        with self.assertRaises(ssa.VerificationError):
+            ssa.verify(function)
+
+    def test_unsupported(self):
+        for source in [
+            "fun f() { fun g() {} return g; }",
+            "fun f() { class A {} return A; }",
+            "class A < B { m() { return super.m; } }",
+        ]:
+            with self.assertRaises(ssa.Unsupported):
+                lower(source)
+
+
+class TestOptimisations(unittest.TestCase):
+    def test_number_values(self):
+        function = lower("fun f(a, b) { var c = a * b; return c + b * a + a + b; }")
+
+        self.assertEqual(ssa.number_values(function), 1)
+        ssa.verify(function)
+
+        listing = ssa.format_function(function)
+        self.assertIn("binary + %2, %2", listing)
+        # strings can be added too, so a + b is not b + a
+        self.assertEqual(listing.count("binary +"), 3)
+
+    def test_fields_set_are_forwarded_until_set(self):
+        source = """class P {
+  m(o, a) { this.x = a; this.y = a; o.x = 1; return this.x + this.y + this.z; }
+}"""
+        function = lower(source)
+        ssa.number_values(function)
+
+        listing = ssa.format_function(function)
+        # o may be this, so x is read again, but y is not
+        self.assertEqual(listing.count("get x"), 1)
+        self.assertEqual(listing.count("get y"), 0)
+        self.assertEqual(listing.count("get z"), 1)
+
+    def test_fields_set_are_forwarded_across_joins(self):
+        source = """class P {
+  m(a) {
+    this.x = a; this.y = a;
+    if (a) this.y = -a; else print this.y;
+    while (a) { print this.x; a = a - 1; }
+    return this.x + this.y;
+  }
+}"""
+        function = lower(source)
+        ssa.number_values(function)
+
+        listing = ssa.format_function(function)
+        # only y is set on the way, along one path
+        self.assertEqual(listing.count("get x"), 0)
+        self.assertEqual(listing.count("get y"), 1)
+
+    def test_fields_read_twice_are_read_twice(self):
+        # each read of a method binds it afresh
+        function = lower("class P { m() { return this.m == this.m; } }")
+        ssa.number_values(function)
+
+        self.assertEqual(ssa.format_function(function).count("get m"), 2)
+
+    def test_calls_clobber_fields(self):
+        function = lower("class P { m(f) { var a = this.x; f(); return this.x + a; } }")
+        ssa.number_values(function)
+
+        self.assertEqual(ssa.format_function(function).count("get x"), 2)
+
+    def test_eliminate_dead_stores(self):
+        source = """class P {
+  init(x) { this.x = 0; this.x = x; this.y = this.x + this.x; }
+}"""
+        function = lower(source)
+
+        self.assertEqual(ssa.number_values(function), 6)
+        self.assertEqual(ssa.eliminate_dead_stores(function), 2)
+        ssa.verify(function)
+
+        listing = ssa.format_function(function)
+        self.assertEqual(listing.count("set x"), 1)
+        self.assertNotIn("constant 0.0", listing)
+
+    def test_stores_seen_by_failures_are_kept(self):
+        # the error could be caught by the REPL, which would see this.x
+        source = "class P { m(a) { this.x = 1; var b = -a; this.x = b; } }"
+        function = lower(source)
+
+        self.assertEqual(ssa.eliminate_dead_stores(function), 0)
+
+        source = "class P { m(o) { o.x = 1; o.x = 2; } }"
+        self.assertEqual(ssa.eliminate_dead_stores(lower(source)), 0)
+
+
+class TestGenerate(unittest.TestCase):
+    programs = [
+        """class Point {
+  init(x, y) { this.x = 0; this.y = 0; this.x = x; this.y = y; }
+  length() { return this.x * this.x + this.y * this.y; }
+}
+print Point(3, 4).length();
+""",
+        """fun fib(n) {
+  var a = 0; var b = 1;
+  while (n > 0) { var t = a + b; a = b; b = t; n = n - 1; }
+  return a;
+}
+print fib(20);
+""",
+        """fun f(a, b) {
+  var c = a and b or "neither";
+  if (!c) return nil;
+  for (var i = 0; i < 3 and c; i = i + 1) print c + i;
+  return a == b;
+}
+print f(1, 2);
+print f(nil, 1);
+""",
+        """fun f(a) { print a; return -a; }
+print f("oops");
+""",
+        """class A { m() {} }
+fun f(a) { print a.m == a.m; var g = a.m; print g == a.m; }
+f(A());
+""",
+    ]
+
+    def test_optimise(self):
+        for source in self.programs:
+            with self.subTest(source=source):
+                self.assertEqual(run(source, optimise_ssa=True), run(source))
+
+    def test_runtime_error_lines(self):
+        source = "fun f(a) {\n  var b = a + 1;\n  return b * a;\n}\nprint f(true);\n"
+        output = run(source, optimise_ssa=True)
+
+        self.assertIn("[line 2]", output)
+        self.assertEqual(output, run(source))
+
+    def test_optimise_reports(self):
+        program = parse(self.programs[0] + "fun g() { fun h() {} return h; }")
+        optimised = ssa.optimise(program)
+
+        self.assertEqual(optimised.functions, 2)
+        self.assertEqual(optimised.eliminated, 3)
+        self.assertIn("2 functions", str(optimised))
@@ -0,0 +1,201 @@
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+import lox.ast as ast
+from lox import Lox
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.stack_parser import StackParser
+
+from tests.helpers import dump, run
+
+DEPTH = 20000
+
+
+class TestStackParser(unittest.TestCase):
+    def parse(self, parser_class, source: str):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            program = parser_class(RegexLexer(source).iter_tokens()).parse()
+
+        Lox.had_parse_error = False
+        return program, output.getvalue()
+
+    def assert_parity(self, source: str):
+        expected, expected_errors = self.parse(Parser, source)
+        actual, errors = self.parse(StackParser, source)
+
+        self.assertEqual(dump(actual), dump(expected), source)
+        self.assertEqual(errors, expected_errors, source)
+
+    def test_parity(self):
+        tests = [
+            "print -a.b(c, d)(e).f * (g + h) == i or j and !k;",
+            "a = b.c = d;",
+            "for (var i = 0; i < 10; i = i + 1) { if (i) print i; else {} }",
+            "for (;;) while (x) return;",
+            "class A < B { init(x) { this.x = super.y(x); } }",
+            "fun f(a, b) { fun g() { return a; } return g; }",
+            "var a; var b = nil;",
+        ]
+
+        for source in tests:
+            self.assert_parity(source)
+
+    def test_parity_on_errors(self):
+        tests = [
+            "print ;",
+            "a + b = c; print 1;",
+            "class { } print 2;",
+            "fun f( { print 3; }",
+            "{ var a = ; print 4; }",
+            "f(a, b;",
+            "(1 + 2;",
+        ]
+
+        for source in tests:
+            self.assert_parity(source)
+
+    def test_parity_on_random_statements(self):
+        pieces = [
+            "a", "1", "(", ")", "{", "}", "+", "*", "=", "==", ";", "print",
+            "var", "if", "else", "while", "fun", "return", ",", ".", "b",
+        ]  # fmt: skip
+        rng = random.Random(13)
+
+        for _ in range(300):
+            source = " ".join(rng.choice(pieces) for _ in range(rng.randint(0, 25)))
+            self.assert_parity(source)
+
+
+class TestDeepNesting(unittest.TestCase):
+    """
+    Generated inputs nested far past the recursion limit, through
+    Parser, which has to fall back to the StackParser for them.
+    """
+
+    def parse(self, source: str) -> list["ast.statements.Statement"]:
+        output = io.StringIO()
+        with redirect_stdout(output):
+            program = Parser(RegexLexer(source).iter_tokens()).parse()
+
+        self.assertEqual(output.getvalue(), "")
+        return program
+
+    def descend(self, node, attribute: str) -> tuple[object, int]:
+        depth = 0
+        while isinstance(getattr(node, attribute, None), ast.expressions.Expression):
+            node = getattr(node, attribute)
+            depth += 1
+
+        return node, depth
+
+    def test_groupings(self):
+        source = "print " + "(" * DEPTH + "1" + ")" * DEPTH + ";"
+
+        [statement] = self.parse(source)
+        leaf, depth = self.descend(statement.expr, "expr")
+
+        self.assertEqual(depth, DEPTH)
+        self.assertEqual(leaf.value, 1.0)
+
+    def test_blocks(self):
+        source = "{" * DEPTH + "print 1;" + "}" * DEPTH
+
+        [block] = self.parse(source)
+        depth = 1
+        while isinstance(block.statements[0], ast.statements.Block):
+            block = block.statements[0]
+            depth += 1
+
+        self.assertEqual(depth, DEPTH)
+        self.assertIsInstance(block.statements[0], ast.statements.Print)
+
+    def test_right_associative_chains(self):
+        for operator, attribute in [("==", "right"), ("=", "value")]:
+            source = f"a {operator} " * DEPTH + "b;"
+
+            [statement] = self.parse(source)
+            leaf, depth = self.descend(statement.expr, attribute)
+
+            self.assertEqual(depth, DEPTH)
+            self.assertEqual(leaf.name.raw, "b")
+
+    def test_nested_statements_and_calls(self):
+        source = "if (a) while (b) " * (DEPTH // 2) + "f(" * DEPTH + ")" * DEPTH + ";"
+
+        [statement] = self.parse(source)
+
+        node, depth = statement, 0
+        while not isinstance(node, ast.statements.Expression):
+            node = node.then_branch if isinstance(node, ast.statements.If) else node.body
+            depth += 1
+        self.assertEqual(depth, DEPTH)
+
+        call, depth = node.expr, 1
+        while call.arguments:
+            call = call.arguments[0]
+            depth += 1
+        self.assertEqual(depth, DEPTH)
+
+    def test_stream_continues_after_fallback(self):
+        source = "print 1;\nprint " + "-(" * DEPTH + "2" + ")" * DEPTH + ";\nprint 3;"
+
+        program = self.parse(source)
+
+        self.assertEqual(len(program), 3)
+        self.assertEqual(program[2].expr.value, 3.0)
+        self.assertEqual(program[1].expr.operator.line, 2)
+
+    def test_errors_before_fallback_are_reported_once(self):
+        deep = "(" * DEPTH + "1" + ")" * DEPTH
+        source = f"fun f() {{ var x = 1 +; print {deep}; }}"
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            program = Parser(RegexLexer(source).iter_tokens()).parse()
+        Lox.had_parse_error = False
+
+        self.assertEqual(
+            output.getvalue(), "[line 1] ParseError at ';': Expected expression.\n"
+        )
+        self.assertEqual(len(program), 1)
+
+
+class TestRunningDeepNesting(unittest.TestCase):
+    """
+    The same inputs resolved, optimised and run end to end, which the
+    passes and the interpreter walk recursively.
+    """
+
+    def test_groupings_and_blocks(self):
+        grouping = "(" * DEPTH + "1" + ")" * DEPTH
+        tests = [
+            "print " + grouping + ";",
+            "{" * DEPTH + "print 1;" + "}" * DEPTH,
+            "var a = 1; "
+            + "if (a) while (a) " * (DEPTH // 2)
+            + "{ print a; a = nil; }",
+        ]
+
+        for source in tests:
+            self.assertEqual(run(source), "1\n")
+
+    def test_function_bodies(self):
+        grouping = "(" * DEPTH + "1" + ")" * DEPTH
+        source = f"fun f() {{ return {grouping}; }} print f();"
+
+        for options in [{}, {"lazy_functions": True}, {"optimise_ssa": True}]:
+            self.assertEqual(run(source, **options), "1\n", options)
+
+    def test_too_deeply_nested(self):
+        source = "{" * (DEPTH * 3) + "}" * (DEPTH * 3)
+
+        self.assertEqual(run(source), "Error: Too deeply nested.\n")
+
+    def test_stack_overflow(self):
+        source = "fun f(n) {\n  return f(n + 1);\n}\nprint f(0);"
+
+        self.assertEqual(run(source), "[line 2] RuntimeError: Stack overflow.\n")
@@ -0,0 +1,45 @@
+import unittest
+
+import lox.ast as ast
+from lox.lexer import RegexLexer
+from lox.parser import Parser
+from lox.token_buffer import TokenBuffer
+
+
+class TestTokenBuffer(unittest.TestCase):
+    source = """class A < B {
+    init(x) { this.x = x * 2.5; }
+}
+// comment
+print "two
+lines" + A(1).x;
+"""
+
+    def test_tokens_match_lexer(self):
+        expected = [
+            (token.type, token.raw, token.line, token.literal)
+            for token in RegexLexer(self.source).read_tokens()
+        ]
+        buffer = TokenBuffer.from_source(self.source)
+
+        self.assertEqual(len(buffer), len(expected))
+        self.assertEqual(
+            [(token.type, token.raw, token.line, token.literal) for token in buffer],
+            expected,
+        )
+
+    def test_columns(self):
+        buffer = TokenBuffer.from_source("var abc = 12;")
+
+        self.assertEqual(buffer.raw_at(1), "abc")
+        self.assertEqual(buffer.type_at(3).name, "NUMBER")
+        self.assertEqual(list(buffer.starts), [0, 4, 8, 10, 12, 13])
+        self.assertEqual(list(buffer.lengths), [3, 3, 1, 2, 1, 0])
+
+    def test_parser_reads_buffer(self):
+        program = Parser(TokenBuffer.from_source(self.source)).parse()
+
+        self.assertEqual(
+            [type(stmt) for stmt in program],
+            [ast.statements.Class, ast.statements.Print],
+        )